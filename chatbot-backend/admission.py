@@ -0,0 +1,186 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Admission control and per-client rate limiting
+
+Aynı anda işlenen istek sayısı sınırlanır; fazlası sınırlı bir kuyrukta bekler.
+Kuyruk doluysa ya da bekleme süresi aşılırsa istek hemen 503 + Retry-After ile
+reddedilir. İstemci başına (IP / oturum) token bucket limitleri 429 döner.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+from llm_client import LatencyStats
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted (queue full or waited too long)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A held concurrency slot; ``release`` is idempotent."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._acquired_at = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller.hold_ms.record((time.perf_counter() - self._acquired_at) * 1000)
+        self._controller._release()
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded FIFO wait queue.
+
+    Up to ``max_concurrent`` requests run at once and up to ``max_queue``
+    wait for at most ``queue_timeout`` seconds; anything beyond is rejected
+    immediately, so overload turns into fast errors instead of timeouts.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.max_queue_depth = 0
+        self.wait_ms = LatencyStats()
+        self.hold_ms = LatencyStats()
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free (from the median hold time)."""
+        hold = self.hold_ms.percentile(50) or 1000.0
+        return max(1, math.ceil(hold / 1000 * (len(self._waiters) + 1) / self.max_concurrent))
+
+    async def acquire(self) -> AdmissionTicket:
+        """Wait for a slot; raises AdmissionRejected on overload."""
+        started = time.perf_counter()
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected("queue_full", self.retry_after())
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    # Slot tam vazgeçerken devredildi: sıradakine aktar
+                    self._release()
+                else:
+                    waiter.cancel()
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                    raise AdmissionRejected("queue_timeout", self.retry_after()) from None
+                raise
+
+        self.admitted += 1
+        self.wait_ms.record((time.perf_counter() - started) * 1000)
+        return AdmissionTicket(self)
+
+    def _release(self) -> None:
+        # Slot doğrudan sıradaki bekleyene devredilir (active sayısı değişmez)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "max_queue_depth_seen": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected,
+            "rejected_timeout": self.timeouts,
+            "wait_ms": self.wait_ms.summary(),
+            "hold_ms": self.hold_ms.summary(),
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets (e.g. per client IP or per session).
+
+    Each key may burst ``burst`` requests and then ``rate_per_minute``
+    requests per minute. At most ``max_keys`` buckets are kept (LRU).
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, max_keys: int = 100000):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key -> (tokens, time)
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def check(self, key: str) -> Optional[float]:
+        """Take one token; returns None if allowed, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                retry_after = None
+                self.allowed += 1
+            else:
+                retry_after = (1.0 - tokens) / self.rate if self.rate > 0 else 60.0
+                self.limited += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def refund(self, key: str) -> None:
+        """Give back the token of an allowed request that was rejected elsewhere."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return
+            tokens, last = bucket
+            self._buckets[key] = (min(float(self.burst), tokens + 1.0), last)
+            self.allowed -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
@@ -0,0 +1,141 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Embedding engine benchmark: PyTorch vs. int8 ONNX
+
+Her motor ayrı bir süreçte ölçülür: model yükleme süresi, tek sorgu gecikmesi
+(p50/p95/p99), indeksleme gibi toplu encode verimi (metin/sn) ve bellek
+kullanımı raporlanır.
+
+Kullanım:
+    python onnx_embeddings.py --export      # önce ONNX modelini oluşturun
+    python benchmarks/bench_embeddings.py --threads 4
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def max_rss_mb() -> float:
+    # Linux'ta ru_maxrss KB cinsindendir
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def load_engine(engine: str, model_name: str, threads: int):
+    if engine == "onnx":
+        from onnx_embeddings import OnnxEmbeddings, default_model_dir
+        return OnnxEmbeddings(default_model_dir(model_name), intra_op_threads=threads)
+
+    import torch
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    if threads > 0:
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+def run_worker(args) -> dict:
+    """Load one engine and measure it; returns measurements."""
+    from onnx_embeddings import load_sample_texts
+
+    texts = load_sample_texts(Path(__file__).resolve().parent.parent.parent / "data")
+    # Toplu encode için korpusu istenen boyuta kadar tekrarla
+    corpus = (texts * (args.texts // len(texts) + 1))[: args.texts]
+    queries = [t[:80] for t in texts]
+
+    rss_before = max_rss_mb()
+    started = time.perf_counter()
+    embeddings = load_engine(args.engine, args.model, args.threads)
+    embeddings.embed_query("warm-up")
+    load_seconds = time.perf_counter() - started
+    rss_model = max_rss_mb() - rss_before
+
+    latencies = []
+    for i in range(args.queries):
+        started = time.perf_counter()
+        embeddings.embed_query(queries[i % len(queries)])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for i in range(0, len(corpus), args.batch_size):
+        embeddings.embed_documents(corpus[i:i + args.batch_size])
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "engine": args.engine,
+        "threads": args.threads,
+        "load_seconds": round(load_seconds, 2),
+        "query_ms_p50": round(percentile(latencies, 50), 2),
+        "query_ms_p95": round(percentile(latencies, 95), 2),
+        "query_ms_p99": round(percentile(latencies, 99), 2),
+        "texts_per_s": round(len(corpus) / batch_seconds, 1),
+        "model_rss_mb": round(rss_model, 1),
+        "peak_rss_mb": round(max_rss_mb(), 1),
+    }
+
+
+def main():
+    from config import get_settings
+
+    parser = argparse.ArgumentParser(description="Benchmark embedding engines")
+    parser.add_argument("--engines", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--model", default=get_settings().embedding_model)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = library default)")
+    parser.add_argument("--queries", type=int, default=200, help="Single-query encodes")
+    parser.add_argument("--texts", type=int, default=1000, help="Texts for the batch encode")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--output", type=str, help="Write results as JSON")
+    # Internal: measure a single engine in this process
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--engine", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+        return
+
+    results = []
+    for engine in args.engines:
+        cmd = [
+            sys.executable, __file__, "--worker", "--engine", engine,
+            "--model", args.model, "--threads", str(args.threads),
+            "--queries", str(args.queries), "--texts", str(args.texts),
+            "--batch-size", str(args.batch_size),
+        ]
+        print(f"🔄 Benchmarking {engine}...")
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n📊 {args.queries} queries, {args.texts} texts (batch {args.batch_size}), threads={args.threads}")
+    header = f"{'engine':<8} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'texts/s':>9} {'model MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['engine']:<8} {r['load_seconds']:>8} {r['query_ms_p50']:>8} "
+            f"{r['query_ms_p95']:>8} {r['query_ms_p99']:>8} {r['texts_per_s']:>9} "
+            f"{r['model_rss_mb']:>9}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Batch search benchmark: search_many vs. one search per query
+
+Aynı sorgu kümesi önce tek tek `search`, sonra farklı batch boyutlarıyla
+`search_many` ile aranır; sorgu/sn ve batch başına gecikme raporlanır.
+Embedding önbelleği her ölçümden önce temizlenir (her sorgu model forward
+pass'inden geçer).
+
+Kullanım:
+    python benchmarks/bench_search_batch.py --queries 256 --batch-sizes 1 4 16 64
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BASE_QUERIES = [
+    "trafo bakımı",
+    "1600 kVA trafo kurulumu",
+    "kompanzasyon panosu",
+    "PLC SCADA otomasyon",
+    "GES teşvik danışmanlığı",
+    "termal kamera ölçümü",
+    "topraklama ölçümü",
+    "teklif süreci kaç gün",
+]
+
+
+def make_queries(count: int) -> list[str]:
+    # Farklı metinler: embedding önbelleği ve coalescing ölçümü bozmasın
+    return [f"{BASE_QUERIES[i % len(BASE_QUERIES)]} {i}" for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched search throughput")
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--output", type=str, help="Write results as JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    from rag_service import RAGService
+
+    rag = RAGService()
+    rag.index_documents(force_reindex=False)
+    queries = make_queries(args.queries)
+    rag.warm_up()
+
+    # Baseline: one search (one forward pass + one lookup) per query
+    rag._embedding_cache.clear()
+    started = time.perf_counter()
+    for query in queries:
+        rag.search(query, k=args.k, score_threshold=0.0, adaptive_k=False)
+    sequential_seconds = time.perf_counter() - started
+    baseline_qps = len(queries) / sequential_seconds
+
+    results = [{
+        "mode": "sequential",
+        "batch_size": 1,
+        "queries_per_s": round(baseline_qps, 1),
+        "batch_ms": round(sequential_seconds / len(queries) * 1000, 2),
+        "speedup": 1.0,
+    }]
+    for batch_size in args.batch_sizes:
+        rag._embedding_cache.clear()
+        started = time.perf_counter()
+        for i in range(0, len(queries), batch_size):
+            rag.search_many(queries[i:i + batch_size], k=args.k, score_threshold=0.0, adaptive_k=False)
+        seconds = time.perf_counter() - started
+        batches = -(-len(queries) // batch_size)
+        results.append({
+            "mode": "search_many",
+            "batch_size": batch_size,
+            "queries_per_s": round(len(queries) / seconds, 1),
+            "batch_ms": round(seconds / batches * 1000, 2),
+            "speedup": round(len(queries) / seconds / baseline_qps, 2),
+        })
+
+    print(f"\n📊 {len(queries)} queries, k={args.k}, engine={rag.embedding_engine}")
+    header = f"{'mode':<12} {'batch':>6} {'queries/s':>10} {'ms/batch':>9} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['mode']:<12} {r['batch_size']:>6} {r['queries_per_s']:>10} "
+            f"{r['batch_ms']:>9} {r['speedup']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Vector store backend benchmark: Chroma vs. in-process NumPy index
+
+Her backend ayrı bir süreçte ölçülür (bellek ölçümleri birbirini etkilemesin):
+rastgele normalize vektörlerle indeks kurulur, diskten yeniden açılır ve
+sorgu gecikmesi (p50/p95/p99) ile bellek artışı raporlanır.
+
+Kullanım:
+    python benchmarks/bench_vector_store.py --chunks 5000 --queries 500
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def max_rss_mb() -> float:
+    # Linux'ta ru_maxrss KB cinsindendir
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_worker(args) -> dict:
+    """Build, reopen and query one backend; returns measurements."""
+    import numpy as np
+    from vector_store import create_vector_store
+
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    index_dir = Path(args.dir)
+
+    # Build
+    started = time.perf_counter()
+    store = create_vector_store(args.backend, index_dir, "bench")
+    for i in range(0, args.chunks, args.batch_size):
+        batch = vectors[i:i + args.batch_size]
+        ids = [f"chunk-{j}" for j in range(i, i + len(batch))]
+        store.upsert(
+            ids=ids,
+            embeddings=batch.tolist(),
+            documents=[f"Belge parçası {j}" for j in range(i, i + len(batch))],
+            metadatas=[{"source": "bench.md", "file_type": "markdown"}] * len(batch),
+        )
+    store.flush()
+    build_seconds = time.perf_counter() - started
+    del store, vectors
+
+    # Reopen from disk (as at application startup)
+    rss_before = max_rss_mb()
+    started = time.perf_counter()
+    store = create_vector_store(args.backend, index_dir, "bench")
+    store.count()
+    open_seconds = time.perf_counter() - started
+
+    # Warm-up, then timed single-query searches
+    for query in queries[:10]:
+        store.query([query.tolist()], args.k)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query([query.tolist()], args.k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "backend": args.backend,
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "k": args.k,
+        "build_seconds": round(build_seconds, 3),
+        "open_seconds": round(open_seconds, 4),
+        "query_ms_p50": round(percentile(latencies, 50), 3),
+        "query_ms_p95": round(percentile(latencies, 95), 3),
+        "query_ms_p99": round(percentile(latencies, 99), 3),
+        "rss_growth_mb": round(max_rss_mb() - rss_before, 1),
+        "peak_rss_mb": round(max_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector store backends")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--chunks", type=int, default=5000, help="Indexed vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (MiniLM: 384)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--output", type=str, help="Write results as JSON")
+    # Internal: measure a single backend in this process
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--dir", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+        return
+
+    results = []
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            cmd = [
+                sys.executable, __file__, "--worker",
+                "--backend", backend, "--dir", tmp,
+                "--chunks", str(args.chunks), "--dim", str(args.dim),
+                "--queries", str(args.queries), "--k", str(args.k),
+                "--batch-size", str(args.batch_size),
+            ]
+            print(f"🔄 Benchmarking {backend}...")
+            output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n📊 {args.chunks} chunks x {args.dim} dims, k={args.k}, {args.queries} queries")
+    header = f"{'backend':<8} {'build s':>8} {'open s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'+RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['backend']:<8} {r['build_seconds']:>8} {r['open_seconds']:>8} "
+            f"{r['query_ms_p50']:>8} {r['query_ms_p95']:>8} {r['query_ms_p99']:>8} "
+            f"{r['rss_growth_mb']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+End-to-end load test against a local OpenRouter stub
+
+Yerel OpenRouter stub'ı (benchmarks/openrouter_stub.py) ve FastAPI uygulaması
+ayrı süreçlerde başlatılır; sanal kullanıcılar tek turlu sorular, streaming,
+çok turlu satış senaryosu ve arama isteklerini eşzamanlı olarak gönderir.
+Endpoint başına throughput ve p50/p95/p99 gecikme raporlanır, sonuçlar JSON
+olarak kaydedilir ve önceki bir çalıştırmayla karşılaştırılabilir.
+
+Kullanım:
+    python benchmarks/load_test.py --concurrency 20 --duration 30 --output run.json
+    python benchmarks/load_test.py --scenarios single multi --stub-error-rate 0.05
+    python benchmarks/load_test.py --base-url http://localhost:8000   # çalışan sunucu
+    python benchmarks/load_test.py --compare baseline.json run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+STUB_SCRIPT = Path(__file__).resolve().parent / "openrouter_stub.py"
+
+SCENARIOS = ("single", "stream", "multi", "search")
+
+SINGLE_TURN_QUESTIONS = [
+    "Trafo bakım hizmetleriniz nelerdir?",
+    "OG/AG tesis kurulumu yapıyor musunuz?",
+    "Enerji verimliliği danışmanlığı veriyor musunuz?",
+    "Kompanzasyon panosu bakımı ne kadar sürer?",
+    "Hangi bölgelerde hizmet veriyorsunuz?",
+    "Teklif almak için ne yapmalıyım?",
+    "1600 kVA trafo kurulumu için hangi belgeler gerekir?",
+    "Merhaba, nasılsın?",
+]
+
+# test_sales_scenario.py'deki satış akışı (oturum üzerinden devam eder)
+SALES_SCENARIO = [
+    "Merhaba, trafo kurulum hizmetiniz var mı?",
+    "Evet, Tekirdag'daki yeni fabrikamiz icin 1600 kVA trafo dusunuyoruz.",
+    "Kurulum ne kadar sürer ve teklif için hangi bilgiler gerekli?",
+]
+
+SEARCH_QUERIES = ["trafo bakımı", "1600 kVA", "kompanzasyon", "teklif süreci", "OG hücre"]
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    ok: bool
+    latency_ms: float
+    status: int = 0
+    ttft_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_http(url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    """Poll ``url`` until it answers 200 (raises on timeout or process exit)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} was up")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+
+
+def start_stub(args, port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, str(STUB_SCRIPT), "--port", str(port),
+        "--latency-ms", str(args.stub_latency_ms),
+        "--jitter-ms", str(args.stub_jitter_ms),
+        "--token-interval-ms", str(args.stub_token_interval_ms),
+        "--tokens", str(args.stub_tokens),
+        "--error-rate", str(args.stub_error_rate),
+        "--seed", str(args.seed),
+    ]
+    process = subprocess.Popen(cmd)
+    wait_http(f"http://127.0.0.1:{port}/stats", 30, process)
+    return process
+
+
+def start_app(args, port: int, upstream: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "OPENROUTER_BASE_URL": upstream,
+        "OPENROUTER_API_KEY": "stub",
+        # Tüm yük tek IP'den gelir: istemci başına limit ölçümü bozmasın
+        "RATE_LIMIT_ENABLED": "False",
+        "LOG_LEVEL": "WARNING",
+    }
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.app_workers), "--log-level", "warning",
+    ]
+    process = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    # RAG'lı testlerde model + indeks yüklenene kadar bekle
+    path = "/ready" if args.use_rag else "/health"
+    wait_http(f"http://127.0.0.1:{port}{path}", args.ready_timeout, process)
+    return process
+
+
+def stop_process(process: Optional[subprocess.Popen]) -> None:
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def post_json(
+    client: httpx.AsyncClient, endpoint: str, payload: dict, samples: list[Sample]
+) -> Optional[dict]:
+    started = time.perf_counter()
+    try:
+        response = await client.post(endpoint, json=payload)
+    except httpx.HTTPError as e:
+        samples.append(Sample(endpoint, False, (time.perf_counter() - started) * 1000, error=type(e).__name__))
+        return None
+    latency_ms = (time.perf_counter() - started) * 1000
+    ok = response.status_code == 200
+    samples.append(Sample(
+        endpoint, ok, latency_ms, response.status_code,
+        error=None if ok else f"HTTP {response.status_code}",
+    ))
+    return response.json() if ok else None
+
+
+async def stream_chat(
+    client: httpx.AsyncClient, payload: dict, samples: list[Sample]
+) -> Optional[dict]:
+    """POST /chat/stream and consume the SSE stream; returns the done event."""
+    endpoint = "/chat/stream"
+    started = time.perf_counter()
+    ttft_ms = None
+    done = None
+    error = None
+    status = 0
+    try:
+        async with client.stream("POST", endpoint, json=payload) as response:
+            status = response.status_code
+            if status != 200:
+                await response.aread()
+                error = f"HTTP {status}"
+            else:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif line.startswith("data: "):
+                        if event == "token" and ttft_ms is None:
+                            ttft_ms = (time.perf_counter() - started) * 1000
+                        elif event == "done":
+                            done = json.loads(line[6:])
+                        elif event == "error":
+                            error = "stream_error"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    if done is None and error is None:
+        error = "incomplete_stream"
+    samples.append(Sample(
+        endpoint, error is None, (time.perf_counter() - started) * 1000, status, ttft_ms, error
+    ))
+    return done
+
+
+async def run_scenario(
+    scenario: str, client: httpx.AsyncClient, rng: random.Random, args, samples: list[Sample]
+) -> None:
+    if scenario == "single":
+        await post_json(client, "/chat", {
+            "message": rng.choice(SINGLE_TURN_QUESTIONS), "use_rag": args.use_rag,
+        }, samples)
+    elif scenario == "stream":
+        await stream_chat(client, {
+            "message": rng.choice(SINGLE_TURN_QUESTIONS), "use_rag": args.use_rag,
+        }, samples)
+    elif scenario == "search":
+        await post_json(client, "/search", {"query": rng.choice(SEARCH_QUERIES)}, samples)
+    elif scenario == "multi":
+        started = time.perf_counter()
+        session_id = None
+        ok = True
+        for message in SALES_SCENARIO:
+            payload = {"message": message, "use_rag": args.use_rag, "session_id": session_id}
+            data = await post_json(client, "/chat", payload, samples)
+            if data is None:
+                ok = False
+                break
+            session_id = data.get("session_id")
+            if args.think_time_ms:
+                await asyncio.sleep(args.think_time_ms / 1000)
+        samples.append(Sample(
+            "conversation:sales", ok, (time.perf_counter() - started) * 1000,
+            error=None if ok else "turn_failed",
+        ))
+
+
+async def virtual_user(
+    user: int, client: httpx.AsyncClient, args, deadline: float, samples: list[Sample]
+) -> None:
+    rng = random.Random(args.seed + user)
+    weights = [args.weights.get(name, 1.0) for name in args.scenarios]
+    while time.monotonic() < deadline:
+        scenario = rng.choices(args.scenarios, weights=weights)[0]
+        await run_scenario(scenario, client, rng, args, samples)
+
+
+def summarize(samples: list[Sample], seconds: float) -> dict:
+    """Per-endpoint throughput, error rate and latency percentiles."""
+    results = {}
+    for endpoint in sorted({s.endpoint for s in samples}):
+        group = [s for s in samples if s.endpoint == endpoint]
+        ok = [s.latency_ms for s in group if s.ok]
+        errors: dict[str, int] = {}
+        for s in group:
+            if not s.ok:
+                errors[s.error] = errors.get(s.error, 0) + 1
+        entry = {
+            "requests": len(group),
+            "errors": len(group) - len(ok),
+            "error_rate": round((len(group) - len(ok)) / len(group), 4),
+            "error_kinds": errors,
+            "throughput_rps": round(len(ok) / seconds, 2),
+            "latency_ms": {
+                f"p{pct}": round(value, 1) if (value := percentile(ok, pct)) is not None else None
+                for pct in (50, 95, 99)
+            },
+        }
+        ttft = [s.ttft_ms for s in group if s.ok and s.ttft_ms is not None]
+        if ttft:
+            entry["ttft_ms"] = {f"p{pct}": round(percentile(ttft, pct), 1) for pct in (50, 95, 99)}
+        results[endpoint] = entry
+    return results
+
+
+async def run_load(args, base_url: str) -> tuple[dict, float]:
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        if args.warmup:
+            # Isınma istekleri ölçüme dahil edilmez
+            warm: list[Sample] = []
+            await asyncio.gather(*[
+                run_scenario(scenario, client, random.Random(i), args, warm)
+                for i, scenario in enumerate(args.scenarios * args.warmup)
+            ])
+
+        samples: list[Sample] = []
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            virtual_user(user, client, args, deadline, samples)
+            for user in range(args.concurrency)
+        ])
+        elapsed = time.monotonic() - started
+    return summarize(samples, elapsed), elapsed
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict) -> None:
+    config = report["config"]
+    print(
+        f"\n📊 {config['concurrency']} users x {report['elapsed_seconds']}s, "
+        f"scenarios: {', '.join(config['scenarios'])}"
+    )
+    header = (
+        f"{'endpoint':<20} {'reqs':>6} {'err %':>6} {'rps':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ttft p95':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in report["results"].items():
+        latency = r["latency_ms"]
+        ttft = r.get("ttft_ms", {}).get("p95")
+        print(
+            f"{endpoint:<20} {r['requests']:>6} {r['error_rate'] * 100:>6.1f} {r['throughput_rps']:>7} "
+            f"{latency['p50'] or '-':>8} {latency['p95'] or '-':>8} {latency['p99'] or '-':>8} "
+            f"{ttft or '-':>9}"
+        )
+
+
+def compare_reports(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """
+    List regressions of ``current`` against ``baseline``.
+
+    A regression is a p95 latency or throughput change worse than
+    ``tolerance`` (relative) or an error rate increase above one point.
+    """
+    regressions = []
+    for endpoint, new in current["results"].items():
+        old = baseline["results"].get(endpoint)
+        if old is None:
+            continue
+        old_p95, new_p95 = old["latency_ms"]["p95"], new["latency_ms"]["p95"]
+        if old_p95 and new_p95 and new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {old_p95} -> {new_p95} ms")
+        if old["throughput_rps"] and new["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{endpoint}: throughput {old['throughput_rps']} -> {new['throughput_rps']} rps")
+        if new["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{endpoint}: error rate {old['error_rate']} -> {new['error_rate']}")
+    return regressions
+
+
+def parse_weights(items: list[str]) -> dict[str, float]:
+    weights = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        weights[name] = float(value)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test with a local OpenRouter stub")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=["single", "stream", "multi"])
+    parser.add_argument("--weights", nargs="*", default=[], help="Scenario weights, e.g. single=3 multi=1")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured warm-up rounds per scenario")
+    parser.add_argument("--think-time-ms", type=float, default=0.0, help="Pause between conversation turns")
+    parser.add_argument("--no-rag", dest="use_rag", action="store_false", help="Send use_rag=false")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, help="Write results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files and exit (non-zero on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    # Target
+    parser.add_argument("--base-url", type=str, help="Use a running server instead of starting one")
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument("--app-env", nargs="*", default=[], help="Extra app settings, e.g. LLM_HEDGING=True")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    # Stub
+    parser.add_argument("--upstream", type=str, help="Use a running stub/API base URL (…/v1)")
+    parser.add_argument("--stub-latency-ms", type=float, default=400.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--stub-token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--stub-tokens", type=int, default=40)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            current = json.load(f)
+        print_report(current)
+        regressions = compare_reports(baseline, current, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs. {args.compare[0]}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs. {args.compare[0]} (tolerance {args.tolerance:.0%})")
+        return
+
+    args.weights = parse_weights(args.weights)
+    stub = app = None
+    try:
+        upstream = args.upstream
+        stub_url = None
+        if upstream is None:
+            stub_port = free_port()
+            print(f"🔄 Starting OpenRouter stub on :{stub_port}...")
+            stub = start_stub(args, stub_port)
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            upstream = f"{stub_url}/v1"
+
+        base_url = args.base_url
+        if base_url is None:
+            app_port = free_port()
+            print(f"🔄 Starting chatbot backend on :{app_port} (upstream {upstream})...")
+            app = start_app(args, app_port, upstream)
+            base_url = f"http://127.0.0.1:{app_port}"
+
+        print(f"🚀 Running {args.concurrency} users for {args.duration:.0f}s...")
+        results, elapsed = asyncio.run(run_load(args, base_url))
+
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "config": {
+                "scenarios": args.scenarios,
+                "weights": args.weights,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "use_rag": args.use_rag,
+                "think_time_ms": args.think_time_ms,
+                "app_workers": args.app_workers,
+                "app_env": args.app_env,
+                "stub": None if stub is None else {
+                    "latency_ms": args.stub_latency_ms,
+                    "jitter_ms": args.stub_jitter_ms,
+                    "token_interval_ms": args.stub_token_interval_ms,
+                    "tokens": args.stub_tokens,
+                    "error_rate": args.stub_error_rate,
+                },
+            },
+            "elapsed_seconds": round(elapsed, 1),
+            "results": results,
+        }
+        if stub_url is not None:
+            # Upstream çağrı sayısı: coalescing/önbellek etkisini gösterir
+            report["upstream"] = httpx.get(f"{stub_url}/stats", timeout=5).json()
+    finally:
+        stop_process(app)
+        stop_process(stub)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Local OpenRouter stub for load tests
+
+OpenAI uyumlu /v1/chat/completions endpoint'ini taklit eder: yapılandırılabilir
+gecikme (jitter'lı), token token streaming ve hata oranı. Yük testleri gerçek
+API anahtarı ve kota harcamadan, tekrarlanabilir koşullarda çalışır.
+
+Kullanım:
+    python benchmarks/openrouter_stub.py --port 9100 --latency-ms 400 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "Luxivolt Mühendislik olarak trafo bakımı, OG/AG tesis kurulumu ve enerji "
+    "verimliliği projelerinde hizmet veriyoruz. Detaylı teklif için iletişim "
+    "sayfamızdan bize ulaşabilirsiniz."
+)
+
+
+def create_app(
+    latency_ms: float = 400.0,
+    jitter_ms: float = 100.0,
+    token_interval_ms: float = 20.0,
+    tokens: int = 40,
+    error_rate: float = 0.0,
+    error_statuses: tuple[int, ...] = (429, 503),
+    seed: int = 42,
+) -> FastAPI:
+    """
+    Build the stub app.
+
+    Args:
+        latency_ms: Time until the full answer (non-streaming) or the first
+            token (streaming)
+        jitter_ms: Uniform +/- jitter added to ``latency_ms``
+        token_interval_ms: Delay between streamed tokens
+        tokens: Answer length in tokens (words)
+        error_rate: Fraction of requests answered with an error status
+        error_statuses: Error statuses to pick from
+    """
+    app = FastAPI(title="OpenRouter stub")
+    rng = random.Random(seed)
+    words = (ANSWER.split(" ") * (tokens // len(ANSWER.split(" ")) + 1))[:tokens]
+    stats = {"requests": 0, "streams": 0, "errors": 0, "by_model": {}}
+
+    def delay() -> float:
+        return max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+
+    def usage(messages: list[dict]) -> dict:
+        # Yaklaşık: ~4 karakter / token
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+
+    def chunk(model: str, delta: dict, finish_reason=None, **extra) -> str:
+        payload = {
+            "id": "stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+            **extra,
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        stats["requests"] += 1
+        stats["by_model"][model] = stats["by_model"].get(model, 0) + 1
+
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            status = rng.choice(error_statuses)
+            await asyncio.sleep(delay() / 4)
+            return JSONResponse(
+                {"error": {"message": "stub error", "code": status}},
+                status_code=status,
+                headers={"Retry-After": "1"} if status in (429, 503) else None,
+            )
+
+        if body.get("stream"):
+            stats["streams"] += 1
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+            async def events():
+                await asyncio.sleep(delay())
+                for i, word in enumerate(words):
+                    if i:
+                        await asyncio.sleep(token_interval_ms / 1000)
+                    yield chunk(model, {"content": word if i == 0 else " " + word})
+                yield chunk(model, {}, finish_reason="stop")
+                if include_usage:
+                    yield chunk(model, None, usage=usage(body.get("messages", [])))
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        # Non-streaming: tüm token'ların üretim süresi kadar bekle
+        await asyncio.sleep(delay() + len(words) * token_interval_ms / 1000)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage(body.get("messages", [])),
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter (chat completions) stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Time to full answer / first token")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--tokens", type=int, default=40, help="Answer length in tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failed requests (0-1)")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=[429, 503])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_interval_ms=args.token_interval_ms,
+        tokens=args.tokens,
+        error_rate=args.error_rate,
+        error_statuses=tuple(args.error_statuses),
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Bounded in-memory cache with LRU + TTL eviction
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize query text for use as a cache key.
+
+    Unicode NFC normalization and whitespace collapsing only; casing is kept
+    because the multilingual embedding model is case-sensitive.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with optional time-to-live.
+
+    Entries are evicted when the cache grows beyond ``max_size`` (least
+    recently used first) or when they are older than ``ttl`` seconds.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, record: bool = True) -> Optional[Any]:
+        """
+        Return the cached value or None.
+
+        Args:
+            record: Count a hit or a miss; callers combining several
+                lookups into one pass False and call ``record`` themselves.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                if record:
+                    self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                if record:
+                    self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            if record:
+                self.hits += 1
+            return value
+
+    def record(self, hit: bool) -> None:
+        """Count the outcome of a lookup made with ``get(..., record=False)``."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (stats are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
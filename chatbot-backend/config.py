@@ -14,18 +14,135 @@ class Settings(BaseSettings):
     openrouter_api_key: str = ""
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
     openrouter_model: str = "google/gemini-2.0-flash-exp:free"
-    
+
+    # LLM Client Settings (shared async connection pool)
+    llm_max_connections: int = 50
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0  # seconds
+    llm_connect_timeout: float = 5.0  # seconds
+    llm_read_timeout: float = 60.0  # seconds
+    llm_pool_timeout: float = 10.0  # seconds to wait for a free connection
+    llm_max_tokens: int = 1024
+    llm_temperature: float = 0.7
+
+    # LLM Failure Handling (retries, hedging, circuit breaker, fallback models)
+    llm_fallback_models: list[str] = []  # tried in order, e.g. '["meta-llama/llama-3.3-70b-instruct:free"]'
+    llm_total_timeout: float = 30.0  # seconds for all attempts of one call
+    llm_attempt_timeout: float = 15.0  # seconds per attempt (until the first token when streaming)
+    llm_max_retries: int = 2  # retries per model for timeouts / 429 / 5xx
+    llm_retry_base_delay: float = 0.25  # seconds, exponential backoff with full jitter
+    llm_retry_max_delay: float = 2.0  # longer Retry-After -> switch to the next model
+    llm_hedging: bool = False  # send a second request when the first is slow
+    llm_hedge_percentile: float = 95.0  # hedge after this latency percentile
+    llm_hedge_min_samples: int = 20  # latency samples needed before hedging
+    llm_breaker_failure_threshold: int = 5  # consecutive failures that open the breaker
+    llm_breaker_reset_timeout: float = 30.0  # seconds before a trial request
+
+    # Prompt Assembly (token budget of the messages sent to the LLM)
+    prompt_token_budget: int = 3000  # persona + context + history + question
+    prompt_history_max_messages: int = 8
+    prompt_history_reserve_tokens: int = 400  # kept free for history when picking context
+    prompt_token_encoding: str = "cl100k_base"  # tiktoken encoding (heuristic if unavailable)
+
+    # Admission Control (concurrency limit + bounded wait queue, 503 when full)
+    admission_control: bool = True
+    admission_chat_max_concurrent: int = 32  # /chat + /chat/stream
+    admission_chat_max_queue: int = 64
+    admission_search_max_concurrent: int = 16  # /search
+    admission_search_max_queue: int = 64
+    admission_queue_timeout: float = 10.0  # seconds a request may wait for a slot
+
+    # Per-client Rate Limiting (token buckets, 429 when exhausted)
+    rate_limit_enabled: bool = True
+    rate_limit_ip_per_minute: float = 60.0
+    rate_limit_ip_burst: int = 20
+    rate_limit_session_per_minute: float = 20.0
+    rate_limit_session_burst: int = 5
+    trust_forwarded_for: bool = False  # use X-Forwarded-For behind a reverse proxy
+
+    # Request Coalescing (identical concurrent first-turn /chat and /search calls)
+    request_coalescing: bool = True
+
+    # Response Cache (first-turn /chat answers, opt-in)
+    response_cache_enabled: bool = False
+    response_cache_semantic: bool = False  # also match similar questions
+    response_cache_similarity_threshold: float = 0.95
+    response_cache_size: int = 512
+    response_cache_ttl: float = 3600.0  # seconds
+
+    # Conversation Sessions (server-side chat history)
+    session_backend: str = "memory"  # "memory" or "sqlite" (survives restarts)
+    session_ttl: float = 3600.0  # seconds of inactivity before a session expires
+    session_max_sessions: int = 10000  # LRU eviction beyond this
+    session_max_memory_mb: int = 64  # memory backend: total history size cap
+    session_max_messages: int = 20  # newest messages kept per session
+    session_sqlite_path: str = ""  # default: chatbot-backend/sessions.db
+
     # Application Settings
     app_name: str = "Luxivolt Chatbot"
     debug: bool = True
+    log_level: str = "INFO"  # DEBUG / INFO / WARNING / ERROR
     
     # CORS Settings
     allowed_origins: list[str] = ["*"]
 
     # RAG Settings
+    vector_backend: str = "chroma"  # "chroma" or "numpy" (in-process matrix)
+    embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    embedding_engine: str = "torch"  # "torch" (sentence-transformers) or "onnx" (int8)
     chunk_size: int = 500
     chunk_overlap: int = 100
-    
+    chunk_separators: str = "default"  # splitter preset: "default", "paragraph", "sentence"
+    index_workers: int = 0  # document loading processes (0 = one per CPU)
+    index_recursive: bool = True  # also index files in data_dir subfolders
+    embed_batch_size: int = 64  # chunks embedded + upserted per indexing batch
+    dedup_enabled: bool = True  # store near-duplicate chunks (e.g. sss.md vs sss.pdf) once
+    dedup_threshold: float = 0.7  # min estimated containment of character shingles
+    dedup_shingle_size: int = 5  # characters per shingle (whitespace removed)
+    dedup_num_perm: int = 64  # MinHash signature length (multiple of 4: LSH bands of 4 rows)
+    rag_top_k: int = 4  # max chunks added to the /chat prompt
+    search_batch_max_size: int = 64  # max queries per /search/batch request
+    rag_score_threshold: float = 0.3  # min cosine similarity of a chunk
+    rag_adaptive_k: bool = True  # stop adding chunks when scores drop off
+    rag_adaptive_k_max_drop: float = 0.15  # max distance from the best score
+    rag_adaptive_k_max_gap: float = 0.1  # max drop between consecutive chunks
+    rag_ready_timeout: float = 3.0  # seconds /chat waits for warm-up before skipping RAG
+
+    # Hybrid Retrieval (BM25 + vector)
+    hybrid_search: bool = True
+    hybrid_candidate_multiplier: int = 3  # candidates per ranking = k * multiplier
+    rrf_k: int = 60  # reciprocal-rank fusion constant
+    lexical_stem_prefix: int = 5  # Turkish prefix stemming length (0 = off)
+    lexical_fast_path: bool = True  # BM25-only answers for rare keyword queries
+    lexical_fast_path_min_idf: float = 2.0
+    lexical_fast_path_max_terms: int = 3
+    lexical_fast_path_min_coverage: float = 1.0  # share of the query's IDF a BM25-only hit must match
+    rag_executor_workers: int = 4  # threads for embedding / vector search
+    embedding_batch_window_ms: float = 3.0  # micro-batch collection window
+    embedding_max_batch_size: int = 32
+    embedding_cache_size: int = 2048  # cached query embeddings (0 = disabled)
+    embedding_cache_ttl: float = 3600.0  # seconds
+
+    # Shared RAG Server (one model + index for all uvicorn workers)
+    rag_mode: str = "local"  # "local" (in-process) or "remote" (rag_server.py over a Unix socket)
+    rag_server_socket: str = ""  # default: chatbot-backend/rag_server.sock
+    rag_server_timeout: float = 10.0  # seconds per search / embedding call
+    rag_server_connect_timeout: float = 120.0  # seconds warm-up waits for the server to start
+    rag_client_pool_size: int = 8  # idle connections kept per worker
+
+    # Live Reindexing (build a new index generation in the background, then swap)
+    reindex_watch: bool = False  # poll data_dir and reindex after changes
+    reindex_watch_interval: float = 5.0  # seconds between data_dir scans
+    reindex_watch_debounce: float = 10.0  # quiet seconds after the last change before reindexing
+    reindex_keep_generations: int = 2  # live + previous (searches still running on it)
+
+    # ONNX Embedding Engine (EMBEDDING_ENGINE=onnx)
+    onnx_model_dir: str = ""  # default: onnx_models/<embedding model name>
+    onnx_intra_op_threads: int = 0  # 0 = onnxruntime default (all physical cores)
+    onnx_batch_size: int = 32
+    onnx_max_seq_length: int = 128  # same as the sentence-transformers model
+    onnx_min_cosine: float = 0.99  # verification tolerance vs. the reference model
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
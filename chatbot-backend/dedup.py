@@ -0,0 +1,223 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Near-duplicate chunk detection (MinHash + LSH)
+
+Aynı içerik data/ klasöründe birden fazla biçimde bulunabilir (ör. sss.md ve
+sss.pdf). Chunk metinleri normalize edilir (büyük-küçük harf, Markdown
+işaretleri, noktalama ve tüm boşluklar atılır), karakter shingle'larının MinHash
+imzası çıkarılır. Boşluksuz karakter n-gram'ları PDF çıkarımının böldüğü
+kelimelerden ("misy onumuz") etkilenmez; kapsama (containment) skoru md ve pdf
+chunk sınırlarının kaymasını tolere eder. LSH bantları ile adaylar bulunur;
+tahmini kapsama oranı eşiği geçen chunk yeniden embed edilmez, mevcut kayda
+bağlanır.
+"""
+
+import os
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple, Optional
+import numpy as np
+
+# 2^32'den büyük asal: (a * x + b) mod P evrensel hash ailesi
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_TOKEN = re.compile(r"\w+")
+# Shingle / skor yöntemi değişince kaydedilmiş imzalar ve indeks geçersiz olur
+SIGNATURE_VERSION = 2
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """Word tokens of a chunk, independent of Markdown / PDF formatting."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _TOKEN.findall(text.replace("_", " "))
+
+
+def shingles(tokens: list[str], size: int) -> set[int]:
+    """
+    Hashed character n-grams of the tokens joined without separators.
+
+    The whole text is one shingle if it is shorter than ``size``.
+    """
+    text = "".join(tokens)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {
+        zlib.crc32(text[i:i + size].encode("utf-8"))
+        for i in range(len(text) - size + 1)
+    }
+
+
+class Signature(NamedTuple):
+    """MinHash values of a chunk and the size of its shingle set."""
+    values: np.ndarray
+    size: int
+
+
+class MinHasher:
+    """MinHash signatures with ``num_perm`` random universal hash functions."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a < 2^31: a * x (x < 2^32) uint64'e taşmadan sığar
+        self.a = rng.integers(1, 2**31, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2**31, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, shingle_hashes: set[int]) -> np.ndarray:
+        x = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+        hashed = (np.outer(x, self.a) + self.b) % _PRIME
+        return (hashed & _MAX_HASH).min(axis=0)
+
+
+@dataclass
+class DedupStats:
+    """Outcome of near-duplicate detection in one indexing run."""
+    chunks: int = 0
+    duplicates: int = 0
+    # "<duplicate file> -> <file of the kept chunk>" -> chunk count
+    pairs: dict[str, int] = field(default_factory=dict)
+
+    def record(self, source: str, kept_source: Optional[str]) -> None:
+        self.chunks += 1
+        if kept_source is not None:
+            self.duplicates += 1
+            key = f"{source} -> {kept_source}"
+            self.pairs[key] = self.pairs.get(key, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "duplicates": self.duplicates,
+            "ratio": round(self.duplicates / self.chunks, 4) if self.chunks else 0.0,
+            "pairs": dict(sorted(self.pairs.items(), key=lambda item: -item[1])),
+        }
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures of chunk texts.
+
+    Signatures are split into bands of ``rows`` values; chunks sharing any
+    band are candidates. The Jaccard similarity J estimated from the
+    signatures and the shingle set sizes give the containment
+    ``|A∩B| / min(|A|, |B|)``; the candidate with the highest containment
+    of at least ``threshold`` is the match. Containment, unlike Jaccard,
+    stays high when chunk boundaries differ between two copies of a text.
+    Chunks without any word (punctuation, table rules) have no signature
+    and never match.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        shingle_size: int = 5,
+        num_perm: int = 64,
+        rows: int = 4,
+    ):
+        if num_perm % rows:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of rows ({rows})")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.rows = rows
+        self.hasher = MinHasher(num_perm)
+        self._signatures: dict[str, Signature] = {}
+        self._buckets: dict[tuple[int, bytes], set[str]] = {}
+        self._unsigned: set[str] = set()  # chunks without words (not deduplicated)
+
+    def __len__(self) -> int:
+        return len(self._signatures) + len(self._unsigned)
+
+    def signature(self, text: str) -> Optional[Signature]:
+        """MinHash signature of a chunk text, or None if it has no words."""
+        hashes = shingles(normalize_tokens(text), self.shingle_size)
+        return Signature(self.hasher.signature(hashes), len(hashes)) if hashes else None
+
+    def _bands(self, signature: Signature):
+        for band in range(0, len(signature.values), self.rows):
+            yield band, signature.values[band:band + self.rows].tobytes()
+
+    @staticmethod
+    def containment(a: Signature, b: Signature) -> float:
+        """Estimated ``|A∩B| / min(|A|, |B|)`` from MinHash Jaccard and set sizes."""
+        jaccard = float(np.mean(a.values == b.values))
+        intersection = jaccard * (a.size + b.size) / (1 + jaccard)
+        return min(1.0, intersection / min(a.size, b.size))
+
+    def add(self, key: str, signature: Optional[Signature]) -> None:
+        if signature is None:
+            self._unsigned.add(key)
+            return
+        self._signatures[key] = signature
+        for band in self._bands(signature):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        self._unsigned.discard(key)
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band in self._bands(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def find(self, signature: Optional[Signature]) -> Optional[tuple[str, float]]:
+        """Best match with containment >= threshold, as (key, containment)."""
+        if signature is None:
+            return None
+        candidates: set[str] = set()
+        for band in self._bands(signature):
+            candidates |= self._buckets.get(band, set())
+        best: Optional[tuple[str, float]] = None
+        for key in candidates:
+            similarity = self.containment(self._signatures[key], signature)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def _params(self) -> list[int]:
+        return [SIGNATURE_VERSION, self.shingle_size, self.hasher.num_perm]
+
+    def save(self, path: Path) -> None:
+        """Persist all signatures (write + rename) so later runs skip re-hashing."""
+        keys = list(self._signatures)
+        matrix = np.array([self._signatures[key].values for key in keys], dtype=np.uint32)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                params=np.array(self._params()),
+                keys=np.array(keys, dtype=str),
+                signatures=matrix.reshape(len(keys), self.hasher.num_perm),
+                sizes=np.array([self._signatures[key].size for key in keys], dtype=np.int64),
+                unsigned=np.array(sorted(self._unsigned), dtype=str),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path, keys: set[str]) -> set[str]:
+        """
+        Add the saved signatures of ``keys`` (other saved entries are stale).
+
+        Returns:
+            The keys without a saved signature (e.g. after an interrupted run)
+        """
+        try:
+            with np.load(path) as data:
+                if data["params"].tolist() != self._params():
+                    return set(keys)
+                saved = data["keys"].tolist()
+                signatures = data["signatures"].astype(np.uint64)
+                sizes = data["sizes"].tolist()
+                unsigned = data["unsigned"].tolist()
+        except (OSError, ValueError, KeyError):
+            return set(keys)
+        for key, values, size in zip(saved, signatures, sizes):
+            if key in keys:
+                self.add(key, Signature(values, size))
+        self._unsigned.update(key for key in unsigned if key in keys)
+        return keys - set(self._signatures) - self._unsigned
@@ -0,0 +1,228 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Parallel document loading and chunking
+
+Dosyalar bir process havuzunda paralel olarak okunur ve parçalara ayrılır.
+Her dosya bağımsız işlenir; hatalı dosyalar diğerlerini etkilemez.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+from langchain_community.document_loaders import (
+    TextLoader,
+    PyPDFLoader,
+    UnstructuredMarkdownLoader,
+)
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+# Supported file extensions -> (loader class, file_type metadata)
+LOADERS = {
+    ".md": (UnstructuredMarkdownLoader, "markdown"),
+    ".pdf": (PyPDFLoader, "pdf"),
+    ".txt": (TextLoader, "text"),
+}
+
+# Splitter separator presets (RAG_SEPARATORS); "default" matches the original splitter
+SEPARATOR_PRESETS = {
+    "default": ["\n\n", "\n", ".", "!", "?", ",", " ", ""],
+    # Kısaltmaları (A.G., Y.G.) ve sayıları bölmeden paragraf / satır sınırları
+    "paragraph": ["\n\n", "\n", " ", ""],
+    # Yalnızca cümle sonu noktalama + boşluk
+    "sentence": ["\n\n", "\n", ". ", "! ", "? ", " ", ""],
+}
+SEPARATORS = SEPARATOR_PRESETS["default"]
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_text_splitter(
+    chunk_size: int, chunk_overlap: int, separators: str = "default"
+) -> RecursiveCharacterTextSplitter:
+    """Create the text splitter used for chunking (``separators`` is a preset name)."""
+    if separators not in SEPARATOR_PRESETS:
+        raise ValueError(
+            f"Unknown separator preset: {separators!r} (expected one of {sorted(SEPARATOR_PRESETS)})"
+        )
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=SEPARATOR_PRESETS[separators],
+    )
+
+
+@lru_cache(maxsize=8)
+def _cached_splitter(
+    chunk_size: int, chunk_overlap: int, separators: str = "default"
+) -> RecursiveCharacterTextSplitter:
+    # Worker process başına bir kez oluşturulur
+    return make_text_splitter(chunk_size, chunk_overlap, separators)
+
+
+def list_source_files(data_dir: Path, recursive: bool = True) -> list[Path]:
+    """List all supported document files in a directory."""
+    candidates = data_dir.rglob("*") if recursive else data_dir.iterdir()
+    return sorted(
+        path for path in candidates
+        if path.is_file() and path.suffix.lower() in LOADERS
+    )
+
+
+def source_name(path: Path, data_dir: Path) -> str:
+    """Source name stored in chunk metadata (path relative to data_dir)."""
+    return path.relative_to(data_dir).as_posix()
+
+
+def load_file(path: Path, data_dir: Path) -> list[Document]:
+    """Load a single document file with the loader matching its extension."""
+    loader_cls, file_type = LOADERS[path.suffix.lower()]
+    if loader_cls is TextLoader:
+        loader = TextLoader(str(path), encoding="utf-8")
+    else:
+        loader = loader_cls(str(path))
+    docs = loader.load()
+    name = source_name(path, data_dir)
+    for doc in docs:
+        doc.metadata["source"] = name
+        doc.metadata["file_type"] = file_type
+    return docs
+
+
+@dataclass
+class FileResult:
+    """Outcome of loading (and optionally chunking) one file."""
+    path: Path
+    name: str
+    documents: list[Document] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def process_file(
+    path: Path,
+    data_dir: Path,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = 0,
+    separators: str = "default",
+) -> FileResult:
+    """
+    Load one file and split it into chunks (if chunk_size is given).
+
+    Runs inside worker processes, so it must stay a module-level function.
+    """
+    name = source_name(path, data_dir)
+    try:
+        docs = load_file(path, data_dir)
+        if chunk_size is not None:
+            docs = _cached_splitter(chunk_size, chunk_overlap, separators).split_documents(docs)
+        return FileResult(path=path, name=name, documents=docs)
+    except Exception as e:
+        return FileResult(path=path, name=name, error=f"{type(e).__name__}: {e}")
+
+
+@dataclass
+class LoadStats:
+    """
+    Throughput report of a loading run.
+
+    ``documents`` are chunks if the files were split, otherwise the loaded
+    pages / documents; ``as_dict`` names the fields accordingly.
+    """
+    files: int = 0
+    documents: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+    chunked: bool = False
+
+    def as_dict(self) -> dict:
+        seconds = max(self.seconds, 1e-9)
+        unit = "chunks" if self.chunked else "documents"
+        return {
+            "files": self.files,
+            unit: self.documents,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "files_per_s": round(self.files / seconds, 2),
+            f"{unit}_per_s": round(self.documents / seconds, 2),
+        }
+
+
+def resolve_workers(workers: int) -> int:
+    """0 means one worker per CPU."""
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def iter_processed_files(
+    paths: list[Path],
+    data_dir: Path,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = 0,
+    workers: int = 0,
+    stats: Optional[LoadStats] = None,
+    separators: str = "default",
+) -> Iterator[FileResult]:
+    """
+    Load and chunk files in parallel, yielding results as they complete.
+
+    At most ``2 * workers`` files are in flight, so parsed documents never
+    pile up faster than the consumer can handle them.
+    """
+    stats = stats if stats is not None else LoadStats()
+    stats.chunked = chunk_size is not None
+    workers = min(resolve_workers(workers), max(len(paths), 1))
+    started = time.perf_counter()
+
+    def account(result: FileResult) -> FileResult:
+        stats.files += 1
+        stats.seconds = time.perf_counter() - started
+        if result.error:
+            stats.errors[result.name] = result.error
+            logger.error(f"❌ Error loading {result.name}: {result.error}")
+        else:
+            stats.documents += len(result.documents)
+            logger.info(f"✅ Loaded: {result.name} ({len(result.documents)} parts)")
+        return result
+
+    # Tek dosya / tek worker için process açmanın maliyetine gerek yok
+    if workers <= 1:
+        for path in paths:
+            yield account(process_file(path, data_dir, chunk_size, chunk_overlap, separators))
+        return
+
+    # spawn: torch thread'leri yüklü bir süreçten fork etmek güvenli değil
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending: set[Future] = set()
+        queue = iter(paths)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                path = next(queue, None)
+                if path is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(
+                    process_file, path, data_dir, chunk_size, chunk_overlap, separators
+                ))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield account(future.result())
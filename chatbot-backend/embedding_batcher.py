@@ -0,0 +1,106 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Micro-batching of query embeddings
+
+Aynı birkaç milisaniye içinde gelen sorgular tek bir model forward pass'i
+ile vektöre dönüştürülür. Encode işlemi event loop dışında, sınırlı bir
+thread havuzunda çalışır.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+EmbedFn = Callable[[list[str]], list[list[float]]]
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent embedding requests and encodes them in one batch.
+
+    The first query of a batch starts a timer of ``max_wait_ms``; every query
+    arriving before it fires (or until ``max_batch_size`` is reached) joins
+    the same forward pass. A lone query therefore waits at most a few ms.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        executor: Executor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 3.0,
+    ):
+        self.embed_fn = embed_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self.batches = 0
+        self.queries = 0
+        self.largest_batch = 0
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed a single query, sharing the forward pass with concurrent ones."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Loop değiştiyse (ör. yeniden başlatma) eski bekleyenleri bırak
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch all pending queries as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = self._loop.create_task(self._run_batch(batch))
+        # Referansı tut, yoksa task GC tarafından toplanabilir
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        self.batches += 1
+        self.queries += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            vectors = await self._loop.run_in_executor(self.executor, self.embed_fn, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def get_stats(self) -> dict:
+        """Get batching statistics."""
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
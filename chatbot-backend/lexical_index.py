@@ -0,0 +1,179 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Turkish-aware inverted index with BM25 scoring
+
+Embedding modeli "1600 kVA", "AG/YG" gibi teknik terimleri zayıf eşleştirir.
+Bu indeks, Türkçe büyük/küçük harf dönüşümü (İ/ı), ASCII katlama ve basit
+önek (prefix) kökleme ile normalize edilmiş terimler üzerinde BM25 skorlar.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Turkish casefolding: Python'un lower() fonksiyonu "I" -> "i" ve "İ" -> "i̇" yapar
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# ASCII folding of Turkish letters (ı has no decomposition, handled explicitly)
+_ASCII_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c"})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Kesme işaretinden sonraki ekler: "İstanbul'daki" -> "istanbul", "36kV'a" -> "36kv"
+_APOSTROPHE_SUFFIX_RE = re.compile(r"['’]\w+")
+
+STOPWORDS = frozenset(
+    "acaba ama ancak bana ben bile bir biz bu bunu da daha de diye en gibi hem hep "
+    "her hic icin ile ise kadar ki mi mu nasil ne neden nedir nelerdir o olan olarak "
+    "siz su sizin ve veya ya yani var mi misiniz musunuz".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Turkish-aware casefolding followed by ASCII folding."""
+    text = text.translate(_TURKISH_LOWER).lower().translate(_ASCII_FOLD)
+    # Kalan aksanları (â, î, û, é ...) temizle
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str, stem_prefix: int = 5) -> list[str]:
+    """
+    Split text into normalized index terms.
+
+    Alphabetic terms are truncated to ``stem_prefix`` characters, a simple and
+    effective stemmer for agglutinative Turkish ("trafonun" -> "trafo").
+    Numbers are kept whole.
+    """
+    terms = []
+    text = _APOSTROPHE_SUFFIX_RE.sub("", normalize_text(text))
+    for token in _TOKEN_RE.findall(text):
+        if token in STOPWORDS:
+            continue
+        if stem_prefix and not token.isdigit():
+            token = token[:stem_prefix]
+        terms.append(token)
+    return terms
+
+
+class LexicalIndex:
+    """In-memory inverted index with Okapi BM25 ranking."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, stem_prefix: int = 5):
+        self.k1 = k1
+        self.b = b
+        self.stem_prefix = stem_prefix
+        self._postings: dict[str, dict[str, int]] = {}  # term -> {doc_id: tf}
+        self._doc_terms: dict[str, list[str]] = {}  # doc_id -> distinct terms
+        self._doc_len: dict[str, int] = {}
+        self._docs: dict[str, tuple[str, dict]] = {}  # doc_id -> (content, metadata)
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: str, content: str, metadata: dict) -> None:
+        """Add (or replace) a document."""
+        terms = tokenize(content, self.stem_prefix)
+        counts = Counter(terms)
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = list(counts)
+            self._doc_len[doc_id] = len(terms)
+            self._docs[doc_id] = (content, metadata)
+            self._total_len += len(terms)
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document if present."""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        if doc_id not in self._doc_len:
+            return
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._docs.pop(doc_id, None)
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency (0 for unknown terms)."""
+        df = len(self._postings.get(term, ()))
+        if df == 0:
+            return 0.0
+        n = len(self._doc_len)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def query_terms(self, query: str) -> list[str]:
+        return list(dict.fromkeys(tokenize(query, self.stem_prefix)))
+
+    def is_selective(self, query: str, min_idf: float, max_terms: int) -> bool:
+        """
+        True for short keyword-style queries whose terms are all rare in the corpus.
+
+        Such queries (e.g. "1600 kVA", "AG/YG") are answered by BM25 alone.
+        """
+        terms = self.query_terms(query)
+        if not terms or len(terms) > max_terms:
+            return False
+        return all(self.idf(term) >= min_idf for term in terms)
+
+    def search(self, query: str, k: int = 10) -> list[dict]:
+        """
+        Rank documents by BM25.
+
+        Returns:
+            ``{"id", "content", "metadata", "score", "coverage"}`` dicts, best
+            first; ``coverage`` is the share of the query terms' IDF mass
+            found in the document (1.0 = every term matched).
+        """
+        terms = self.query_terms(query)
+        with self._lock:
+            if not terms or not self._doc_len:
+                return []
+            avgdl = self._total_len / len(self._doc_len)
+            total_idf = sum(self.idf(term) for term in terms)
+            scores: dict[str, float] = {}
+            matched_idf: dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term)
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avgdl)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched_idf[doc_id] = matched_idf.get(doc_id, 0.0) + idf
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                {
+                    "id": doc_id,
+                    "content": self._docs[doc_id][0],
+                    "metadata": self._docs[doc_id][1],
+                    "score": score,
+                    "coverage": matched_idf[doc_id] / total_idf,
+                }
+                for doc_id, score in ranked
+            ]
+
+    def get_stats(self) -> dict:
+        return {
+            "documents": len(self._doc_len),
+            "terms": len(self._postings),
+            "avg_doc_length": round(self._total_len / len(self._doc_len), 1) if self._doc_len else 0.0,
+        }
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Fuse ranked ID lists: score(d) = sum(1 / (k + rank_i(d)))."""
+    fused: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
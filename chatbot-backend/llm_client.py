@@ -0,0 +1,416 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Async LLM client for OpenRouter
+
+Tek bir paylaşılan AsyncOpenAI istemcisi (keep-alive bağlantı havuzu ile)
+uygulama ömrü boyunca yeniden kullanılır; event loop hiçbir zaman bloklanmaz.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+import httpx
+from openai import AsyncOpenAI
+from config import Settings, get_settings
+from llm_resilience import (
+    CircuitBreaker,
+    LLMUnavailableError,
+    backoff_delay,
+    is_retryable,
+    retry_after_seconds,
+)
+from metrics import LLM_LATENCY, LLM_TTFT, record_error, record_usage
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """Rolling window of latency samples (milliseconds) with percentiles."""
+
+    def __init__(self, window: int = 1000):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, value_ms: float) -> None:
+        self._samples.append(value_ms)
+        self.count += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "last": self._samples[-1] if self._samples else None,
+        }
+
+
+class LLMClient:
+    """
+    Pooled async client for the OpenRouter chat-completions API.
+
+    Created once in the FastAPI lifespan and closed on shutdown, so TCP/TLS
+    connections to OpenRouter are reused across requests.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.model = settings.openrouter_model
+
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                settings.llm_read_timeout,
+                connect=settings.llm_connect_timeout,
+                pool=settings.llm_pool_timeout,
+            ),
+        )
+        self._client = AsyncOpenAI(
+            api_key=settings.openrouter_api_key,
+            base_url=settings.openrouter_base_url,
+            http_client=self._http_client,
+            max_retries=0,
+            default_headers={
+                "HTTP-Referer": "http://localhost:8000",
+                "X-Title": settings.app_name,
+            },
+        )
+
+        # Time-to-first-token of upstream streams
+        self.ttft = LatencyStats()
+        # Per-model completion latency (hedging) and circuit breakers
+        self._latencies: dict[str, LatencyStats] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def _candidates(self, model: Optional[str] = None) -> list[str]:
+        """Primary model followed by the configured fallbacks (in order)."""
+        primary = model or self.model
+        return [primary] + [m for m in self.settings.llm_fallback_models if m != primary]
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(
+                model,
+                failure_threshold=self.settings.llm_breaker_failure_threshold,
+                reset_timeout=self.settings.llm_breaker_reset_timeout,
+            )
+        return breaker
+
+    def _latency(self, model: str) -> LatencyStats:
+        stats = self._latencies.get(model)
+        if stats is None:
+            stats = self._latencies[model] = LatencyStats()
+        return stats
+
+    def _retry_delay(self, attempt: int, error: Exception, remaining: float) -> Optional[float]:
+        """Delay before the next attempt, or None to move on to the next model."""
+        if attempt >= self.settings.llm_max_retries:
+            return None
+        delay = backoff_delay(attempt, self.settings.llm_retry_base_delay, self.settings.llm_retry_max_delay)
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # Uzun Retry-After: beklemek yerine yedek modele geç
+            if retry_after > self.settings.llm_retry_max_delay:
+                return None
+            delay = max(delay, retry_after)
+        return delay if delay < remaining else None
+
+    async def _complete_once(self, messages: list[dict], model: str) -> str:
+        started = time.perf_counter()
+        response = await self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=self.settings.llm_max_tokens,
+            temperature=self.settings.llm_temperature,
+        )
+        LLM_LATENCY.labels(model).observe(time.perf_counter() - started)
+        record_usage(model, response.usage)
+        return response.choices[0].message.content or ""
+
+    async def _hedged_complete(self, messages: list[dict], model: str, timeout: float) -> str:
+        """
+        One attempt, optionally hedged: if no answer arrived after the model's
+        latency percentile, a second identical request races the first.
+        """
+        latency = self._latency(model)
+        hedge_after = None
+        if self.settings.llm_hedging and latency.count >= self.settings.llm_hedge_min_samples:
+            hedge_after = latency.percentile(self.settings.llm_hedge_percentile) / 1000
+
+        started = time.monotonic()
+        primary = asyncio.create_task(self._complete_once(messages, model))
+        tasks = {primary}
+        try:
+            if hedge_after is not None and hedge_after < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    self.hedges += 1
+                    tasks.add(asyncio.create_task(self._complete_once(messages, model)))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        latency.record((time.monotonic() - started) * 1000)
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not tasks:
+                raise error
+            raise asyncio.TimeoutError(f"{model} did not answer within {timeout:.1f}s")
+        finally:
+            # Kaybeden / yarım kalan istekleri iptal et (bağlantı kapatılır)
+            for task in tasks:
+                task.cancel()
+
+    async def complete(self, messages: list[dict], model: Optional[str] = None) -> dict:
+        """
+        Send a (non-streaming) chat completion request.
+
+        Transient failures are retried with jittered backoff, then the
+        fallback models are tried in order; models whose circuit breaker is
+        open are skipped. The whole call is bounded by ``llm_total_timeout``.
+
+        Returns:
+            Dict with the assistant ``content`` and the ``model`` that answered.
+
+        Raises:
+            LLMUnavailableError: if no model could answer.
+        """
+        deadline = time.monotonic() + self.settings.llm_total_timeout
+        last_error: Optional[Exception] = None
+        for index, candidate in enumerate(self._candidates(model)):
+            breaker = self._breaker(candidate)
+            if not breaker.allow():
+                continue
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LLMUnavailableError("LLM call deadline exceeded") from last_error
+                logger.info(f"📡 Sending request to OpenRouter ({candidate})...")
+                try:
+                    content = await self._hedged_complete(
+                        messages, candidate, min(remaining, self.settings.llm_attempt_timeout)
+                    )
+                except Exception as e:
+                    if not is_retryable(e):
+                        # Model ulaşılabilir, hata isteğin kendisinde (ör. 400/401)
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    last_error = e
+                    logger.warning(f"⚠️ {candidate} failed: {type(e).__name__}: {e}")
+                    record_error("llm", e)
+                    delay = self._retry_delay(attempt, e, deadline - time.monotonic())
+                    if delay is None or breaker.state == "open":
+                        break
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                except BaseException:
+                    # İptal (CancelledError): başarı/hata değil, half-open deneme hakkı bırakılır
+                    breaker.release()
+                    raise
+                breaker.record_success()
+                if index > 0:
+                    self.fallbacks += 1
+                return {"content": content, "model": candidate}
+        raise LLMUnavailableError("No LLM model is available") from last_error
+
+    def stream(self, messages: list[dict], model: Optional[str] = None) -> "LLMStream":
+        """
+        Stream a chat completion, yielding text deltas as they arrive.
+
+        Retries and model fallback apply until the first token; after that
+        errors are raised to the caller. Closing the stream (e.g. on client
+        disconnect) closes the upstream HTTP response, which cancels the
+        generation at OpenRouter.
+        """
+        return LLMStream(self, messages, model)
+
+    async def _stream_tokens(
+        self, messages: list[dict], model: Optional[str], handle: "LLMStream"
+    ) -> AsyncIterator[str]:
+        deadline = time.monotonic() + self.settings.llm_total_timeout
+        last_error: Optional[Exception] = None
+        for index, candidate in enumerate(self._candidates(model)):
+            breaker = self._breaker(candidate)
+            if not breaker.allow():
+                continue
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LLMUnavailableError("LLM call deadline exceeded") from last_error
+                logger.info(f"📡 Streaming request to OpenRouter ({candidate})...")
+                started = time.perf_counter()
+                attempt_deadline = time.monotonic() + min(remaining, self.settings.llm_attempt_timeout)
+                emitted = False
+                stream = None
+                try:
+                    stream = await asyncio.wait_for(
+                        self._client.chat.completions.create(
+                            model=candidate,
+                            messages=messages,
+                            max_tokens=self.settings.llm_max_tokens,
+                            temperature=self.settings.llm_temperature,
+                            stream=True,
+                            # Son chunk'ta token kullanımı (usage) döner
+                            stream_options={"include_usage": True},
+                        ),
+                        attempt_deadline - time.monotonic(),
+                    )
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            if emitted:
+                                chunk = await chunks.__anext__()
+                            else:
+                                # İlk token da deneme süre sınırına tabi
+                                chunk = await asyncio.wait_for(
+                                    chunks.__anext__(), attempt_deadline - time.monotonic()
+                                )
+                        except StopAsyncIteration:
+                            break
+                        record_usage(candidate, getattr(chunk, "usage", None))
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        if not emitted:
+                            self.ttft.record((time.perf_counter() - started) * 1000)
+                            LLM_TTFT.labels(candidate).observe(time.perf_counter() - started)
+                            handle.model = candidate
+                            emitted = True
+                        yield delta
+                except Exception as e:
+                    record_error("llm", e)
+                    if emitted or not is_retryable(e):
+                        if is_retryable(e):
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    last_error = e
+                    logger.warning(f"⚠️ {candidate} stream failed: {type(e).__name__}: {e}")
+                    delay = self._retry_delay(attempt, e, deadline - time.monotonic())
+                    if delay is None or breaker.state == "open":
+                        break
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                except BaseException:
+                    # İstemci koptu (GeneratorExit / CancelledError): token geldiyse model
+                    # yanıt veriyordu, gelmediyse sonuç nötr; breaker asla kilitli kalmasın
+                    if emitted:
+                        breaker.record_success()
+                    else:
+                        breaker.release()
+                    raise
+                finally:
+                    if stream is not None:
+                        await stream.close()
+                LLM_LATENCY.labels(candidate).observe(time.perf_counter() - started)
+                breaker.record_success()
+                if index > 0:
+                    self.fallbacks += 1
+                return
+        raise LLMUnavailableError("No LLM model is available") from last_error
+
+    def get_stats(self) -> dict:
+        """Get latency and failure-handling statistics of upstream calls."""
+        return {
+            "model": self.model,
+            "fallback_models": self.settings.llm_fallback_models,
+            "upstream_ttft_ms": self.ttft.summary(),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "models": {
+                model: {
+                    "circuit_breaker": self._breaker(model).get_stats(),
+                    "latency_ms": self._latency(model).summary(),
+                }
+                for model in self._candidates()
+            },
+        }
+
+    async def close(self) -> None:
+        """Close the underlying connection pool."""
+        await self._client.close()
+
+
+class LLMStream:
+    """
+    Async iterator over the text deltas of a streamed completion.
+
+    ``model`` is set to the model that answered once the first token
+    arrived (it may be a fallback model).
+    """
+
+    def __init__(self, client: LLMClient, messages: list[dict], model: Optional[str] = None):
+        self.model: Optional[str] = None
+        self._tokens = client._stream_tokens(messages, model, self)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._tokens
+
+    async def aclose(self) -> None:
+        await self._tokens.aclose()
+
+
+# Global instance
+_llm_client: Optional[LLMClient] = None
+
+
+def init_llm_client() -> LLMClient:
+    """Create the global LLM client (called from the app lifespan)."""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient(get_settings())
+    return _llm_client
+
+
+def get_llm_client() -> LLMClient:
+    """Get the global LLM client instance."""
+    if _llm_client is None:
+        return init_llm_client()
+    return _llm_client
+
+
+async def close_llm_client() -> None:
+    """Close the global LLM client (called on app shutdown)."""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
@@ -3,17 +3,82 @@ Luxivolt Mühendislik Chatbot Backend
 FastAPI application with OpenRouter integration and RAG support
 """
 
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+from contextlib import aclosing, asynccontextmanager
+from functools import partial
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, APITimeoutError
 from config import get_settings
+from prompt_builder import AssembledPrompt, get_prompt_builder
+from llm_resilience import LLMUnavailableError
+from llm_client import LatencyStats, close_llm_client, get_llm_client, init_llm_client
 from rag_service import get_rag_service, RAGService
+from rag_client import RAGServerError
+from reindexer import BackgroundReindexer, get_reindexer, stop_reindexer
+from response_cache import get_response_cache
+from admission import AdmissionController, AdmissionRejected, AdmissionTicket, TokenBucketLimiter
+from cache import normalize_query
+from metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUE_DEPTH,
+    RequestMetricsMiddleware,
+    record_cache,
+    record_error,
+    render,
+    timed,
+)
+from session_store import get_session_store, new_session_id
+from singleflight import SingleFlight
+from warmup import RAGWarmup, get_rag_warmup
 
 # Initialize settings
 settings = get_settings()
 
+logging.basicConfig(
+    level=settings.log_level.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+# httpx her OpenRouter isteğini INFO seviyesinde loglar
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Time-to-first-token of /chat/stream as seen by the client
+stream_ttft = LatencyStats()
+
+# Concurrent identical first-turn /chat and /search calls share one computation
+chat_flight = SingleFlight("chat")
+search_flight = SingleFlight("search")
+
+# Concurrency limits with bounded wait queues
+chat_admission = AdmissionController(
+    "chat",
+    max_concurrent=settings.admission_chat_max_concurrent,
+    max_queue=settings.admission_chat_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+)
+search_admission = AdmissionController(
+    "search",
+    max_concurrent=settings.admission_search_max_concurrent,
+    max_queue=settings.admission_search_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+)
+
+# Per-client token buckets
+ip_limiter = TokenBucketLimiter(
+    "ip", settings.rate_limit_ip_per_minute, settings.rate_limit_ip_burst
+)
+session_limiter = TokenBucketLimiter(
+    "session", settings.rate_limit_session_per_minute, settings.rate_limit_session_burst
+)
+
 
 # Request/Response Models
 class ChatMessage(BaseModel):
@@ -25,7 +90,8 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     """Chat request model."""
     message: str
-    conversation_history: list[ChatMessage] = []
+    session_id: Optional[str] = None  # history is kept server-side per session
+    conversation_history: list[ChatMessage] = []  # only used to seed a new session
     use_rag: bool = True  # Enable/disable RAG
 
 
@@ -34,43 +100,100 @@ class ChatResponse(BaseModel):
     response: str
     model: str
     sources: list[str] = []  # RAG sources used
+    cached: bool = False  # served from the response cache
+    degraded: bool = False  # no LLM available, answer built from retrieval only
+    session_id: Optional[str] = None  # send with the next message
 
 
 class SearchRequest(BaseModel):
     """Search request model."""
     query: str
     k: int = 4
+    score_threshold: float = 0.0  # min cosine similarity of returned chunks
 
 
 class SearchResult(BaseModel):
     """Single search result."""
     content: str
     source: str
-    score: float
+    score: float  # cosine similarity; query-term coverage (0-1) for lexical fast-path hits
+    sources: list[str] = []  # every file containing this chunk (near-duplicates are stored once)
+    lexical_score: Optional[float] = None  # BM25 score (lexical fast path only)
+
+
+class SearchBatchRequest(BaseModel):
+    """Batch search request model."""
+    queries: list[str]
+    k: int = 4
+    score_threshold: float = 0.0  # min cosine similarity of returned chunks
+
+
+class SearchBatchResult(BaseModel):
+    """Results of one query of a batch search."""
+    query: str
+    results: list[SearchResult]
 
 
 class IndexRequest(BaseModel):
     """Index request model."""
-    force_reindex: bool = False
+    force_reindex: bool = False  # kept for compatibility; a reindex always syncs with data_dir
+    full_rebuild: bool = False  # re-embed everything instead of only changed files
+    wait: bool = False  # respond when the new index is live instead of right away
+
+
+def index_swapped(chunk_count: int) -> None:
+    """Called after a background reindex made a new index live."""
+    # Başlangıçta indeksleme başarısız olduysa RAG artık hazır
+    get_rag_warmup().mark_ready(chunk_count)
+    # İndeks değişti, önbellekteki yanıtlar artık geçersiz
+    get_response_cache().clear()
+
+
+def local_reindexer() -> BackgroundReindexer:
+    """Background reindexer of the in-process RAG service (RAG_MODE=local)."""
+    reindexer = get_reindexer()
+    reindexer.on_swap = index_swapped
+    return reindexer
+
+
+async def watch_data_dir(warmup: RAGWarmup) -> None:
+    """Start the data_dir watcher once the start-up index is loaded."""
+    while not await warmup.wait_ready(5.0):
+        if warmup.phase == "failed":
+            logger.warning("⚠️ RAG warm-up failed, data directory watcher not started")
+            return
+    local_reindexer().start_watcher()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events."""
-    # Startup: Initialize RAG service and index documents
-    print("🚀 Starting Luxivolt Chatbot Backend...")
-    rag = get_rag_service()
-    try:
-        chunk_count = rag.index_documents(force_reindex=False)
-        print(f"📚 RAG service ready with {chunk_count} indexed chunks")
-    except Exception as e:
-        print(f"⚠️ Warning: RAG indexing failed: {e}")
-        print("   The chatbot will work without RAG context.")
+    # Startup: model + indeks arka planda yüklenir, uvicorn hemen bağlantı kabul eder
+    logger.info("🚀 Starting Luxivolt Chatbot Backend...")
+    init_llm_client()
+    get_session_store()
+    if settings.rag_mode == "remote" and settings.session_backend == "memory":
+        # Oturum bellekte worker başına tutulur: sonraki tur başka worker'a düşerse geçmiş kaybolur
+        logger.warning(
+            "⚠️ RAG_MODE=remote with SESSION_BACKEND=memory: with several workers each one has its "
+            "own sessions and follow-up turns lose their history. Set SESSION_BACKEND=sqlite."
+        )
+    warmup = get_rag_warmup()
+    warmup.start()
+    # Uzak modda izleyiciyi indeksin sahibi olan rag_server.py çalıştırır
+    watcher = None
+    if settings.reindex_watch and settings.rag_mode == "local":
+        watcher = asyncio.create_task(watch_data_dir(warmup))
     
     yield
     
     # Shutdown
-    print("👋 Shutting down Luxivolt Chatbot Backend...")
+    logger.info("👋 Shutting down Luxivolt Chatbot Backend...")
+    if watcher is not None:
+        watcher.cancel()
+    await warmup.stop()
+    await stop_reindexer()
+    await close_llm_client()
 
 
 # Initialize FastAPI app
@@ -90,56 +213,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Initialize OpenAI client with OpenRouter base URL
-client = OpenAI(
-    api_key=settings.openrouter_api_key,
-    base_url=settings.openrouter_base_url,
-)
-
-
-def get_system_prompt(context: str = "") -> str:
-    """Generate system prompt with strict RAG context and Sales Persona."""
-    
-    # Base Persona & Tone
-    base_prompt = """Sen Luxivolt Mühendislik'in uzman teknik satış asistanısın.
-    
-    KİMLİK VE TON:
-    - Tonun profesyonel, güven verici, kurumsal ve yardımsever olmalı.
-    - Luxivolt Mühendislik adına konuştuğunu unutma.
-    - Yanıtlarını her zaman temiz ve okunabilir Markdown formatında ver.
-
-    GÖREVLERİN:
-    1. Kullanıcıların teknik sorularını, aşağıda sağlanan "Referans Bilgiler" ışığında yanıtla.
-    2. Konuşmanın gidişatını analiz et; eğer kullanıcı bir projeden, ihaleden veya satın alma niyetinden bahsediyorsa:
-       - Nazikçe iletişim bilgilerini (Ad, Telefon, E-posta) iste.
-       - Proje detaylarını (Konum, Güç, Kapsam vb.) öğrenmeye çalış.
-       - Amacın, satış ekibine iletilecek bir "Teklif Taslağı" oluşturmak için veri toplamaktır.
-
-    KURALLAR:
-    1. SADECE verilen referans bilgileri kullan. Dışarıdan bilgi uydurma.
-    2. Eğer sorunun cevabı referans bilgilerde YOKSA:
-       "Bu teknik detay hakkında size en doğru bilgiyi verebilmek için uzman mühendislerimizle görüşmenizi öneririm. Dilerseniz iletişim bilgilerinizi bırakın, sizi arayalım." şeklinde yanıt ver.
-    3. Asla "bilgi yok" deme, her zaman profesyonel bir yönlendirme yap.
-    4. Cevabın dilini, kullanıcının diliyle (varsayılan Türkçe) eşleştir."""
-
-    if context:
-        return f"""{base_prompt}
-
-### Referans Bilgiler (Context):
-{context}
-
-### Müşteri Sorusu:
-"""
-    
-    # Context yoksa
-    return f"""{base_prompt}
-
-UYARI: Şu an referans bilgi bulunamadı. Genel kurumsal nezaketle yanıt ver ve kullanıcıyı detaylı bilgi için iletişime yönlendir.
-
-### Müşteri Sorusu:
-"""
-
+# End-to-end request duration per route (Prometheus)
+app.add_middleware(RequestMetricsMiddleware)
 
 @app.get("/")
 async def root():
@@ -155,111 +230,307 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    rag = get_rag_service()
-    stats = rag.get_stats()
+    """Liveness check - the process is up (RAG may still be warming up)."""
+    warmup = get_rag_warmup()
+    if warmup.ready:
+        rag_status = "ready" if warmup.chunk_count > 0 else "no_documents"
+    else:
+        rag_status = warmup.phase
     return {
         "status": "healthy",
-        "rag_status": "ready" if stats.get("total_chunks", 0) > 0 else "no_documents",
-        "indexed_chunks": stats.get("total_chunks", 0),
+        "rag_status": rag_status,
+        "indexed_chunks": warmup.chunk_count,
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check - 200 once the embedding model and index are loaded.
+    
+    Returns 503 during warm-up so load balancers hold traffic back.
+    """
+    status = get_rag_warmup().get_status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status, headers={"Retry-After": "5"})
+    return status
+
+
+def require_rag(allow_failed: bool = False) -> RAGService:
+    """Return the RAG service, or fail with 503 while it is warming up."""
+    warmup = get_rag_warmup()
+    if not warmup.ready and not (allow_failed and warmup.phase == "failed"):
+        raise HTTPException(
+            status_code=503,
+            detail=f"RAG servisi henüz hazır değil ({warmup.phase}).",
+            headers={"Retry-After": "5"},
+        )
+    return get_rag_service()
+
+
+def client_ip(http_request: Request) -> str:
+    """Client address (first X-Forwarded-For hop if the proxy is trusted)."""
+    if settings.trust_forwarded_for:
+        forwarded = http_request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+
+def enforce_rate_limit(http_request: Request, session_id: Optional[str] = None) -> None:
+    """Apply the per-IP and per-session token buckets (429 when exhausted)."""
+    if not settings.rate_limit_enabled:
+        return
+    limiter = ip_limiter
+    ip = client_ip(http_request)
+    retry_after = ip_limiter.check(ip)
+    if retry_after is None and session_id:
+        retry_after = session_limiter.check(session_id)
+        if retry_after is not None:
+            limiter = session_limiter
+            # Reddedilen istek IP kotasından düşmesin: gürültülü bir oturum aynı NAT/proxy
+            # arkasındaki diğer oturumları kilitlemesin
+            ip_limiter.refund(ip)
+    if retry_after is not None:
+        record_error("rate_limit", limiter.name)
+        raise HTTPException(
+            status_code=429,
+            detail="Çok fazla istek gönderildi, lütfen biraz bekleyin.",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+
+
+async def admit(controller: AdmissionController) -> Optional[AdmissionTicket]:
+    """Take a concurrency slot, or fail fast with 503 + Retry-After."""
+    if not settings.admission_control:
+        return None
+    try:
+        return await controller.acquire()
+    except AdmissionRejected as e:
+        logger.warning(f"🚦 {controller.name} request rejected ({e.reason})")
+        record_error(f"admission_{controller.name}", e.reason)
+        raise HTTPException(
+            status_code=503,
+            detail="Sunucu şu anda yoğun, lütfen kısa bir süre sonra tekrar deneyin.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def run_admitted(controller: AdmissionController, fn):
+    """Run ``fn()`` while holding a concurrency slot."""
+    ticket = await admit(controller)
+    try:
+        return await fn()
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+
+async def retrieve_chunks(request: ChatRequest) -> list[dict]:
+    """Run RAG retrieval for a chat request and return the matching chunks."""
+    # Get RAG context if enabled
+    if not request.use_rag:
+        return []
+    
+    # Warm-up sürerken sınırlı süre bekle, hâlâ hazır değilse RAG'sız yanıtla
+    if not await get_rag_warmup().wait_ready(settings.rag_ready_timeout):
+        logger.info("⏳ RAG not ready yet, answering without context")
+        record_error("retrieval", "rag_not_ready")
+        return []
+    
+    rag = get_rag_service()
+    # score_threshold ile alakasız sonuçları eleyin, adaptive-k ile
+    # skorlar düştüğünde daha fazla chunk eklemeyin
+    return await rag.asearch(
+        request.message,
+        k=settings.rag_top_k,
+        score_threshold=settings.rag_score_threshold,
+    )
+
+
+async def run_session_store(fn, *args):
+    """Call a session store method, off the event loop if it does I/O."""
+    if get_session_store().blocking:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+async def load_session(request: ChatRequest) -> tuple[str, list[dict], list[dict]]:
+    """
+    Resolve the session of a chat request.
+    
+    Returns:
+        (session_id, history, seed) where seed holds client-sent history
+        that still has to be stored for a new session
+    """
+    store = get_session_store()
+    if request.session_id:
+        history = await run_session_store(store.get, request.session_id)
+        if history is not None:
+            return request.session_id, history, []
+    
+    # Yeni (veya süresi dolmuş) oturum: istemci ID seçemez, yeni ID üretilir
+    seed = [msg.model_dump() for msg in request.conversation_history]
+    return new_session_id(), seed, seed
+
+
+async def save_turn(session_id: str, seed: list[dict], message: str, answer: str) -> None:
+    """Append a completed question/answer turn to the session."""
+    store = get_session_store()
+    turn = [*seed, {"role": "user", "content": message}, {"role": "assistant", "content": answer}]
+    await run_session_store(store.append, session_id, turn)
+
+
+async def prepare_prompt(request: ChatRequest, history: list[dict]) -> AssembledPrompt:
+    """Retrieve context and assemble the LLM messages within the token budget."""
+    results = await retrieve_chunks(request)
+    with timed("context_build"):
+        return get_prompt_builder().build(request.message, history, results)
+
+
+RETRIEVAL_ONLY_MODEL = "retrieval-only"
+
+
+async def retrieval_only_answer(
+    request: ChatRequest, sources: list[str], error: Exception
+) -> dict:
+    """
+    Answer from the knowledge base alone when no LLM model is available.
+    
+    Keeps latency bounded while every circuit breaker is open.
+    """
+    logger.warning(f"⚠️ No LLM available ({error}), answering from retrieval only")
+    record_error("llm", error)
+    context = ""
+    if request.use_rag and get_rag_warmup().ready:
+        rag = get_rag_service()
+        # Sorgu embedding'i retrieval sırasında önbelleğe alındı, bu çağrı ucuz
+        context = await asyncio.to_thread(
+            rag.get_context_for_query, request.message, settings.rag_top_k
+        )
+    
+    if context:
+        response = (
+            "Şu anda yapay zekâ asistanımıza ulaşılamıyor. Sorunuzla ilgili "
+            "bilgi bankamızda bulunan bilgiler:\n\n"
+            f"{context}\n\n"
+            "Detaylı bilgi için [İletişim](#iletisim) sayfamızdan bize ulaşabilirsiniz."
+        )
+    else:
+        response = (
+            "Şu anda yapay zekâ asistanımıza ulaşılamıyor. Lütfen kısa bir süre sonra "
+            "tekrar deneyin veya [İletişim](#iletisim) sayfamızdan bize ulaşın."
+        )
+        sources = []
+    return {
+        "response": response,
+        "model": RETRIEVAL_ONLY_MODEL,
+        "sources": sources,
+        "cached": False,
+        "degraded": True,
+    }
+
+
+async def generate_answer(request: ChatRequest, history: list[dict]) -> dict:
+    """
+    Retrieve context and get the LLM answer for one chat turn.
+    
+    Returns:
+        ``ChatResponse`` fields (without session_id)
+    """
+    prompt = await prepare_prompt(request, history)
+    llm = get_llm_client()
+    
+    # İlk tur sorular için yanıt önbelleği (opt-in)
+    cache = None
+    if (
+        settings.response_cache_enabled
+        and not history
+        and get_rag_warmup().ready
+    ):
+        cache = get_response_cache()
+        rag = get_rag_service()
+        scope = cache.make_scope(prompt.context, llm.model, rag.index_version)
+        query_embedding = None
+        if cache.semantic:
+            try:
+                query_embedding = await rag.aembed_query(request.message)
+            except RAGServerError as e:
+                # RAG sunucusuna ulaşılamıyor: önbellek atlanır, yanıt LLM'den gelir (500 değil)
+                logger.warning(f"⚠️ Response cache skipped, query embedding failed: {e}")
+                record_error("rag_server", e)
+                cache = None
+        
+    if cache is not None:
+        cached = cache.get(request.message, scope, query_embedding)
+        record_cache("response", cached is not None)
+        if cached is not None:
+            return {**cached, "cached": True}
+    
+    # Call OpenRouter API through the shared async client
+    try:
+        completion = await llm.complete(prompt.messages)
+    except LLMUnavailableError as e:
+        return await retrieval_only_answer(request, prompt.sources, e)
+    
+    answer = {
+        "response": completion["content"],
+        "model": completion["model"],
+        "sources": prompt.sources,
+    }
+    if cache is not None:
+        cache.set(request.message, scope, answer, query_embedding)
+    return {**answer, "cached": False}
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Chat endpoint - processes user messages and returns AI responses.
     
     Strictly uses RAG context.
     """
+    enforce_rate_limit(http_request, request.session_id)
     try:
-        sources = []
-        context = ""
-        
-        # Get RAG context if enabled
-        if request.use_rag:
-            rag = get_rag_service()
-            # score_threshold=0.3 ile alakasız sonuçları eleyin
-            results = rag.search(request.message, k=4, score_threshold=0.3)
-            
-            if results:
-                # Context'i string olarak hazırla
-                context_parts = []
-                for res in results:
-                    context_parts.append(f"- {res['content']}")
-                    sources.append(res["source"])
-                
-                context = "\n\n".join(context_parts)
-                # Tekilleştir
-                sources = list(set(sources))
-        
-        # Build messages array with conversation history
-        # Not: Context artık system prompt'un içine gömüldü
-        system_prompt = get_system_prompt(context)
-        
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add conversation history (optional: limit history length to keep context focus)
-        # Sadece son 2-3 mesajı alabiliriz
-        for msg in request.conversation_history[-4:]:
-            messages.append({"role": msg.role, "content": msg.content})
-        
-        # Add current user message
-        messages.append({"role": "user", "content": request.message})
-        
-        # Call OpenRouter API using requests (Manual implementation)
-        import requests
-        import json
+        session_id, history, seed = await load_session(request)
+        generate = partial(run_admitted, chat_admission, partial(generate_answer, request, history))
+        if settings.request_coalescing and not history:
+            # Geçmişi olmayan özdeş sorular tek bir retrieval + LLM çağrısını paylaşır
+            # (ve tek bir eşzamanlılık slotu kullanır)
+            key = (normalize_query(request.message), request.use_rag)
+            answer = await chat_flight.do(key, generate)
+        else:
+            answer = await generate()
         
-        headers = {
-            "Authorization": f"Bearer {settings.openrouter_api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "http://localhost:8000",
-            "X-Title": settings.app_name,
-        }
-        
-        # Prepare messages
-        api_messages = []
-        for msg in messages:
-            api_messages.append({"role": msg["role"], "content": msg["content"]})
-            
-        data = {
-            "model": settings.openrouter_model,
-            "messages": api_messages,
-            "max_tokens": 1024,
-            "temperature": 0.7,
-        }
-        
-        print(f"📡 Sending request to OpenRouter ({settings.openrouter_model})...")
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            data=json.dumps(data),
-            timeout=60 # 60 seconds timeout
-        )
-        
-        if response.status_code != 200:
-            error_detail = response.text
-            print(f"❌ OpenRouter API Error: {response.status_code} - {error_detail}")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"OpenRouter API hatası: {error_detail}"
-            )
-            
-        response_json = response.json()
-        assistant_message = response_json["choices"][0]["message"]["content"]
-        
-        return ChatResponse(
-            response=assistant_message,
-            model=settings.openrouter_model,
-            sources=sources,
-        )
+        await save_turn(session_id, seed, request.message, answer["response"])
+        return ChatResponse(**answer, session_id=session_id)
         
     except HTTPException as he:
         raise he
+    except APIStatusError as e:
+        logger.error(f"❌ OpenRouter API Error: {e.status_code} - {e.message}")
+        record_error("chat", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"OpenRouter API hatası: {e.message}"
+        )
+    except APITimeoutError:
+        logger.error("❌ OpenRouter API Error: request timed out")
+        record_error("chat", "APITimeoutError")
+        raise HTTPException(
+            status_code=504,
+            detail="OpenRouter API zaman aşımına uğradı."
+        )
+    except APIConnectionError as e:
+        logger.error(f"❌ OpenRouter API Error: connection failed - {e}")
+        record_error("chat", e)
+        raise HTTPException(
+            status_code=502,
+            detail="OpenRouter API'ye bağlanılamadı."
+        )
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Chat error")
+        record_error("chat", e)
         raise HTTPException(
             status_code=500,
             detail=f"Chat işlemi sırasında bir hata oluştu: {str(e)}"
@@ -267,26 +538,100 @@ async def chat(request: ChatRequest):
 
 
 @app.post("/search", response_model=list[SearchResult])
-async def search_documents(request: SearchRequest):
+async def search_documents(request: SearchRequest, http_request: Request):
     """
     Search endpoint - search through indexed documents.
     
     Uses vector similarity search to find relevant document chunks.
     """
+    enforce_rate_limit(http_request)
+    rag = require_rag()
     try:
-        rag = get_rag_service()
-        results = rag.search(request.query, k=request.k)
+        search = partial(
+            run_admitted,
+            search_admission,
+            partial(
+                rag.asearch,
+                request.query,
+                k=request.k,
+                score_threshold=request.score_threshold,
+                adaptive_k=False,
+            ),
+        )
+        if settings.request_coalescing:
+            key = (normalize_query(request.query), request.k, request.score_threshold)
+            results = await search_flight.do(key, search)
+        else:
+            results = await search()
         
         return [
             SearchResult(
                 content=r["content"],
                 source=r["source"],
                 score=r["score"],
+                sources=r.get("sources", [r["source"]]),
+                lexical_score=r.get("lexical_score"),
             )
             for r in results
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
+        record_error("search", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Arama sırasında bir hata oluştu: {str(e)}"
+        )
+
+
+@app.post("/search/batch", response_model=list[SearchBatchResult])
+async def search_documents_batch(request: SearchBatchRequest, http_request: Request):
+    """
+    Batch search endpoint - search for many queries in one request.
+    
+    All queries are embedded in one batched forward pass and looked up in
+    the vector store together; results are returned per query, in order.
+    """
+    enforce_rate_limit(http_request)
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="En az bir sorgu gönderilmelidir.")
+    if len(request.queries) > settings.search_batch_max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tek istekte en fazla {settings.search_batch_max_size} sorgu gönderilebilir.",
+        )
+    rag = require_rag()
+    try:
+        batch = await run_admitted(
+            search_admission,
+            partial(
+                rag.asearch_many,
+                request.queries,
+                k=request.k,
+                score_threshold=request.score_threshold,
+                adaptive_k=False,
+            ),
+        )
+        return [
+            SearchBatchResult(
+                query=query,
+                results=[
+                    SearchResult(
+                        content=r["content"], source=r["source"], score=r["score"],
+                        sources=r.get("sources", [r["source"]]),
+                        lexical_score=r.get("lexical_score"),
+                    )
+                    for r in results
+                ],
+            )
+            for query, results in zip(request.queries, batch)
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        record_error("search_batch", e)
         raise HTTPException(
             status_code=500,
             detail=f"Arama sırasında bir hata oluştu: {str(e)}"
@@ -296,25 +641,72 @@ async def search_documents(request: SearchRequest):
 @app.post("/index")
 async def index_documents(request: IndexRequest):
     """
-    Index endpoint - index or re-index documents.
+    Index endpoint - re-index documents without interrupting searches.
     
-    Loads documents from data directory and indexes them into ChromaDB.
+    A new index generation is built in the background from the data
+    directory while queries keep using the live index, then swapped in
+    atomically. Only added or changed files are re-embedded; set
+    full_rebuild to re-embed everything. Returns 202 right away (poll
+    ``/index/status``) unless ``wait`` is set.
     """
+    # Başlangıçta indeksleme başarısız olduysa buradan yeniden denenebilir
+    rag = require_rag(allow_failed=True)
     try:
-        rag = get_rag_service()
-        chunk_count = rag.index_documents(force_reindex=request.force_reindex)
-        
-        return {
-            "status": "success",
-            "message": f"Başarıyla {chunk_count} chunk indekslendi.",
-            "chunk_count": chunk_count,
-        }
-        
+        if settings.rag_mode == "remote":
+            status = await asyncio.to_thread(rag.start_reindex, request.full_rebuild, request.wait)
+        else:
+            reindexer = local_reindexer()
+            status = reindexer.start(full_rebuild=request.full_rebuild)
+            if request.wait:
+                status = await reindexer.wait()
     except Exception as e:
+        logger.exception("❌ Indexing error")
+        record_error("index", e)
         raise HTTPException(
             status_code=500,
             detail=f"İndeksleme sırasında bir hata oluştu: {str(e)}"
         )
+    
+    if not request.wait:
+        message = (
+            "İndeksleme kuyruğa alındı, mevcut indeksleme bitince başlayacak."
+            if status["queued"] else "İndeksleme arka planda başladı."
+        )
+        return JSONResponse(status_code=202, content={"status": "accepted", "message": message, "reindex": status})
+    
+    if status["state"] == "failed":
+        raise HTTPException(
+            status_code=500,
+            detail=f"İndeksleme sırasında bir hata oluştu: {status['error']}"
+        )
+    if settings.rag_mode == "remote":
+        get_rag_warmup().mark_ready(status["chunk_count"])
+    return {
+        "status": "success",
+        "message": f"Başarıyla {status['chunk_count']} chunk indekslendi.",
+        "chunk_count": status["chunk_count"],
+        "changes": status["changes"],
+        "load": status["load"],
+        "reindex": status,
+    }
+
+
+@app.get("/index/status")
+async def index_status():
+    """
+    Background reindex status.
+    
+    Reports the running / last build (phase progress, changes, duration),
+    the live index generation and the data directory watcher.
+    """
+    rag = require_rag(allow_failed=True)
+    if settings.rag_mode == "remote":
+        try:
+            return await asyncio.to_thread(rag.get_index_status)
+        except Exception as e:
+            record_error("index_status", e)
+            raise HTTPException(status_code=503, detail=f"RAG sunucusuna ulaşılamadı: {str(e)}")
+    return local_reindexer().get_status()
 
 
 @app.get("/rag/stats")
@@ -324,23 +716,179 @@ async def get_rag_stats():
     
     Returns information about the vector store and indexed documents.
     """
-    rag = get_rag_service()
-    return rag.get_stats()
+    rag = require_rag()
+    # Uzak modda socket gidiş-dönüşü: event loop'u bloklamasın
+    return await asyncio.to_thread(rag.get_stats)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 @app.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(request: ChatRequest, http_request: Request):
     """
-    Streaming chat endpoint - returns AI responses as a stream.
+    Streaming chat endpoint - returns AI responses as Server-Sent Events.
+    
+    Events:
+        token: {"content": "..."} for every text delta from the LLM
+        done:  {"sources": [...], "model": "...", "ttft_ms": ..., "session_id": "...",
+                "degraded": false}
+        error: {"detail": "..."} if the answer fails mid-stream
     
-    TODO: Implement streaming response using SSE or WebSocket.
+    Every stream the client does not abort ends with ``done`` or ``error``.
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Streaming henüz uygulanmadı. /chat endpoint'ini kullanın."
+    started = time.perf_counter()
+    enforce_rate_limit(http_request, request.session_id)
+    # Slot stream bitene kadar tutulur
+    ticket = await admit(chat_admission)
+    release = ticket.release if ticket is not None else (lambda: None)
+    try:
+        session_id, history, seed = await load_session(request)
+        prompt = await prepare_prompt(request, history)
+    except Exception as e:
+        release()
+        record_error("chat_stream", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Chat işlemi sırasında bir hata oluştu: {str(e)}"
+        )
+    
+    llm = get_llm_client()
+    
+    async def event_stream():
+        ttft_ms = None
+        answer = []
+        stream = llm.stream(prompt.messages)
+        try:
+            try:
+                # aclosing: stream kapanınca upstream isteği de iptal edilir
+                async with aclosing(stream) as tokens:
+                    async for token in tokens:
+                        if await http_request.is_disconnected():
+                            logger.info("🔌 Client disconnected, cancelling upstream stream")
+                            return
+                        if ttft_ms is None:
+                            ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                            stream_ttft.record(ttft_ms)
+                        answer.append(token)
+                        yield sse_event("token", {"content": token})
+                # stream.model yalnızca ilk token gelince atanır
+                result = {"sources": prompt.sources, "model": stream.model or llm.model, "degraded": False}
+            except LLMUnavailableError as e:
+                # Hiçbir model yanıt veremiyor: ilk token'dan önce retrieval-only yanıta geç
+                fallback = await retrieval_only_answer(request, prompt.sources, e)
+                answer = [fallback["response"]]
+                yield sse_event("token", {"content": fallback["response"]})
+                result = {key: fallback[key] for key in ("sources", "model", "degraded")}
+            
+            # Sadece tamamlanan turlar oturuma kaydedilir
+            await save_turn(session_id, seed, request.message, "".join(answer))
+            yield sse_event("done", {
+                **result,
+                "ttft_ms": ttft_ms,
+                "session_id": session_id,
+            })
+        except APIStatusError as e:
+            logger.error(f"❌ OpenRouter API Error: {e.status_code} - {e.message}")
+            record_error("chat_stream", e)
+            yield sse_event("error", {"detail": f"OpenRouter API hatası: {e.message}"})
+        except APIConnectionError as e:
+            logger.error(f"❌ OpenRouter API Error: stream failed - {e}")
+            record_error("chat_stream", e)
+            yield sse_event("error", {"detail": "OpenRouter API'ye bağlanılamadı."})
+        except Exception as e:
+            # İstemci her durumda son bir olay (done / error) alır, zaman aşımını beklemez
+            logger.exception("❌ Chat stream error")
+            record_error("chat_stream", e)
+            yield sse_event("error", {"detail": f"Chat işlemi sırasında bir hata oluştu: {str(e)}"})
+        finally:
+            release()
+    
+    # release idempotent: generator hiç başlamazsa BackgroundTask serbest bırakır
+    return StreamingResponse(
+        event_stream(),
+        background=BackgroundTask(release),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx buffering'i kapat
+        },
     )
 
 
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """End a conversation session and drop its history."""
+    store = get_session_store()
+    if not await run_session_store(store.delete, session_id):
+        raise HTTPException(status_code=404, detail="Oturum bulunamadı.")
+    return {"status": "deleted", "session_id": session_id}
+
+
+@app.get("/sessions/stats")
+async def get_session_stats():
+    """Get session store statistics (active sessions, memory usage)."""
+    store = get_session_store()
+    return await run_session_store(store.get_stats)
+
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    """
+    Get admission control and rate limiting statistics.
+    
+    Queue depth, wait and hold times per endpoint group help size workers.
+    """
+    return {
+        "enabled": settings.admission_control,
+        "chat": chat_admission.get_stats(),
+        "search": search_admission.get_stats(),
+        "rate_limits": {
+            "enabled": settings.rate_limit_enabled,
+            "ip": ip_limiter.get_stats(),
+            "session": session_limiter.get_stats(),
+        },
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics (text exposition format).
+    
+    Per-stage latency histograms, end-to-end request durations, upstream
+    TTFT/duration/token usage per model, error and cache counters, index
+    size and indexing duration, admission queue depth.
+    """
+    for controller in (chat_admission, search_admission):
+        stats = controller.get_stats()
+        ADMISSION_ACTIVE.labels(controller.name).set(stats["active"])
+        ADMISSION_QUEUE_DEPTH.labels(controller.name).set(stats["queue_depth"])
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/llm/stats")
+async def get_llm_stats():
+    """
+    Get LLM latency statistics.
+    
+    Reports time-to-first-token for upstream streams and for /chat/stream
+    as perceived by the client (retrieval included), plus response cache and
+    request coalescing stats (saved_calls = upstream calls avoided).
+    """
+    stats = get_llm_client().get_stats()
+    stats["stream_ttft_ms"] = stream_ttft.summary()
+    stats["response_cache"] = get_response_cache().get_stats()
+    stats["coalescing"] = {
+        "chat": chat_flight.get_stats(),
+        "search": search_flight.get_stats(),
+    }
+    return stats
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,138 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Prometheus metrics
+
+Yavaşlığın embedding, vektör arama, prompt oluşturma veya OpenRouter'dan mı
+kaynaklandığı aşama bazlı histogramlarla görülür. `/metrics` endpoint'i
+Prometheus text formatında bu modüldeki metrikleri döner.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator, Union
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Embedding/arama milisaniyeler, LLM çağrıları saniyeler sürer: iki ayrı bucket seti
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+INDEX_BUCKETS = (1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+STAGE_LATENCY = Histogram(
+    "luxivolt_stage_duration_seconds",
+    "Duration of in-process request stages (query_embed, vector_search, lexical_search, "
+    "context_build; *_batch for /search/batch; rag_rpc for the shared RAG server)",
+    ["stage"],
+    buckets=FAST_BUCKETS,
+)
+LLM_TTFT = Histogram(
+    "luxivolt_llm_ttft_seconds",
+    "Upstream time to first token of streamed completions",
+    ["model"],
+    buckets=SLOW_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "luxivolt_llm_request_duration_seconds",
+    "Upstream duration of a completed LLM call (full answer)",
+    ["model"],
+    buckets=SLOW_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "luxivolt_request_duration_seconds",
+    "End-to-end request duration (until the last byte for streams)",
+    ["endpoint"],
+    buckets=SLOW_BUCKETS,
+)
+ERRORS = Counter(
+    "luxivolt_errors_total",
+    "Errors by stage and exception/reason",
+    ["stage", "error"],
+)
+CACHE_REQUESTS = Counter(
+    "luxivolt_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+LLM_TOKENS = Counter(
+    "luxivolt_llm_tokens_total",
+    "Upstream token usage reported in the response usage field",
+    ["model", "kind"],
+)
+INDEX_CHUNKS = Gauge("luxivolt_index_chunks", "Chunks in the vector index")
+INDEX_FILES = Gauge("luxivolt_index_files", "Source files in the vector index")
+INDEX_DURATION = Histogram(
+    "luxivolt_index_duration_seconds",
+    "Duration of indexing runs",
+    buckets=INDEX_BUCKETS,
+)
+INDEX_LAST_DURATION = Gauge(
+    "luxivolt_index_last_duration_seconds", "Duration of the last indexing run"
+)
+INDEX_DEDUP_RATIO = Gauge(
+    "luxivolt_index_dedup_ratio", "Share of chunk references served by a shared near-duplicate chunk"
+)
+ADMISSION_ACTIVE = Gauge(
+    "luxivolt_admission_active_requests", "Requests holding a concurrency slot", ["group"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "luxivolt_admission_queue_depth", "Requests waiting for a concurrency slot", ["group"]
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Observe the duration of the enclosed block as ``stage``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - started)
+
+
+def record_error(stage: str, error: Union[BaseException, str]) -> None:
+    """Count an error; exceptions are labelled by their class name."""
+    name = error if isinstance(error, str) else type(error).__name__
+    ERRORS.labels(stage, name).inc()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_usage(model: str, usage) -> None:
+    """Add the ``usage`` block of an OpenAI-compatible response to the token counters."""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.labels(model, kind.removesuffix("_tokens")).inc(value)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware observing end-to-end request duration per route.
+
+    Measured until the response (including a streamed body) is fully sent,
+    so /chat/stream durations cover the whole answer, not just the headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Path şablonu (ör. /sessions/{session_id}), ham path değil: sınırlı label sayısı
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+
+
+def render() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,256 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Quantized ONNX embedding engine for CPU-only nodes
+
+paraphrase-multilingual-MiniLM-L12-v2 modeli ONNX'e aktarılır, ağırlıkları
+dinamik int8 kuantizasyonla küçültülür ve onnxruntime ile çalıştırılır.
+PyTorch'a gerek kalmadan HuggingFaceEmbeddings ile aynı arayüzü sunar
+(mean pooling + L2 normalizasyon).
+
+Kullanım:
+    python onnx_embeddings.py --export   # modeli dışa aktar + kuantize et
+    python onnx_embeddings.py --verify   # referans modele cosine toleransı kontrolü
+"""
+
+import re
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from config import get_settings
+
+settings = get_settings()
+
+ONNX_DIR = Path(__file__).parent / "onnx_models"
+MODEL_FILE = "model_int8.onnx"
+FP32_MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Referans kontrolü için varsayılan örnekler (data/ okunamazsa)
+SAMPLE_TEXTS = [
+    "Trafo bakım hizmetleriniz nelerdir?",
+    "1600 kVA kompakt trafo merkezi kurulumu",
+    "GES projelerinde devlet teşviki konusunda destek oluyor musunuz?",
+    "AG/YG pano imalatı ve devreye alma",
+    "Keşif hizmetimiz ücretsizdir, mühendislerimiz 48 saat içinde saha ziyareti yapar.",
+    "Which equipment brands do you use?",
+]
+
+
+def default_model_dir(model_name: str) -> Path:
+    """Directory holding the exported model: onnx_models/<model name>."""
+    return ONNX_DIR / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+class OnnxEmbeddings:
+    """
+    Sentence embeddings from an int8-quantized ONNX transformer.
+
+    Drop-in replacement for ``HuggingFaceEmbeddings`` (``embed_documents`` /
+    ``embed_query``): tokens are mean-pooled over the attention mask and the
+    result is L2-normalized.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        intra_op_threads: int = 0,
+        batch_size: int = 32,
+        max_seq_length: int = 128,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = model_dir / MODEL_FILE
+        tokenizer_path = model_dir / TOKENIZER_FILE
+        if not model_path.exists() or not tokenizer_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found in {model_dir}. "
+                "Run `python onnx_embeddings.py --export` first."
+            )
+
+        self.model_dir = model_dir
+        self.batch_size = batch_size
+
+        options = ort.SessionOptions()
+        # 0 = onnxruntime varsayılanı (fiziksel çekirdek sayısı)
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self._tokenizer.enable_truncation(max_length=max_seq_length)
+        self._tokenizer.enable_padding()
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self._session.run(None, feeds)[0]  # (batch, seq, dim)
+
+        # Mean pooling (padding token'ları hariç)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts into an (n, dim) float32 matrix of unit vectors."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # Benzer uzunluktaki metinleri aynı batch'e koy: daha az padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self._encode_batch([texts[i] for i in batch])
+            if vectors is None:
+                vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            vectors[batch] = encoded
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.encode([text])[0].tolist()
+
+
+def create_onnx_embeddings(model_name: str) -> OnnxEmbeddings:
+    """Create the ONNX engine configured in Settings."""
+    model_dir = Path(settings.onnx_model_dir) if settings.onnx_model_dir else default_model_dir(model_name)
+    return OnnxEmbeddings(
+        model_dir,
+        intra_op_threads=settings.onnx_intra_op_threads,
+        batch_size=settings.onnx_batch_size,
+        max_seq_length=settings.onnx_max_seq_length,
+    )
+
+
+def export_model(model_name: str, model_dir: Path, max_seq_length: int = 128) -> Path:
+    """
+    Export a sentence-transformers model to ONNX and quantize it to int8.
+
+    Needs torch, transformers and onnx (export time only, not at runtime).
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(
+        SAMPLE_TEXTS[:2], padding=True, truncation=True,
+        max_length=max_seq_length, return_tensors="pt",
+    )
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = model_dir / FP32_MODEL_FILE
+    print(f"🔄 Exporting {model_name} to ONNX...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    int8_path = model_dir / MODEL_FILE
+    print("🔄 Quantizing weights to int8...")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(str(model_dir / TOKENIZER_FILE))
+
+    size_mb = int8_path.stat().st_size / 1e6
+    print(f"✅ Exported {int8_path} ({size_mb:.1f} MB, fp32: {fp32_path.stat().st_size / 1e6:.1f} MB)")
+    return int8_path
+
+
+def load_sample_texts(data_dir: Path, limit: int = 200) -> list[str]:
+    """Paragraphs from the knowledge base, used as realistic check inputs."""
+    texts = []
+    for path in sorted(data_dir.glob("*.md")) + sorted(data_dir.glob("*.txt")):
+        for paragraph in path.read_text(encoding="utf-8").split("\n\n"):
+            paragraph = paragraph.strip()
+            if len(paragraph) > 20:
+                texts.append(paragraph)
+    return (texts or SAMPLE_TEXTS)[:limit]
+
+
+def verify_against_reference(
+    engine: OnnxEmbeddings,
+    model_name: str,
+    texts: list[str],
+    min_cosine: float,
+) -> dict:
+    """
+    Compare ONNX vectors with the full-precision sentence-transformers model.
+
+    Returns:
+        Report with min/mean cosine similarity and whether every text
+        reached ``min_cosine``.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu").encode(
+        texts, normalize_embeddings=True, convert_to_numpy=True
+    )
+    candidate = engine.encode(texts)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "texts": len(texts),
+        "min_cosine": round(float(cosines.min()), 5),
+        "mean_cosine": round(float(cosines.mean()), 5),
+        "threshold": min_cosine,
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export / verify the ONNX embedding engine")
+    parser.add_argument("--model", default=settings.embedding_model, help="sentence-transformers model")
+    parser.add_argument("--dir", type=str, help="Output / model directory")
+    parser.add_argument("--export", action="store_true", help="Export and quantize the model")
+    parser.add_argument("--verify", action="store_true", help="Check cosine tolerance vs. reference")
+    parser.add_argument("--min-cosine", type=float, default=settings.onnx_min_cosine)
+    args = parser.parse_args()
+
+    model_dir = Path(args.dir) if args.dir else default_model_dir(args.model)
+
+    if args.export:
+        export_model(args.model, model_dir, settings.onnx_max_seq_length)
+
+    if args.verify:
+        engine = OnnxEmbeddings(
+            model_dir,
+            intra_op_threads=settings.onnx_intra_op_threads,
+            max_seq_length=settings.onnx_max_seq_length,
+        )
+        texts = load_sample_texts(Path(__file__).parent.parent / "data")
+        report = verify_against_reference(engine, args.model, texts, args.min_cosine)
+        print(f"\n📊 ONNX vs. reference ({report['texts']} texts)")
+        print(f"   min cosine:  {report['min_cosine']}")
+        print(f"   mean cosine: {report['mean_cosine']}")
+        if report["passed"]:
+            print(f"✅ All vectors within tolerance (>= {args.min_cosine})")
+        else:
+            print(f"❌ Vectors below tolerance (< {args.min_cosine})")
+            sys.exit(1)
@@ -0,0 +1,265 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Token-budget-aware prompt assembly
+
+Sistem prompt'u (persona) sabit ve önceden hesaplanmış bir önek olarak tutulur;
+böylece upstream prompt caching her istekte aynı byte'larla eşleşebilir.
+Aynı kaynaktan gelen ardışık/örtüşen chunk'lar birleştirilir, context ve
+konuşma geçmişi yapılandırılabilir bir token bütçesine sığdırılır.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Optional
+from config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Static persona: hiçbir isteğe göre değişmez, prompt'un ilk byte'larıdır
+SYSTEM_PERSONA = """Sen Luxivolt Mühendislik'in uzman teknik satış asistanısın.
+
+    KİMLİK VE TON:
+    - Tonun profesyonel, güven verici, kurumsal ve yardımsever olmalı.
+    - Luxivolt Mühendislik adına konuştuğunu unutma.
+    - Yanıtlarını her zaman temiz ve okunabilir Markdown formatında ver.
+
+    GÖREVLERİN:
+    1. Kullanıcıların teknik sorularını, aşağıda sağlanan "Referans Bilgiler" ışığında yanıtla.
+    2. Konuşmanın gidişatını analiz et; eğer kullanıcı bir projeden, ihaleden veya satın alma niyetinden bahsediyorsa:
+       - Nazikçe iletişim bilgilerini (Ad, Telefon, E-posta) iste.
+       - Proje detaylarını (Konum, Güç, Kapsam vb.) öğrenmeye çalış.
+       - Amacın, satış ekibine iletilecek bir "Teklif Taslağı" oluşturmak için veri toplamaktır.
+
+    KURALLAR:
+    1. SADECE verilen referans bilgileri kullan. Dışarıdan bilgi uydurma.
+    2. Eğer sorunun cevabı referans bilgilerde YOKSA:
+       "Bu teknik detay hakkında size en doğru bilgiyi verebilmek için uzman mühendislerimizle görüşmenizi öneririm. Dilerseniz iletişim bilgilerinizi bırakın, sizi arayalım." şeklinde yanıt ver.
+    3. Asla "bilgi yok" deme, her zaman profesyonel bir yönlendirme yap.
+    4. Cevabın dilini, kullanıcının diliyle (varsayılan Türkçe) eşleştir."""
+
+CONTEXT_HEADER = "\n\n### Referans Bilgiler (Context):\n"
+NO_CONTEXT_NOTICE = (
+    "\n\nUYARI: Şu an referans bilgi bulunamadı. Genel kurumsal nezaketle yanıt ver "
+    "ve kullanıcıyı detaylı bilgi için iletişime yönlendir."
+)
+QUESTION_FOOTER = "\n\n### Müşteri Sorusu:\n"
+
+# Precomputed system prompt when no context was retrieved
+SYSTEM_PROMPT_NO_CONTEXT = SYSTEM_PERSONA + NO_CONTEXT_NOTICE + QUESTION_FOOTER
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(encoding_name: str) -> Callable[[str], int]:
+    """
+    Return a token counting function.
+
+    Uses tiktoken when available; otherwise falls back to a conservative
+    character heuristic (~3 characters per token for Turkish text).
+    """
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"⚠️ tiktoken unavailable ({e}), using heuristic token counts")
+        return lambda text: math.ceil(len(text) / 3)
+
+
+def parse_chunk_id(chunk_id: str) -> Optional[tuple[str, int]]:
+    """
+    Split a chunk ID ``<source>::<content hash>::<ordinal>`` into
+    (file key, ordinal). Returns None for IDs in another format.
+    """
+    file_key, sep, ordinal = chunk_id.rpartition("::")
+    if not sep or not ordinal.isdigit():
+        return None
+    return file_key, int(ordinal)
+
+
+def merge_overlapping(first: str, second: str, max_overlap: int) -> str:
+    """Join two consecutive chunks, dropping the text they share."""
+    limit = min(len(first), len(second), max_overlap)
+    for size in range(limit, 0, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+@dataclass
+class ContextBlock:
+    """One or more merged chunks of a single source."""
+    source: str
+    content: str
+    score: float
+    chunk_ids: list[str] = field(default_factory=list)
+    # Near-duplicate chunks are stored once but may come from several files
+    sources: list[str] = field(default_factory=list)
+
+
+def merge_chunks(results: list[dict], max_overlap: int) -> list[ContextBlock]:
+    """
+    Merge adjacent chunks of the same file into contiguous blocks.
+
+    Blocks keep the relevance order of their best chunk.
+    """
+    blocks: list[ContextBlock] = []
+    # (file key) -> [(ordinal, block)] blocks that can still be extended
+    by_file: dict[str, list[tuple[int, int, ContextBlock]]] = {}
+
+    for result in sorted(results, key=lambda r: parse_chunk_id(r["id"]) or ("", 0)):
+        position = parse_chunk_id(result["id"])
+        if position is not None:
+            file_key, ordinal = position
+            candidates = by_file.setdefault(file_key, [])
+            if candidates and candidates[-1][1] == ordinal - 1:
+                first, _, block = candidates[-1]
+                block.content = merge_overlapping(block.content, result["content"], max_overlap)
+                block.score = max(block.score, result["score"])
+                block.chunk_ids.append(result["id"])
+                block.sources += [s for s in result.get("sources", []) if s not in block.sources]
+                candidates[-1] = (first, ordinal, block)
+                continue
+        block = ContextBlock(
+            source=result["source"],
+            content=result["content"],
+            score=result["score"],
+            chunk_ids=[result["id"]],
+            sources=list(result.get("sources", [result["source"]])),
+        )
+        blocks.append(block)
+        if position is not None:
+            by_file[position[0]].append((position[1], position[1], block))
+
+    blocks.sort(key=lambda b: b.score, reverse=True)
+    return blocks
+
+
+@dataclass
+class AssembledPrompt:
+    """Messages sent to the LLM plus what went into them."""
+    messages: list[dict]
+    context: str
+    sources: list[str]
+    stats: dict
+
+
+class PromptBuilder:
+    """
+    Fit the persona, retrieved context and chat history into a token budget.
+
+    Priority: persona and current question (always), then context blocks in
+    relevance order, then history from newest to oldest.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 3000,
+        history_max_messages: int = 8,
+        history_reserve_tokens: int = 400,
+        chunk_overlap: int = 100,
+        encoding_name: str = "cl100k_base",
+    ):
+        self.token_budget = token_budget
+        self.history_max_messages = history_max_messages
+        self.history_reserve_tokens = history_reserve_tokens
+        self.chunk_overlap = chunk_overlap
+        self.count_tokens = get_token_counter(encoding_name)
+        # Sabit parçaların token sayıları bir kez hesaplanır
+        self._persona_tokens = self.count_tokens(SYSTEM_PERSONA + CONTEXT_HEADER + QUESTION_FOOTER)
+        self._no_context_tokens = self.count_tokens(SYSTEM_PROMPT_NO_CONTEXT)
+
+    def _message_tokens(self, content: str) -> int:
+        return self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(
+        self,
+        message: str,
+        history: list[dict],
+        results: list[dict],
+    ) -> AssembledPrompt:
+        """
+        Assemble the messages for one chat turn.
+
+        Args:
+            message: Current user message
+            history: Previous messages as ``{"role", "content"}`` dicts
+            results: Retrieved chunks (``RAGService.search`` results)
+        """
+        question_tokens = self._message_tokens(message)
+        remaining = self.token_budget - question_tokens - MESSAGE_OVERHEAD_TOKENS
+
+        # Context: en alakalı bloktan başlayarak, geçmiş için pay bırakarak doldur
+        blocks = merge_chunks(results, self.chunk_overlap)
+        context_budget = remaining - self._persona_tokens - (
+            self.history_reserve_tokens if history else 0
+        )
+        parts, sources, context_tokens = [], [], 0
+        for block in blocks:
+            part = f"- {block.content}"
+            tokens = self.count_tokens(part) + 1
+            if context_tokens + tokens > context_budget:
+                continue
+            parts.append(part)
+            context_tokens += tokens
+            for source in block.sources or [block.source]:
+                if source not in sources:
+                    sources.append(source)
+
+        context = "\n\n".join(parts)
+        if context:
+            system_prompt = SYSTEM_PERSONA + CONTEXT_HEADER + context + QUESTION_FOOTER
+            remaining -= self._persona_tokens + context_tokens
+        else:
+            system_prompt = SYSTEM_PROMPT_NO_CONTEXT
+            remaining -= self._no_context_tokens
+
+        # History: en yeni mesajdan geriye doğru, bütçe bitene kadar
+        kept: list[dict] = []
+        for msg in reversed(history[-self.history_max_messages:] if self.history_max_messages else []):
+            tokens = self._message_tokens(msg["content"])
+            if tokens > remaining:
+                break
+            kept.append({"role": msg["role"], "content": msg["content"]})
+            remaining -= tokens
+        kept.reverse()
+
+        messages = [{"role": "system", "content": system_prompt}, *kept]
+        messages.append({"role": "user", "content": message})
+        return AssembledPrompt(
+            messages=messages,
+            context=context,
+            sources=sources,
+            stats={
+                "prompt_tokens": self.token_budget - remaining,
+                "context_tokens": context_tokens,
+                "chunks": len(results),
+                "context_blocks": len(parts),
+                "history_messages": len(kept),
+                "history_dropped": len(history) - len(kept),
+            },
+        )
+
+
+# Global instance
+_prompt_builder: Optional[PromptBuilder] = None
+
+
+def get_prompt_builder(settings: Optional[Settings] = None) -> PromptBuilder:
+    """Get the global prompt builder instance."""
+    global _prompt_builder
+    if _prompt_builder is None:
+        settings = settings or get_settings()
+        _prompt_builder = PromptBuilder(
+            token_budget=settings.prompt_token_budget,
+            history_max_messages=settings.prompt_history_max_messages,
+            history_reserve_tokens=settings.prompt_history_reserve_tokens,
+            chunk_overlap=settings.chunk_overlap,
+            encoding_name=settings.prompt_token_encoding,
+        )
+    return _prompt_builder
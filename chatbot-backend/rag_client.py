@@ -0,0 +1,326 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Client of the shared RAG server (RAG_MODE=remote)
+
+Birden fazla uvicorn worker'ı çalışırken her worker kendi embedding modelini
+ve vektör deposunu yüklemez; hepsi rag_server.py sürecine Unix socket
+üzerinden bağlanır. Model ve indeks bellekte tek kopya olarak durur, farklı
+worker'lardan gelen sorgular sunucudaki micro-batcher'da aynı forward pass'i
+paylaşır.
+
+Wire format: her mesaj 4 byte'lık big-endian uzunluk + UTF-8 JSON gövdesi.
+İstek {"op": ..., **params}, yanıt {"ok": true, "result": ..., "index_version": n}
+veya {"ok": false, "error": "...", "error_type": "..."}.
+"""
+
+import asyncio
+import json
+import logging
+import socket
+import struct
+import time
+from pathlib import Path
+from typing import Any, Optional
+import numpy as np
+from config import get_settings
+from metrics import record_error, timed
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = Path(__file__).parent / "rag_server.sock"
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class RAGServerError(RuntimeError):
+    """The RAG server is unreachable, timed out or failed the request."""
+
+
+def socket_path() -> Path:
+    return Path(settings.rag_server_socket) if settings.rag_server_socket else DEFAULT_SOCKET_PATH
+
+
+def _to_json(value: Any):
+    # numpy skorları / Path'ler JSON'a çevrilebilsin
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, ensure_ascii=False, default=_to_json).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    """Read one message; raises ``asyncio.IncompleteReadError`` on EOF."""
+    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame too large: {length} bytes")
+    return json.loads(await reader.readexactly(length))
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            raise ConnectionError("RAG server closed the connection")
+        data.extend(part)
+    return bytes(data)
+
+
+def recv_frame(sock: socket.socket) -> dict:
+    """Blocking counterpart of ``read_frame``."""
+    (length,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame too large: {length} bytes")
+    return json.loads(_recv_exactly(sock, length))
+
+
+class RemoteRAGService:
+    """
+    Drop-in replacement of ``RAGService`` backed by the shared RAG server.
+
+    Implements the part of the ``RAGService`` interface the API uses. Async
+    calls reuse a small pool of persistent connections; blocking calls
+    (indexing, stats, warm-up) open a connection per call and, during
+    start-up, wait for the server to come up.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        timeout: float = settings.rag_server_timeout,
+        connect_timeout: float = settings.rag_server_connect_timeout,
+        pool_size: int = settings.rag_client_pool_size,
+    ):
+        self.socket_path = path or socket_path()
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+
+        # Sunucudaki değerlerin yansıması; her yanıtla güncellenir
+        self.index_version = 0
+        self.last_index_report: dict = {}
+        self.last_load_stats: dict = {}
+
+        # Boştaki kalıcı bağlantılar (yalnızca bir event loop'a ait olabilir)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Stats
+        self.requests = 0
+        self.errors = 0
+        self.reconnects = 0
+
+    def _unwrap(self, op: str, response: dict):
+        if "index_version" in response:
+            self.index_version = response["index_version"]
+        if not response.get("ok"):
+            if response.get("error_type") == "ValueError":
+                # Geçersiz parametre (ör. çok fazla sorgu): yerel servisle aynı hata
+                raise ValueError(response.get("error"))
+            raise RAGServerError(f"{op}: {response.get('error_type', 'Error')}: {response.get('error')}")
+        return response["result"]
+
+    # --- async (request path) ---
+
+    async def _connect(self) -> tuple[tuple[asyncio.StreamReader, asyncio.StreamWriter], bool]:
+        """Return an idle pooled connection or a new one, and whether it was reused."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Başka bir loop'un bağlantıları burada kullanılamaz
+            self._loop = loop
+            self._idle = []
+        if self._idle:
+            return self._idle.pop(), True
+        connection = await asyncio.wait_for(
+            asyncio.open_unix_connection(str(self.socket_path), limit=MAX_FRAME_BYTES),
+            self.timeout,
+        )
+        return connection, False
+
+    def _release(self, connection: tuple[asyncio.StreamReader, asyncio.StreamWriter]) -> None:
+        if len(self._idle) < self.pool_size:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def _arequest(self, op: str, **params):
+        self.requests += 1
+        message = encode_frame({"op": op, **params})
+        with timed("rag_rpc"):
+            # Havuzdaki bağlantılar sunucu yeniden başladıysa kopmuş olabilir: yeni bağlantıyla tekrar dene
+            while True:
+                connection, reused = None, False
+                try:
+                    connection, reused = await self._connect()
+                    reader, writer = connection
+                    writer.write(message)
+                    await writer.drain()
+                    response = await asyncio.wait_for(read_frame(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, FileNotFoundError) as e:
+                    if connection is not None:
+                        connection[1].close()
+                    if reused:
+                        self.reconnects += 1
+                        continue
+                    self.errors += 1
+                    raise RAGServerError(f"{op}: RAG server unreachable at {self.socket_path} ({e})") from e
+                except asyncio.TimeoutError as e:
+                    # Yanıtı gelmemiş bağlantı tekrar kullanılamaz
+                    if connection is not None:
+                        connection[1].close()
+                    self.errors += 1
+                    raise RAGServerError(f"{op}: RAG server timed out after {self.timeout}s") from e
+                except BaseException:
+                    # İptal (istemci koptu, single-flight): yarım okunmuş bir frame kalmış olabilir
+                    if connection is not None:
+                        connection[1].close()
+                    raise
+                self._release(connection)
+                return self._unwrap(op, response)
+
+    async def asearch(
+        self,
+        query: str,
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[dict]:
+        """Search on the RAG server; returns [] if it is unavailable (like a local search error)."""
+        try:
+            return await self._arequest(
+                "search", query=query, k=k, score_threshold=score_threshold, adaptive_k=adaptive_k
+            )
+        except RAGServerError as e:
+            logger.warning(f"⚠️ RAG server search error: {e}")
+            record_error("rag_server", e)
+            return []
+
+    async def asearch_many(
+        self,
+        queries: list[str],
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[list[dict]]:
+        """Batch search on the RAG server (see ``RAGService.search_many``)."""
+        try:
+            return await self._arequest(
+                "search_many", queries=queries, k=k, score_threshold=score_threshold, adaptive_k=adaptive_k
+            )
+        except RAGServerError as e:
+            logger.warning(f"⚠️ RAG server search error: {e}")
+            record_error("rag_server", e)
+            return [[] for _ in queries]
+
+    async def aembed_query(self, query: str) -> list[float]:
+        """Encode a query on the RAG server (cached and micro-batched there)."""
+        return await self._arequest("embed", query=query)
+
+    # --- blocking (start-up, admin endpoints, worker threads) ---
+
+    def _request(self, op: str, timeout: Optional[float] = None, wait_for_server: bool = False, **params):
+        """
+        Send one request over a fresh connection.
+
+        Args:
+            timeout: Seconds to wait for the reply (None = no limit, e.g. indexing)
+            wait_for_server: Retry connecting for up to ``connect_timeout`` seconds
+                while the server is still starting
+        """
+        self.requests += 1
+        deadline = time.monotonic() + (self.connect_timeout if wait_for_server else 0)
+        delay = 0.1
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.socket_path))
+                break
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                sock.close()
+                if time.monotonic() + delay > deadline:
+                    self.errors += 1
+                    raise RAGServerError(f"{op}: RAG server unreachable at {self.socket_path} ({e})") from e
+                if delay == 0.1:
+                    logger.info(f"⏳ Waiting for the RAG server at {self.socket_path}...")
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+        try:
+            sock.settimeout(timeout)
+            sock.sendall(encode_frame({"op": op, **params}))
+            response = recv_frame(sock)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            raise RAGServerError(f"{op}: {type(e).__name__}: {e}") from e
+        finally:
+            sock.close()
+        return self._unwrap(op, response)
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[dict]:
+        return self._request(
+            "search", timeout=self.timeout,
+            query=query, k=k, score_threshold=score_threshold, adaptive_k=adaptive_k,
+        )
+
+    def get_context_for_query(self, query: str, k: int = 4) -> str:
+        return self._request("context", timeout=self.timeout, query=query, k=k)
+
+    def index_documents(
+        self,
+        force_reindex: bool = False,
+        embedding_model: Optional[str] = None,
+        full_rebuild: bool = False,
+    ) -> int:
+        """Index on the RAG server; waits for the server if it is still starting."""
+        result = self._request(
+            "index", timeout=None, wait_for_server=True,
+            force_reindex=force_reindex, embedding_model=embedding_model, full_rebuild=full_rebuild,
+        )
+        self.last_index_report = result["changes"]
+        self.last_load_stats = result["load"]
+        return result["chunk_count"]
+
+    def start_reindex(self, full_rebuild: bool = False, wait: bool = False) -> dict:
+        """Start a background reindex on the RAG server; returns its status."""
+        return self._request(
+            "reindex", timeout=None if wait else self.timeout, full_rebuild=full_rebuild, wait=wait
+        )
+
+    def get_index_status(self) -> dict:
+        return self._request("index_status", timeout=self.timeout)
+
+    def warm_up(self) -> float:
+        """Measure one search round trip (the server warmed its model at start-up)."""
+        started = time.perf_counter()
+        self._request("warm_up", timeout=self.connect_timeout, wait_for_server=True)
+        return time.perf_counter() - started
+
+    def get_stats(self) -> dict:
+        try:
+            stats = self._request("stats", timeout=self.timeout)
+        except RAGServerError as e:
+            stats = {"error": str(e)}
+        return {
+            **stats,
+            "rag_mode": "remote",
+            "client": {
+                "socket": str(self.socket_path),
+                "requests": self.requests,
+                "errors": self.errors,
+                "reconnects": self.reconnects,
+                "idle_connections": len(self._idle),
+            },
+        }
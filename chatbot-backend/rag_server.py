@@ -0,0 +1,237 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Shared RAG server for multi-worker deployments
+
+Embedding modelini ve vektör indeksini tek bir süreçte tutar; uvicorn
+worker'ları (RAG_MODE=remote) Unix socket üzerinden arama / embedding ister.
+Worker sayısı arttıkça model belleği çoğalmaz. Farklı worker'lardan aynı anda
+gelen sorgular EmbeddingBatcher'da tek forward pass'te birleşir.
+
+Kullanım:
+    python rag_server.py                      # model + indeks yüklenir, socket dinlenir
+    RAG_MODE=remote uvicorn main:app --workers 4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from functools import partial
+from pathlib import Path
+from typing import Optional
+from config import get_settings
+from rag_client import MAX_FRAME_BYTES, encode_frame, read_frame, socket_path
+from rag_service import RAGService
+from reindexer import BackgroundReindexer
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class RAGServer:
+    """
+    Serves one ``RAGService`` to many API workers over a Unix socket.
+
+    Each connection handles one request at a time (clients pool their
+    connections); connections are served concurrently, so searches from all
+    workers share the service's micro-batcher and thread pool. Reindexing
+    runs in the background on a new index generation (one build at a time).
+    """
+
+    def __init__(self, rag: RAGService, path: Path):
+        self.rag = rag
+        self.path = path
+        self.reindexer = BackgroundReindexer(rag)
+        self._index_lock = asyncio.Lock()
+        self._handlers = {
+            "ping": self._ping,
+            "search": self._search,
+            "search_many": self._search_many,
+            "embed": self._embed,
+            "context": self._context,
+            "index": self._index,
+            "reindex": self._reindex,
+            "index_status": self._index_status,
+            "warm_up": self._warm_up,
+            "stats": self._stats,
+        }
+
+        # Stats
+        self.started = time.time()
+        self.connections = 0
+        self.active_connections = 0
+        self.requests: dict[str, int] = {}
+        self.errors = 0
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.rag._executor, partial(fn, *args, **kwargs))
+
+    async def _ping(self) -> dict:
+        return {"pid": os.getpid()}
+
+    async def _search(self, query: str, k: int = 4, score_threshold=None, adaptive_k=None) -> list[dict]:
+        return await self.rag.asearch(query, k=k, score_threshold=score_threshold, adaptive_k=adaptive_k)
+
+    async def _search_many(
+        self, queries: list[str], k: int = 4, score_threshold=None, adaptive_k=None
+    ) -> list[list[dict]]:
+        return await self.rag.asearch_many(queries, k=k, score_threshold=score_threshold, adaptive_k=adaptive_k)
+
+    async def _embed(self, query: str) -> list[float]:
+        return await self.rag.aembed_query(query)
+
+    async def _context(self, query: str, k: int = 4) -> str:
+        return await self._run_blocking(self.rag.get_context_for_query, query, k)
+
+    async def _index(self, force_reindex: bool = False, embedding_model: Optional[str] = None,
+                     full_rebuild: bool = False) -> dict:
+        if force_reindex or full_rebuild or embedding_model:
+            # Canlı indeks (ve modeli) yerinde değiştirilmez: yeni jenerasyon + swap
+            status = await self._reindex(full_rebuild=full_rebuild, wait=True, embedding_model=embedding_model)
+            if status["state"] == "failed":
+                raise RuntimeError(status["error"])
+            return {"chunk_count": status["chunk_count"], "changes": status["changes"], "load": status["load"]}
+        # Birden fazla worker aynı anda warm-up çağırabilir
+        async with self._index_lock:
+            chunk_count = await asyncio.to_thread(self.rag.index_documents, force_reindex=False)
+        return {
+            "chunk_count": chunk_count,
+            "changes": self.rag.last_index_report,
+            "load": self.rag.last_load_stats,
+        }
+
+    async def _reindex(self, full_rebuild: bool = False, wait: bool = False,
+                       embedding_model: Optional[str] = None) -> dict:
+        status = self.reindexer.start(full_rebuild=full_rebuild, embedding_model=embedding_model)
+        if wait:
+            status = await self.reindexer.wait()
+        return status
+
+    async def _index_status(self) -> dict:
+        return self.reindexer.get_status()
+
+    async def _warm_up(self) -> float:
+        return await self._run_blocking(self.rag.warm_up)
+
+    async def _stats(self) -> dict:
+        stats = await self._run_blocking(self.rag.get_stats)
+        return {
+            **stats,
+            "server": {
+                "pid": os.getpid(),
+                "socket": str(self.path),
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "connections": self.connections,
+                "active_connections": self.active_connections,
+                "requests": self.requests,
+                "errors": self.errors,
+            },
+        }
+
+    async def _dispatch(self, message: dict) -> dict:
+        op = message.pop("op", None)
+        handler = self._handlers.get(op)
+        self.requests[op] = self.requests.get(op, 0) + 1
+        if handler is None:
+            self.errors += 1
+            return {"ok": False, "error": f"Unknown op: {op!r}", "error_type": "ValueError"}
+        try:
+            result = await handler(**message)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ RAG server {op} error: {e}")
+            return {"ok": False, "error": str(e), "error_type": type(e).__name__}
+        return {"ok": True, "result": result, "index_version": self.rag.index_version}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.active_connections += 1
+        try:
+            while True:
+                try:
+                    message = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                writer.write(encode_frame(await self._dispatch(message)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
+
+    async def serve(self) -> None:
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=str(self.path), limit=MAX_FRAME_BYTES
+        )
+        # Yalnızca aynı kullanıcı / grup (API worker'ları) bağlanabilir
+        os.chmod(self.path, 0o660)
+        logger.info(f"🔌 RAG server listening on {self.path} (pid {os.getpid()})")
+        # SIGTERM (systemd / docker stop) da düzgün kapanış yapsın, socket dosyası silinsin
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        if settings.reindex_watch:
+            self.reindexer.start_watcher()
+        async with server:
+            await stop.wait()
+        await self.reindexer.stop()
+
+
+def claim_socket(path: Path) -> None:
+    """Remove a stale socket file; fail if another server is still listening on it."""
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        path.unlink(missing_ok=True)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"Another RAG server is already listening on {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared RAG server (one model + index for all API workers)")
+    parser.add_argument("--socket", type=str, help="Unix socket path (default: RAG_SERVER_SOCKET)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on this port (0 = off)")
+    parser.add_argument("--no-index", action="store_true", help="Skip the start-up index sync")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=settings.log_level.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    path = Path(args.socket) if args.socket else socket_path()
+    claim_socket(path)
+    if args.metrics_port:
+        # Embedding / arama aşama metrikleri bu süreçte oluşur
+        from prometheus_client import start_http_server
+        start_http_server(args.metrics_port)
+        logger.info(f"📈 Metrics on :{args.metrics_port}/metrics")
+
+    started = time.perf_counter()
+    rag = RAGService()
+    chunk_count = rag.store.count() if args.no_index else rag.index_documents(force_reindex=False)
+    warmup_seconds = rag.warm_up()
+    logger.info(
+        f"📚 RAG server ready with {chunk_count} indexed chunks "
+        f"({time.perf_counter() - started:.1f}s, warm-up {warmup_seconds * 1000:.0f}ms)"
+    )
+
+    try:
+        asyncio.run(RAGServer(rag, path).serve())
+    finally:
+        path.unlink(missing_ok=True)
+        logger.info("👋 RAG server stopped")
+
+
+if __name__ == "__main__":
+    main()
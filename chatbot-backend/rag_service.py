@@ -5,27 +5,125 @@ RAG (Retrieval-Augmented Generation) Service
 Bu modül dökümanları yükler, parçalara ayırır ve ChromaDB'ye kaydeder.
 """
 
+import asyncio
+import json
+import logging
 import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Optional
-from langchain_community.document_loaders import (
-    DirectoryLoader,
-    TextLoader,
-    PyPDFLoader,
-    UnstructuredMarkdownLoader,
-)
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import numpy as np
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
 from langchain.schema import Document
+from cache import LRUCache, normalize_query
 from config import get_settings
+from dedup import SIGNATURE_VERSION, DedupStats, NearDuplicateIndex
+from document_pipeline import (
+    LOADERS,
+    LoadStats,
+    file_hash,
+    iter_processed_files,
+    list_source_files,
+    load_file,
+    make_text_splitter,
+    source_name,
+)
+from embedding_batcher import EmbeddingBatcher
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from metrics import (
+    INDEX_CHUNKS,
+    INDEX_DEDUP_RATIO,
+    INDEX_DURATION,
+    INDEX_FILES,
+    INDEX_LAST_DURATION,
+    record_cache,
+    record_error,
+    timed,
+)
+from vector_store import VectorStore, create_vector_store
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 CHROMA_DIR = Path(__file__).parent / "chroma_db"
+MANIFEST_NAME = "index_manifest.json"
+DEDUP_SIGNATURES_NAME = "dedup_signatures.npz"
+# Live reindex: each background build goes to chroma_dir/generations/<name>,
+# CURRENT names the generation queries use
+GENERATIONS_DIR = "generations"
+CURRENT_POINTER = "CURRENT"
+# Near-duplicate chunks are stored once; their "sources" metadata lists every
+# file that contains them (Chroma metadata values must be scalars)
+SOURCES_SEPARATOR = "|"
+
+
+def primary_source(chunk_id: str, owners: set[str]) -> str:
+    """
+    Source shown for a shared chunk: the file that embedded it (ID format
+    ``<source>::<hash>::<ordinal>``) while it still contains it, otherwise
+    the first remaining file.
+    """
+    source = chunk_id.rsplit("::", 2)[0]
+    return source if source in owners or not owners else min(owners)
+
+
+def format_hit(hit: dict, retrieval: str = "vector") -> dict:
+    """Convert a vector store / lexical index hit into a search result."""
+    source = hit["metadata"].get("source", "unknown")
+    sources = hit["metadata"].get("sources")
+    return {
+        "id": hit["id"],
+        "content": hit["content"],
+        "source": source,
+        "sources": sources.split(SOURCES_SEPARATOR) if sources else [source],
+        "file_type": hit["metadata"].get("file_type", "unknown"),
+        "score": round(hit["score"], 4),
+        "retrieval": retrieval,
+    }
+
+
+def apply_adaptive_k(
+    results: list[dict],
+    max_drop: Optional[float] = None,
+    max_gap: Optional[float] = None,
+) -> list[dict]:
+    """
+    Truncate score-sorted results where relevance drops off.
+    
+    A result is dropped (with everything after it) when its score is more than
+    ``max_drop`` below the best score, or more than ``max_gap`` below the
+    previous result. The best result is always kept.
+    """
+    max_drop = settings.rag_adaptive_k_max_drop if max_drop is None else max_drop
+    max_gap = settings.rag_adaptive_k_max_gap if max_gap is None else max_gap
+    if not results:
+        return results
+    
+    best = results[0]["score"]
+    kept = [results[0]]
+    for result in results[1:]:
+        if best - result["score"] > max_drop or kept[-1]["score"] - result["score"] > max_gap:
+            break
+        kept.append(result)
+    return kept
+
+
+def drop_far_below_best(results: list[dict]) -> list[dict]:
+    """Adaptive-k for results not ordered by score (hybrid / lexical ranking)."""
+    if not results:
+        return results
+    best = max(result["score"] for result in results)
+    return [
+        result for result in results
+        if best - result["score"] <= settings.rag_adaptive_k_max_drop
+    ]
 
 
 class RAGService:
@@ -41,95 +139,291 @@ class RAGService:
         data_dir: Path = DATA_DIR,
         chroma_dir: Path = CHROMA_DIR,
         collection_name: str = "luxivolt_docs",
-        chunk_size: int = 500,
-        chunk_overlap: int = 100,
+        chunk_size: int = settings.chunk_size,
+        chunk_overlap: int = settings.chunk_overlap,
+        embedding_model: str = settings.embedding_model,
+        separators: str = settings.chunk_separators,
+        embeddings=None,  # reuse an already loaded model (evaluation sweeps)
+        index_dir: Optional[Path] = None,  # build into this exact directory (background reindex)
     ):
         self.data_dir = data_dir
         self.chroma_dir = chroma_dir
+        # Sorguların kullandığı indeks: CURRENT'ın gösterdiği jenerasyon veya chroma_dir
+        self.index_dir = index_dir or self._current_index_dir()
+        self._last_generation = 0
+        # Swap ile devreden çıkan depolar: dizinleri silinmeden önce kapatılır
+        self._retired_stores: dict[Path, VectorStore] = {}
         self.collection_name = collection_name
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.separators = separators
+        
+        # Query embedding cache: normalized query text -> vector
+        self._embedding_cache = LRUCache(
+            max_size=settings.embedding_cache_size,
+            ttl=settings.embedding_cache_ttl,
+        )
         
         # Initialize embeddings (using free HuggingFace model)
         # multilingual model for Turkish support
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True},
-        )
+        if embeddings is not None:
+            self.embedding_model = embedding_model
+            self.embedding_engine = settings.embedding_engine
+            self.embeddings = embeddings
+        else:
+            self._load_embeddings(embedding_model)
         
         # Text splitter for chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""],
-        )
+        self.text_splitter = make_text_splitter(chunk_size, chunk_overlap, separators)
         
-        # Vector store (will be initialized on first use)
-        self._vectorstore: Optional[Chroma] = None
+        # Vector store backend (will be initialized on first use)
+        self.vector_backend = settings.vector_backend
+        self._store: Optional[VectorStore] = None
+        # BM25 index for hybrid retrieval (built from the vector store)
+        self._lexical: Optional[LexicalIndex] = None
+        self.lexical_fast_path_hits = 0
+        # Incremented on every (re)index; used to key downstream caches
+        self.index_version = 0
+        self.last_index_report: dict = {}
+        self.last_load_stats: dict = {}
+        self.index_progress: dict = {}
+        
+        # Bounded thread pool: embedding ve vektör arama event loop dışında çalışır
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.rag_executor_workers,
+            thread_name_prefix="rag",
+        )
+        self._batcher = EmbeddingBatcher(
+            embed_fn=lambda texts: self.embeddings.embed_documents(texts),
+            executor=self._executor,
+            max_batch_size=settings.embedding_max_batch_size,
+            max_wait_ms=settings.embedding_batch_window_ms,
+        )
+    
+    def _load_embeddings(self, model_name: str) -> None:
+        """Load the embedding model and invalidate cached query vectors."""
+        self.embedding_model = model_name
+        self.embedding_engine = settings.embedding_engine
+        if self.embedding_engine == "onnx":
+            # int8 kuantize ONNX modeli: PyTorch olmadan, daha hızlı CPU çıkarımı
+            from onnx_embeddings import create_onnx_embeddings
+            self.embeddings = create_onnx_embeddings(model_name)
+        elif self.embedding_engine == "torch":
+            self.embeddings = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={"device": "cpu"},
+                encode_kwargs={"normalize_embeddings": True},
+            )
+        else:
+            raise ValueError(
+                f"Unknown embedding engine: {self.embedding_engine!r} (expected 'torch' or 'onnx')"
+            )
+        # Eski modelin vektörleri yeni modelle uyumsuz
+        self._embedding_cache.clear()
     
     @property
-    def vectorstore(self) -> Chroma:
-        """Get or create the vector store."""
-        if self._vectorstore is None:
-            self._vectorstore = Chroma(
-                collection_name=self.collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=str(self.chroma_dir),
+    def store(self) -> VectorStore:
+        """Get or create the vector store backend selected in Settings."""
+        if self._store is None:
+            self._store = create_vector_store(
+                self.vector_backend, self.index_dir, self.collection_name
             )
-        return self._vectorstore
+        return self._store
+    
+    @property
+    def generations_dir(self) -> Path:
+        return self.chroma_dir / GENERATIONS_DIR
+    
+    def _current_index_dir(self) -> Path:
+        """Directory of the live index generation (chroma_dir before the first swap)."""
+        try:
+            name = (self.chroma_dir / CURRENT_POINTER).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return self.chroma_dir
+        return self.generations_dir / name if name else self.chroma_dir
+    
+    def list_generations(self) -> list[Path]:
+        """Index generation directories, oldest first."""
+        if not self.generations_dir.is_dir():
+            return []
+        return sorted(path for path in self.generations_dir.iterdir() if path.is_dir())
+    
+    def new_generation_dir(self) -> Path:
+        # Numaralar hep artar: silinen (başarısız) bir jenerasyonun adı tekrar kullanılmaz
+        numbers = [int(path.name.split("-")[-1]) for path in self.list_generations()]
+        self._last_generation = max([self._last_generation, *numbers]) + 1
+        return self.generations_dir / f"gen-{self._last_generation:06d}"
+    
+    def _seed_from(self, source: "RAGService") -> int:
+        """
+        Copy the chunks, vectors and manifest of another index into this one.
+        
+        Nothing is re-embedded; the following incremental sync only embeds
+        files that changed since ``source`` was built.
+        """
+        copied = 0
+        batch: list[tuple[str, str, dict]] = []
+        
+        def copy_batch() -> None:
+            vectors = source.store.get_embeddings([chunk_id for chunk_id, _, _ in batch])
+            self.store.upsert(
+                ids=[chunk_id for chunk_id, _, _ in batch],
+                embeddings=np.asarray(
+                    [vectors[chunk_id] for chunk_id, _, _ in batch], dtype=np.float32
+                ).tolist(),
+                documents=[content for _, content, _ in batch],
+                metadatas=[metadata for _, _, metadata in batch],
+            )
+            batch.clear()
+        
+        self.index_progress = {"chunks_seeded": 0}
+        for item in source.store.iter_documents():
+            batch.append(item)
+            copied += 1
+            if len(batch) >= settings.embed_batch_size:
+                copy_batch()
+                self.index_progress["chunks_seeded"] = copied
+        if batch:
+            copy_batch()
+        self.store.flush()
+        self.save_manifest(source.load_manifest())
+        signatures = source.index_dir / DEDUP_SIGNATURES_NAME
+        if signatures.exists():
+            shutil.copy2(signatures, self.index_dir / DEDUP_SIGNATURES_NAME)
+        return copied
+    
+    def create_generation(self, embedding_model: Optional[str] = None) -> "RAGService":
+        """
+        Create an empty index generation.
+        
+        Args:
+            embedding_model: Build the generation with another embedding model
+                (loaded next to the live one); by default the live model is shared.
+        """
+        switch = bool(embedding_model) and embedding_model != self.embedding_model
+        if switch:
+            logger.info(f"🔁 Building a generation with {embedding_model} (live: {self.embedding_model})")
+        return RAGService(
+            data_dir=self.data_dir,
+            chroma_dir=self.chroma_dir,
+            collection_name=self.collection_name,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            embedding_model=embedding_model if switch else self.embedding_model,
+            separators=self.separators,
+            embeddings=None if switch else self.embeddings,
+            index_dir=self.new_generation_dir(),
+        )
+    
+    def build_generation(self, builder: "RAGService", full_rebuild: bool = False) -> None:
+        """
+        Fill a generation from ``create_generation`` next to the live index (blocking).
+        
+        The live index keeps serving queries meanwhile. The new generation is
+        seeded from the live index (unless ``full_rebuild`` or the chunking /
+        model settings changed) and then synced with the data directory. A
+        failed build is deleted; pass a successful one to ``swap_index``.
+        """
+        try:
+            if not full_rebuild and self.load_manifest().get("settings") == builder._index_settings():
+                copied = builder._seed_from(self)
+                logger.info(f"🌱 Seeded {builder.index_dir.name} with {copied} chunks from {self.index_dir.name}")
+            builder.index_documents(force_reindex=True, full_rebuild=full_rebuild)
+        except BaseException:
+            builder.discard()
+            raise
+        finally:
+            builder._executor.shutdown(wait=False)
+    
+    def swap_index(self, builder: "RAGService") -> None:
+        """
+        Make a generation built by ``build_generation`` the live index.
+        
+        The CURRENT pointer is replaced atomically; searches already running
+        finish on the previous store, new ones use the new store. Only the
+        newest ``reindex_keep_generations`` generations are kept on disk.
+        """
+        pointer = self.chroma_dir / CURRENT_POINTER
+        tmp_pointer = pointer.with_suffix(".tmp")
+        tmp_pointer.write_text(builder.index_dir.name, encoding="utf-8")
+        os.replace(tmp_pointer, pointer)
+        
+        previous = self.index_dir
+        if self._store is not None:
+            self._retired_stores[previous] = self._store
+        if builder.embeddings is not self.embeddings:
+            # Jenerasyon başka bir modelle oluşturuldu: sorgular da o modelle embed edilmeli
+            # (önbellek anahtarı model adını içerir, eski vektörler karışmaz)
+            self.embeddings = builder.embeddings
+            self.embedding_model = builder.embedding_model
+            self.embedding_engine = builder.embedding_engine
+            self._embedding_cache.clear()
+        # Tek tek atama: aynı anda gelen arama ya eski ya yeni indeksi görür
+        self._store, self._lexical = builder.store, builder._lexical
+        self.index_dir = builder.index_dir
+        self.index_version += 1
+        self.last_index_report = builder.last_index_report
+        self.last_load_stats = builder.last_load_stats
+        self.index_progress = builder.index_progress
+        logger.info(f"🔀 Swapped live index: {previous.name} -> {builder.index_dir.name}")
+        self._prune_generations()
+    
+    def discard(self) -> None:
+        """Delete this service's index directory (a failed or retired generation)."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+    
+    def _prune_generations(self) -> None:
+        # Bir önceki jenerasyon tutulur: üzerinde hâlâ süren aramalar olabilir
+        keep = max(1, settings.reindex_keep_generations)
+        retired = [path for path in self.list_generations() if path != self.index_dir]
+        if self.index_dir != self.chroma_dir and (self.chroma_dir / MANIFEST_NAME).exists():
+            # İlk swap'tan önceki indeks doğrudan chroma_dir altında durur (en eski)
+            retired.insert(0, self.chroma_dir)
+        for path in retired[: max(0, len(retired) - (keep - 1))]:
+            store = self._retired_stores.pop(path, None)
+            if store is not None:
+                store.close()
+            if path == self.chroma_dir:
+                for entry in path.iterdir():
+                    if entry.name in (GENERATIONS_DIR, CURRENT_POINTER):
+                        continue
+                    if entry.is_dir():
+                        shutil.rmtree(entry, ignore_errors=True)
+                    else:
+                        entry.unlink(missing_ok=True)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"🧹 Removed old index generation: {path.name}")
+    
+    def list_source_files(self) -> list[Path]:
+        """List all supported document files in the data directory."""
+        return list_source_files(self.data_dir, recursive=settings.index_recursive)
+    
+    def load_file(self, path: Path) -> list[Document]:
+        """Load a single document file with the loader matching its extension."""
+        return load_file(path, self.data_dir)
     
     def load_documents(self) -> list[Document]:
         """
-        Load all documents from the data directory.
+        Load all documents from the data directory (in parallel).
         Supports: .md, .pdf, .txt files
         """
         all_documents = []
+        stats = LoadStats()
         
-        # Load Markdown files
-        md_files = list(self.data_dir.glob("*.md"))
-        for md_file in md_files:
-            try:
-                loader = UnstructuredMarkdownLoader(str(md_file))
-                docs = loader.load()
-                for doc in docs:
-                    doc.metadata["source"] = md_file.name
-                    doc.metadata["file_type"] = "markdown"
-                all_documents.extend(docs)
-                print(f"✅ Loaded: {md_file.name}")
-            except Exception as e:
-                print(f"❌ Error loading {md_file.name}: {e}")
-        
-        # Load PDF files
-        pdf_files = list(self.data_dir.glob("*.pdf"))
-        for pdf_file in pdf_files:
-            try:
-                loader = PyPDFLoader(str(pdf_file))
-                docs = loader.load()
-                for doc in docs:
-                    doc.metadata["source"] = pdf_file.name
-                    doc.metadata["file_type"] = "pdf"
-                all_documents.extend(docs)
-                print(f"✅ Loaded: {pdf_file.name}")
-            except Exception as e:
-                print(f"❌ Error loading {pdf_file.name}: {e}")
-        
-        # Load Text files
-        txt_files = list(self.data_dir.glob("*.txt"))
-        for txt_file in txt_files:
-            try:
-                loader = TextLoader(str(txt_file), encoding="utf-8")
-                docs = loader.load()
-                for doc in docs:
-                    doc.metadata["source"] = txt_file.name
-                    doc.metadata["file_type"] = "text"
-                all_documents.extend(docs)
-                print(f"✅ Loaded: {txt_file.name}")
-            except Exception as e:
-                print(f"❌ Error loading {txt_file.name}: {e}")
-        
-        print(f"\n📚 Total documents loaded: {len(all_documents)}")
+        for result in iter_processed_files(
+            self.list_source_files(),
+            self.data_dir,
+            workers=settings.index_workers,
+            stats=stats,
+        ):
+            all_documents.extend(result.documents)
+        
+        self.last_load_stats = stats.as_dict()
+        logger.info(f"📚 Total documents loaded: {len(all_documents)}")
         return all_documents
     
     def chunk_documents(self, documents: list[Document]) -> list[Document]:
@@ -137,96 +431,777 @@ class RAGService:
         Split documents into smaller chunks for better retrieval.
         """
         chunks = self.text_splitter.split_documents(documents)
-        print(f"📄 Created {len(chunks)} chunks from {len(documents)} documents")
+        logger.info(f"📄 Created {len(chunks)} chunks from {len(documents)} documents")
         return chunks
     
-    def index_documents(self, force_reindex: bool = False) -> int:
+    @property
+    def manifest_path(self) -> Path:
+        return self.index_dir / MANIFEST_NAME
+    
+    def _index_settings(self) -> dict:
+        """Settings that invalidate every stored chunk when they change."""
+        return {
+            "vector_backend": self.vector_backend,
+            "embedding_model": self.embedding_model,
+            "embedding_engine": self.embedding_engine,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "separators": self.separators,
+            "dedup": self._dedup_settings(),
+        }
+    
+    def _dedup_settings(self) -> Optional[dict]:
+        if not settings.dedup_enabled:
+            return None
+        return {
+            "version": SIGNATURE_VERSION,
+            "threshold": settings.dedup_threshold,
+            "shingle_size": settings.dedup_shingle_size,
+            "num_perm": settings.dedup_num_perm,
+        }
+    
+    def load_manifest(self) -> dict:
+        """Load the index manifest (file hash -> chunk IDs), or an empty one."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"files": {}}
+    
+    def save_manifest(self, manifest: dict) -> None:
+        """Persist the manifest atomically (write + rename)."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _delete_chunks(self, chunk_ids: list[str]) -> None:
+        if chunk_ids:
+            self.store.delete(chunk_ids)
+    
+    def _sync_sources(self, chunk_ids: set[str], refs: dict[str, set[str]]) -> None:
+        """Write the source list of shared chunks into their metadata."""
+        ids, metadatas = [], []
+        for chunk_id in sorted(chunk_ids):
+            owners = refs.get(chunk_id)
+            if not owners:
+                continue
+            source = primary_source(chunk_id, owners)
+            metadata = {"source": source, "sources": SOURCES_SEPARATOR.join(sorted(owners))}
+            loader = LOADERS.get(Path(source).suffix.lower())
+            if loader is not None:
+                metadata["file_type"] = loader[1]
+            ids.append(chunk_id)
+            metadatas.append(metadata)
+        self.store.update_metadatas(ids, metadatas)
+    
+    def index_documents(
+        self,
+        force_reindex: bool = False,
+        embedding_model: Optional[str] = None,
+        full_rebuild: bool = False,
+    ) -> int:
         """
-        Load, chunk, and index all documents into ChromaDB.
+        Load, chunk, and index documents into ChromaDB.
+        
+        Reindexing is incremental: a manifest stores each source file's content
+        hash and chunk IDs, so only added or changed files are embedded and the
+        chunks of removed files are deleted.
+        
+        Indexing is a streaming pipeline (load -> chunk -> embed in batches ->
+        upsert), so memory stays flat regardless of corpus size. The manifest is
+        checkpointed after every committed batch; an interrupted run resumes
+        from there on the next call.
+        
+        Near-duplicate chunks (e.g. the same text in ``sss.md`` and
+        ``sss.pdf``) are detected with MinHash before embedding and stored
+        once: the file's manifest entry points at the existing chunk, whose
+        ``sources`` metadata lists every file containing it. A shared chunk
+        is deleted only when no file references it anymore.
         
         Args:
-            force_reindex: If True, delete existing index and reindex all documents.
+            force_reindex: If True, sync the index with the data directory even
+                if it already contains chunks.
+            embedding_model: Optionally switch to another embedding model.
+                Switching models always rebuilds the whole index.
+            full_rebuild: If True, drop the collection and re-embed everything.
             
         Returns:
-            Number of chunks indexed.
+            Number of chunks in the index.
         """
+        started = time.perf_counter()
+        # Swap embedding model if requested
+        if embedding_model and embedding_model != self.embedding_model:
+            logger.info(f"🔁 Switching embedding model: {self.embedding_model} -> {embedding_model}")
+            self._load_embeddings(embedding_model)
+            force_reindex = True
+        
+        manifest = self.load_manifest()
+        if manifest.get("pending"):
+            logger.info("⏯️ Resuming interrupted indexing run...")
+            force_reindex = True
+        
         # Check if already indexed
-        if not force_reindex:
+        if not force_reindex and not full_rebuild:
             try:
-                existing_count = self.vectorstore._collection.count()
+                existing_count = self.store.count()
                 if existing_count > 0:
-                    print(f"📦 Found existing index with {existing_count} chunks. Skipping reindex.")
-                    print("   Use force_reindex=True to rebuild the index.")
+                    logger.info(
+                        f"📦 Found existing index with {existing_count} chunks. Skipping reindex. "
+                        "Use force_reindex=True to sync the index with the data directory."
+                    )
+                    INDEX_CHUNKS.set(existing_count)
+                    INDEX_FILES.set(len(manifest.get("files", {})))
                     return existing_count
             except Exception:
                 pass
         
-        # Clear existing index if force reindex
-        if force_reindex and self.chroma_dir.exists():
-            import shutil
-            shutil.rmtree(self.chroma_dir)
-            self._vectorstore = None
-            print("🗑️ Cleared existing index")
-        
-        # Load and process documents
-        documents = self.load_documents()
-        if not documents:
-            print("⚠️ No documents found in data directory!")
-            return 0
-        
-        chunks = self.chunk_documents(documents)
-        
-        # Index chunks
-        print("🔄 Indexing chunks into ChromaDB...")
-        self._vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            collection_name=self.collection_name,
-            persist_directory=str(self.chroma_dir),
-        )
+        stored_settings = manifest.get("settings")
+        if stored_settings is not None:
+            # Engine ayarından önceki manifest'ler torch ile oluşturulmuştu
+            stored_settings.setdefault("embedding_engine", "torch")
+            stored_settings.setdefault("separators", "default")
+            stored_settings.setdefault("dedup", None)
+        if stored_settings != self._index_settings():
+            # Model/chunking değişti ya da manifest yok: tüm chunk'lar geçersiz
+            full_rebuild = True
+        
+        # Clear existing index if a full rebuild is needed
+        if full_rebuild:
+            self.store.reset()
+            manifest = {"files": {}}
+            logger.info("🗑️ Cleared existing index")
+        
+        manifest["settings"] = self._index_settings()
+        indexed_files: dict = manifest["files"]
+        # Files whose new chunks are only partially committed (resume point)
+        pending: dict = manifest.setdefault("pending", {})
+        current_files = {
+            source_name(path, self.data_dir): path for path in self.list_source_files()
+        }
+        report = {"added": [], "changed": [], "removed": [], "unchanged": [], "failed": []}
         
-        print(f"✅ Successfully indexed {len(chunks)} chunks!")
-        return len(chunks)
+        # chunk ID -> files whose chunk list contains it (near-duplicates are shared)
+        refs: dict[str, set[str]] = {}
+        for name, entry in indexed_files.items():
+            for chunk_id in entry["chunk_ids"]:
+                refs.setdefault(chunk_id, set()).add(name)
+        for name, entry in pending.items():
+            for chunk_id in entry["committed_ids"]:
+                refs.setdefault(chunk_id, set()).add(name)
+        touched: set[str] = set()  # shared chunks whose source list changed
+        dedup: Optional[NearDuplicateIndex] = None
+        dedup_stats = DedupStats()
+        
+        def release_chunks(name: str, chunk_ids: list[str]) -> None:
+            """Drop ``name``'s references; delete the chunks no other file uses."""
+            orphaned = []
+            for chunk_id in set(chunk_ids):
+                owners = refs.get(chunk_id, set())
+                owners.discard(name)
+                if owners:
+                    touched.add(chunk_id)
+                    continue
+                refs.pop(chunk_id, None)
+                touched.discard(chunk_id)
+                orphaned.append(chunk_id)
+                if dedup is not None:
+                    dedup.remove(chunk_id)
+            self._delete_chunks(orphaned)
+        
+        # Delete chunks of removed files
+        for name in sorted((set(indexed_files) | set(pending)) - set(current_files)):
+            old_ids = indexed_files.pop(name, {}).get("chunk_ids", [])
+            old_ids += pending.pop(name, {}).get("committed_ids", [])
+            release_chunks(name, old_ids)
+            report["removed"].append(name)
+            logger.info(f"🗑️ Removed: {name}")
+        
+        # Find added or changed files
+        to_index: list[Path] = []
+        hashes: dict[str, str] = {}
+        for name, path in current_files.items():
+            hashes[name] = file_hash(path)
+            entry = indexed_files.get(name)
+            if entry is not None and entry["hash"] == hashes[name]:
+                report["unchanged"].append(name)
+            else:
+                to_index.append(path)
+        
+        if to_index and settings.dedup_enabled:
+            # Yeni chunk'lar indeksteki tüm chunk'larla karşılaştırılır; imzalar bir önceki
+            # çalıştırmadan yüklenir, yalnızca eksik olanlar (ilk çalıştırma, yarım kalan
+            # indeksleme) chunk metinlerinden yeniden hesaplanır
+            dedup = NearDuplicateIndex(
+                threshold=settings.dedup_threshold,
+                shingle_size=settings.dedup_shingle_size,
+                num_perm=settings.dedup_num_perm,
+            )
+            missing = dedup.load(self.index_dir / DEDUP_SIGNATURES_NAME, set(refs))
+            if missing:
+                logger.info(f"♻️ Computing near-duplicate signatures of {len(missing)} stored chunks")
+                for chunk_id, content, _ in self.store.iter_documents():
+                    if chunk_id in missing:
+                        dedup.add(chunk_id, dedup.signature(content))
+        
+        progress = self.index_progress = {
+            "files_total": len(to_index),
+            "files_done": 0,
+            "chunks_committed": 0,
+            "chunks_resumed": 0,
+            "chunks_deduplicated": 0,
+            "batches": 0,
+        }
+        batch_size = settings.embed_batch_size
+        # (file, chunk id, chunk, needs embedding); near-duplicates reuse an existing chunk id
+        batch: list[tuple[str, str, Document, bool]] = []
+        remaining: dict[str, int] = {}  # file -> chunks not yet committed
+        replaced: set[str] = set()  # files that had an older version indexed
+        
+        def finish_file(name: str) -> None:
+            entry = pending.pop(name)
+            indexed_files[name] = {"hash": entry["hash"], "chunk_ids": entry["chunk_ids"]}
+            report["changed" if name in replaced else "added"].append(name)
+            progress["files_done"] += 1
+        
+        def commit_batch() -> None:
+            new_chunks = [(chunk_id, doc) for _, chunk_id, doc, embed in batch if embed]
+            if new_chunks:
+                texts = [doc.page_content for _, doc in new_chunks]
+                self.store.upsert(
+                    ids=[chunk_id for chunk_id, _ in new_chunks],
+                    embeddings=self.embeddings.embed_documents(texts),
+                    documents=texts,
+                    metadatas=[doc.metadata for _, doc in new_chunks],
+                )
+            for name, chunk_id, _, _ in batch:
+                pending[name]["committed_ids"].append(chunk_id)
+                remaining[name] -= 1
+                if remaining[name] == 0:
+                    finish_file(name)
+            self._sync_sources(touched, refs)
+            touched.clear()
+            
+            progress["chunks_committed"] += len(new_chunks)
+            progress["batches"] += 1
+            batch.clear()
+            # Checkpoint: bu noktaya kadar olan her şey kalıcı
+            self.store.flush()
+            self.save_manifest(manifest)
+            logger.info(
+                f"🔄 Batch {progress['batches']}: {progress['chunks_committed']} chunks embedded, "
+                f"{progress['files_done']}/{progress['files_total']} files done"
+            )
+        
+        # Load + chunk in parallel, embed and upsert in fixed-size batches
+        load_stats = LoadStats()
+        for result in iter_processed_files(
+            to_index,
+            self.data_dir,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            workers=settings.index_workers,
+            stats=load_stats,
+            separators=self.separators,
+        ):
+            name = result.name
+            if result.error:
+                report["failed"].append(name)
+                # Yüklenemeyen dosyanın yarım kalan sürümü bırakılır: aksi halde "pending" her
+                # açılışta yeniden indekslemeyi zorlar. Dosya bir sonraki senkronda yeniden denenir.
+                previous = pending.pop(name, None)
+                if previous is not None:
+                    release_chunks(name, previous["committed_ids"])
+                continue
+            
+            content_hash = hashes[name]
+            
+            # Drop the previous version of the file
+            old_entry = indexed_files.pop(name, None)
+            if old_entry is not None:
+                replaced.add(name)
+                release_chunks(name, old_entry["chunk_ids"])
+            
+            # Keep chunks already committed by an interrupted run of the same content
+            previous = pending.get(name)
+            committed: list[str] = []
+            resumed_ids: Optional[list[str]] = None
+            if previous is not None:
+                if previous["hash"] == content_hash:
+                    committed = previous["committed_ids"]
+                    resumed_ids = previous["chunk_ids"]
+                else:
+                    release_chunks(name, previous["committed_ids"])
+            
+            already = set(committed)
+            chunk_ids: list[str] = []
+            todo: list[tuple[str, Document, bool]] = []
+            for i, doc in enumerate(result.documents):
+                if resumed_ids is not None and resumed_ids[i] in already:
+                    chunk_ids.append(resumed_ids[i])
+                    continue
+                chunk_id, embed, kept_source = f"{name}::{content_hash[:16]}::{i}", True, None
+                if dedup is not None:
+                    signature = dedup.signature(doc.page_content)
+                    match = dedup.find(signature)
+                    if match is None:
+                        dedup.add(chunk_id, signature)
+                    else:
+                        chunk_id, embed = match[0], False
+                        kept_source = primary_source(chunk_id, refs.get(chunk_id, set()))
+                        touched.add(chunk_id)
+                        progress["chunks_deduplicated"] += 1
+                    dedup_stats.record(name, kept_source)
+                # Referans kuyruğa alınırken eklenir: paylaşılan chunk commit'ten önce silinmesin
+                refs.setdefault(chunk_id, set()).add(name)
+                chunk_ids.append(chunk_id)
+                todo.append((chunk_id, doc, embed))
+            pending[name] = {"hash": content_hash, "chunk_ids": chunk_ids, "committed_ids": committed}
+            
+            progress["chunks_resumed"] += len(chunk_ids) - len(todo)
+            remaining[name] = len(todo)
+            if not todo:
+                finish_file(name)
+                continue
+            
+            for chunk_id, doc, embed in todo:
+                batch.append((name, chunk_id, doc, embed))
+                if len(batch) >= batch_size:
+                    commit_batch()
+        
+        if batch:
+            commit_batch()
+        # Silinen dosyaların paylaşılan chunk'ları: kaynak listesi güncellensin
+        self._sync_sources(touched, refs)
+        
+        self.last_load_stats = load_stats.as_dict()
+        if to_index:
+            logger.info(
+                f"⏱️ Loaded {load_stats.files} files in {load_stats.seconds:.2f}s "
+                f"({self.last_load_stats['files_per_s']} files/s, "
+                f"{self.last_load_stats['chunks_per_s']} chunks/s)"
+            )
+        
+        self.store.flush()
+        self.save_manifest(manifest)
+        if dedup is not None:
+            dedup.save(self.index_dir / DEDUP_SIGNATURES_NAME)
+        
+        # Corpus-wide ratio: chunk references served by a shared chunk
+        total = self.store.count()
+        references = sum(len(entry["chunk_ids"]) for entry in indexed_files.values())
+        index_ratio = round(1 - total / references, 4) if references and total <= references else 0.0
+        report["dedup"] = {"enabled": settings.dedup_enabled, **dedup_stats.as_dict(), "index_ratio": index_ratio}
+        INDEX_DEDUP_RATIO.set(index_ratio)
+        if dedup_stats.duplicates:
+            pairs = ", ".join(f"{pair}: {count}" for pair, count in report["dedup"]["pairs"].items())
+            logger.info(
+                f"♻️ {dedup_stats.duplicates}/{dedup_stats.chunks} new chunks were near-duplicates "
+                f"({report['dedup']['ratio']:.0%}) and reuse stored chunks ({pairs})"
+            )
+        self.last_index_report = report
+        
+        # Rebuild the inverted index over the updated collection
+        if settings.hybrid_search:
+            self._lexical = self._build_lexical_index()
+        
+        if report["added"] or report["changed"] or report["removed"]:
+            self.index_version += 1
+        
+        if total == 0:
+            logger.warning("⚠️ No documents found in data directory!")
+        duration = time.perf_counter() - started
+        INDEX_DURATION.observe(duration)
+        INDEX_LAST_DURATION.set(duration)
+        INDEX_CHUNKS.set(total)
+        INDEX_FILES.set(len(indexed_files))
+        logger.info(
+            f"✅ Index synced: {len(report['added'])} added, {len(report['changed'])} changed, "
+            f"{len(report['removed'])} removed, {len(report['unchanged'])} unchanged "
+            f"({total} chunks total) in {duration:.2f}s"
+        )
+        return total
     
-    def search(
+    def _cache_key(self, query: str) -> tuple[str, str]:
+        return (self.embedding_model, normalize_query(query))
+    
+    def embed_query(self, query: str) -> list[float]:
+        """Encode a single query into a normalized embedding vector (cached)."""
+        key = self._cache_key(query)
+        embedding = self._embedding_cache.get(key)
+        record_cache("embedding", embedding is not None)
+        if embedding is None:
+            with timed("query_embed"):
+                embedding = self.embeddings.embed_query(key[1])
+            self._embedding_cache.set(key, embedding)
+        return embedding
+    
+    async def aembed_query(self, query: str) -> list[float]:
+        """Encode a query without blocking the event loop (cached, micro-batched)."""
+        key = self._cache_key(query)
+        embedding = self._embedding_cache.get(key)
+        record_cache("embedding", embedding is not None)
+        if embedding is None:
+            # Micro-batch bekleme süresi dahil
+            with timed("query_embed"):
+                embedding = await self._batcher.embed(key[1])
+            self._embedding_cache.set(key, embedding)
+        return embedding
+    
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Encode many queries; cache misses share one batched forward pass."""
+        keys = [self._cache_key(query) for query in queries]
+        embeddings = {key: self._embedding_cache.get(key) for key in keys}
+        missing = [key for key, embedding in embeddings.items() if embedding is None]
+        for key in keys:
+            record_cache("embedding", embeddings[key] is not None)
+        if missing:
+            with timed("query_embed_batch"):
+                vectors = self.embeddings.embed_documents([key[1] for key in missing])
+            for key, vector in zip(missing, vectors):
+                embeddings[key] = vector
+                self._embedding_cache.set(key, vector)
+        return [embeddings[key] for key in keys]
+    
+    def search_by_vector(
         self,
-        query: str,
+        embedding: list[float],
         k: int = 4,
-        score_threshold: float = 0.3,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
     ) -> list[dict]:
         """
-        Search for relevant document chunks.
+        Search for relevant document chunks using a precomputed query embedding.
+        
+        Scores are cosine similarities between the (normalized) query and chunk
+        embeddings, as returned by the configured vector store backend.
         
         Args:
-            query: Search query text
-            k: Number of results to return
+            embedding: Query embedding vector
+            k: Maximum number of results to return
             score_threshold: Minimum similarity score (0-1, higher is more similar)
+            adaptive_k: Stop adding chunks once scores drop off (see
+                ``apply_adaptive_k``). Defaults to ``settings.rag_adaptive_k``.
             
         Returns:
-            List of relevant document chunks with metadata
+            List of relevant document chunks with metadata, best first
         """
-        # Perform standard similarity search (more stable)
+        if score_threshold is None:
+            score_threshold = settings.rag_score_threshold
+        if adaptive_k is None:
+            adaptive_k = settings.rag_adaptive_k
+        
         try:
-            # Note: This returns documents without scores
-            docs = self.vectorstore.similarity_search(query, k=k)
-            
-            # Since we don't have scores, we assume retrieved docs are relevant enough
-            # unless we implement our own scoring. For now, we return all retrieved docs.
+            hits = self.store.query([embedding], k)[0]
+            return self._rank_vector_hits(hits, score_threshold, adaptive_k)
             
-            formatted_results = []
-            for doc in docs:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "source": doc.metadata.get("source", "unknown"),
-                    "file_type": doc.metadata.get("file_type", "unknown"),
-                    "score": 0.9, # Dummy score since we use basic similarity search
-                })
-            
-            return formatted_results
+        except Exception as e:
+            logger.warning(f"⚠️ Vector search error: {e}")
+            record_error("vector_search", e)
+            return []
+    
+    def _rank_vector_hits(
+        self, hits: list[dict], score_threshold: float, adaptive_k: bool
+    ) -> list[dict]:
+        formatted_results = []
+        for hit in hits:
+            if hit["score"] < score_threshold:
+                continue
+            formatted_results.append(format_hit(hit))
+        
+        if adaptive_k:
+            formatted_results = apply_adaptive_k(formatted_results)
+        return formatted_results
+    
+    @property
+    def lexical_index(self) -> LexicalIndex:
+        """Get the BM25 index, building it from the vector store on first use."""
+        if self._lexical is None:
+            self._lexical = self._build_lexical_index()
+        return self._lexical
+    
+    def _build_lexical_index(self) -> LexicalIndex:
+        """Build the Turkish-aware inverted index over all stored chunks."""
+        index = LexicalIndex(stem_prefix=settings.lexical_stem_prefix)
+        for chunk_id, content, metadata in self.store.iter_documents():
+            index.add(chunk_id, content, metadata)
+        return index
+    
+    def lexical_fast_path(
+        self,
+        query: str,
+        k: int = 4,
+        adaptive_k: Optional[bool] = None,
+    ) -> Optional[list[dict]]:
+        """
+        Retrieve selective keyword queries with BM25 alone, skipping embedding.
+        
+        Applies to short queries whose terms are all rare in the corpus (high
+        IDF), e.g. "1600 kVA". Without a query embedding there is no cosine
+        score: a hit's ``score`` is its IDF-weighted coverage of the query terms
+        (0-1) and must reach ``lexical_fast_path_min_coverage``; the BM25 score
+        is returned as ``lexical_score``. The cosine ``score_threshold`` of
+        vector search does not apply.
+        
+        Returns:
+            Results in BM25 order, or None if the query should go through
+            vector search (not selective, or no hit matched enough of it).
+        """
+        if adaptive_k is None:
+            adaptive_k = settings.rag_adaptive_k
+        if not (settings.hybrid_search and settings.lexical_fast_path):
+            return None
+        try:
+            index = self.lexical_index
+            if not index.is_selective(
+                query,
+                min_idf=settings.lexical_fast_path_min_idf,
+                max_terms=settings.lexical_fast_path_max_terms,
+            ):
+                return None
+            with timed("lexical_search"):
+                hits = index.search(query, k)
+        except Exception as e:
+            logger.warning(f"⚠️ Lexical search error: {e}")
+            record_error("lexical_search", e)
+            return None
+        
+        results = []
+        for hit in hits:
+            # Terimlerin yalnızca bir kısmını içeren chunk'lar için vektör aramasına düşülür
+            if hit["coverage"] < settings.lexical_fast_path_min_coverage:
+                continue
+            result = format_hit({**hit, "score": hit["coverage"]}, retrieval="lexical")
+            result["lexical_score"] = round(hit["score"], 4)
+            results.append(result)
+        if not results:
+            return None
+        if adaptive_k:
+            results = drop_far_below_best(results)
+        
+        self.lexical_fast_path_hits += 1
+        return results
+    
+    def search_hybrid(
+        self,
+        query: str,
+        embedding: list[float],
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[dict]:
+        """
+        Fuse vector and BM25 rankings with reciprocal-rank fusion.
+        
+        Results are ordered by the fused rank; ``score`` is still the cosine
+        similarity of the chunk, so the threshold and adaptive-k cut-offs mean
+        the same as for pure vector search.
+        """
+        if score_threshold is None:
+            score_threshold = settings.rag_score_threshold
+        if adaptive_k is None:
+            adaptive_k = settings.rag_adaptive_k
+        
+        try:
+            candidates = k * settings.hybrid_candidate_multiplier
+            vector_hits = self.store.query([embedding], candidates)[0]
+            return self._fuse_hybrid(
+                query, embedding, vector_hits, k, score_threshold, adaptive_k
+            )
             
         except Exception as e:
-            print(f"⚠️ Vector search error: {e}")
+            logger.warning(f"⚠️ Hybrid search error: {e}")
+            record_error("vector_search", e)
+            return []
+    
+    def _fuse_hybrid(
+        self,
+        query: str,
+        embedding: list[float],
+        vector_hits: list[dict],
+        k: int,
+        score_threshold: float,
+        adaptive_k: bool,
+    ) -> list[dict]:
+        """Fuse precomputed vector hits with the BM25 ranking of ``query``."""
+        candidates = k * settings.hybrid_candidate_multiplier
+        lexical_hits = self.lexical_index.search(query, candidates)
+        fused = reciprocal_rank_fusion(
+            [[hit["id"] for hit in vector_hits], [hit["id"] for hit in lexical_hits]],
+            k=settings.rrf_k,
+        )
+        
+        hits_by_id = {hit["id"]: hit for hit in lexical_hits}
+        cosine = {hit["id"]: hit["score"] for hit in vector_hits}
+        hits_by_id.update({hit["id"]: hit for hit in vector_hits})
+        
+        # Sadece BM25 ile bulunan chunk'ların cosine skorunu hesapla
+        lexical_only = [chunk_id for chunk_id, _ in fused if chunk_id not in cosine]
+        if lexical_only:
+            query_vector = np.asarray(embedding, dtype=np.float32)
+            for chunk_id, vector in self.store.get_embeddings(lexical_only).items():
+                cosine[chunk_id] = float(np.asarray(vector, dtype=np.float32) @ query_vector)
+        
+        results = []
+        for chunk_id, _ in fused:
+            score = cosine.get(chunk_id)
+            if score is None or score < score_threshold:
+                continue
+            results.append(format_hit({**hits_by_id[chunk_id], "score": score}, retrieval="hybrid"))
+            if len(results) == k:
+                break
+        
+        if adaptive_k:
+            results = drop_far_below_best(results)
+        return results
+    
+    def _search_with_embedding(self, query: str, embedding: list[float], **kwargs) -> list[dict]:
+        with timed("vector_search"):
+            if settings.hybrid_search:
+                return self.search_hybrid(query, embedding, **kwargs)
+            return self.search_by_vector(embedding, **kwargs)
+    
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[dict]:
+        """
+        Search for relevant document chunks (blocking).
+        
+        Async handlers should use ``asearch`` instead.
+        """
+        lexical = self.lexical_fast_path(query, k, adaptive_k)
+        if lexical is not None:
+            return lexical
+        
+        try:
+            embedding = self.embed_query(query)
+        except Exception as e:
+            logger.warning(f"⚠️ Query embedding error: {e}")
+            record_error("query_embed", e)
             return []
+        return self._search_with_embedding(
+            query, embedding, k=k, score_threshold=score_threshold, adaptive_k=adaptive_k
+        )
+    
+    async def asearch(
+        self,
+        query: str,
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[dict]:
+        """
+        Search for relevant document chunks without blocking the event loop.
+        
+        The query embedding is micro-batched with concurrent queries and the
+        vector search runs in the RAG thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        lexical = await loop.run_in_executor(
+            self._executor, partial(self.lexical_fast_path, query, k, adaptive_k)
+        )
+        if lexical is not None:
+            return lexical
+        
+        try:
+            embedding = await self.aembed_query(query)
+        except Exception as e:
+            logger.warning(f"⚠️ Query embedding error: {e}")
+            record_error("query_embed", e)
+            return []
+        
+        return await loop.run_in_executor(
+            self._executor,
+            partial(
+                self._search_with_embedding,
+                query,
+                embedding,
+                k=k,
+                score_threshold=score_threshold,
+                adaptive_k=adaptive_k,
+            ),
+        )
+    
+    def search_many(
+        self,
+        queries: list[str],
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[list[dict]]:
+        """
+        Search for many queries at once (blocking).
+        
+        Queries not in the embedding cache are encoded in one batched forward
+        pass and all vector lookups go to the store in a single call. Each
+        query gets the same results ``search`` would return, in input order.
+        
+        Raises:
+            ValueError: if more than ``search_batch_max_size`` queries are given
+        """
+        if len(queries) > settings.search_batch_max_size:
+            raise ValueError(
+                f"Too many queries: {len(queries)} > {settings.search_batch_max_size}"
+            )
+        if score_threshold is None:
+            score_threshold = settings.rag_score_threshold
+        if adaptive_k is None:
+            adaptive_k = settings.rag_adaptive_k
+        
+        # Seçici anahtar kelime sorguları embed edilmeden yalnızca BM25 ile yanıtlanır
+        results = [self.lexical_fast_path(query, k, adaptive_k) for query in queries]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        try:
+            embeddings = self.embed_queries([queries[i] for i in pending])
+        except Exception as e:
+            logger.warning(f"⚠️ Query embedding error: {e}")
+            record_error("query_embed", e)
+            return [result if result is not None else [] for result in results]
+        
+        try:
+            with timed("vector_search_batch"):
+                if settings.hybrid_search:
+                    hits = self.store.query(embeddings, k * settings.hybrid_candidate_multiplier)
+                    for i, embedding, vector_hits in zip(pending, embeddings, hits):
+                        results[i] = self._fuse_hybrid(
+                            queries[i], embedding, vector_hits, k, score_threshold, adaptive_k
+                        )
+                else:
+                    hits = self.store.query(embeddings, k)
+                    for i, vector_hits in zip(pending, hits):
+                        results[i] = self._rank_vector_hits(vector_hits, score_threshold, adaptive_k)
+        except Exception as e:
+            logger.warning(f"⚠️ Vector search error: {e}")
+            record_error("vector_search", e)
+        return [result if result is not None else [] for result in results]
+    
+    async def asearch_many(
+        self,
+        queries: list[str],
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        adaptive_k: Optional[bool] = None,
+    ) -> list[list[dict]]:
+        """Batch search in the RAG thread pool (see ``search_many``)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(
+                self.search_many,
+                queries,
+                k=k,
+                score_threshold=score_threshold,
+                adaptive_k=adaptive_k,
+            ),
+        )
     
     def get_context_for_query(self, query: str, k: int = 4) -> str:
         """
@@ -247,15 +1222,39 @@ class RAGService:
         
         return "\n\n---\n\n".join(context_parts)
     
+    def warm_up(self, query: str = "Luxivolt trafo bakımı") -> float:
+        """
+        Run one throw-away encode and search so the first real query is fast.
+
+        Loads lazily initialised parts (model weights, vector store, BM25
+        index) and returns the elapsed time in seconds.
+        """
+        started = time.perf_counter()
+        # Cache'i kirletmemek için embed_query yerine doğrudan model çağrılır
+        embedding = self.embeddings.embed_documents([query])[0]
+        self._search_with_embedding(query, embedding, k=1)
+        return time.perf_counter() - started
+    
     def get_stats(self) -> dict:
         """Get statistics about the vector store."""
         try:
-            count = self.vectorstore._collection.count()
+            store_stats = self.store.get_stats()
             return {
-                "total_chunks": count,
+                "total_chunks": store_stats["total_chunks"],
                 "collection_name": self.collection_name,
                 "data_directory": str(self.data_dir),
                 "chroma_directory": str(self.chroma_dir),
+                "index_directory": str(self.index_dir),
+                "vector_store": store_stats,
+                "embedding_model": self.embedding_model,
+                "embedding_engine": self.embedding_engine,
+                "index_version": self.index_version,
+                "embedding_batcher": self._batcher.get_stats(),
+                "embedding_cache": self._embedding_cache.get_stats(),
+                "lexical_index": self._lexical.get_stats() if self._lexical else None,
+                "lexical_fast_path_hits": self.lexical_fast_path_hits,
+                "last_load": self.last_load_stats,
+                "index_progress": self.index_progress,
             }
         except Exception as e:
             return {"error": str(e)}
@@ -263,13 +1262,28 @@ class RAGService:
 
 # Global instance
 _rag_service: Optional[RAGService] = None
+_rag_service_lock = threading.Lock()
 
 
 def get_rag_service() -> RAGService:
-    """Get the global RAG service instance."""
+    """
+    Get the global RAG service instance.
+    
+    With ``RAG_MODE=remote`` this is a ``RemoteRAGService`` client of the
+    shared RAG server (same interface), so the worker loads no model.
+    """
     global _rag_service
     if _rag_service is None:
-        _rag_service = RAGService()
+        # Model yüklemesi arka planda sürerken ikinci bir instance oluşmasın
+        with _rag_service_lock:
+            if _rag_service is None:
+                if settings.rag_mode == "remote":
+                    from rag_client import RemoteRAGService
+                    _rag_service = RemoteRAGService()
+                elif settings.rag_mode == "local":
+                    _rag_service = RAGService()
+                else:
+                    raise ValueError(f"Unknown RAG mode: {settings.rag_mode!r} (expected 'local' or 'remote')")
     return _rag_service
 
 
@@ -279,11 +1293,23 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Luxivolt RAG Service CLI")
     parser.add_argument("--index", action="store_true", help="Index documents")
-    parser.add_argument("--force", action="store_true", help="Force reindex")
+    parser.add_argument("--force", action="store_true", help="Force reindex (incremental)")
+    parser.add_argument("--full", action="store_true", help="Rebuild the whole index from scratch")
     parser.add_argument("--search", type=str, help="Search query")
     parser.add_argument("--stats", action="store_true", help="Show stats")
+    # Retrieval evaluation / parameter sweep
+    parser.add_argument("--eval", action="store_true", help="Evaluate the current index on the golden set")
+    parser.add_argument("--sweep", action="store_true", help="Sweep chunking and k, recommend a configuration")
+    parser.add_argument("--golden", type=str, help="Golden set JSON, or 'faq' to derive it from data/sss.md")
+    parser.add_argument("--ks", type=int, nargs="+", help="k values to evaluate (default: RAG_TOP_K / 2 4 6)")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[300, 500, 800])
+    parser.add_argument("--chunk-overlaps", type=int, nargs="+", default=[50, 100])
+    parser.add_argument("--separators", nargs="+", default=["default", "paragraph", "sentence"])
+    parser.add_argument("--no-cutoffs", action="store_true", help="Score the raw top-k (no threshold / adaptive-k)")
+    parser.add_argument("--output", type=str, help="Write evaluation results as JSON")
     
     args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level.upper(), format="%(message)s")
     
     rag = RAGService()
     
@@ -295,7 +1321,7 @@ if __name__ == "__main__":
     
     if args.index:
         print("\n🚀 Starting document indexing...")
-        count = rag.index_documents(force_reindex=args.force)
+        count = rag.index_documents(force_reindex=args.force, full_rebuild=args.full)
         print(f"\n✅ Indexing complete! Total chunks: {count}")
     
     if args.search:
@@ -303,8 +1329,54 @@ if __name__ == "__main__":
         results = rag.search(args.search)
         if results:
             for i, result in enumerate(results, 1):
-                print(f"\n--- Result {i} (score: {result['score']}) ---")
+                print(f"\n--- Result {i} (score: {result['score']:.4f}) ---")
                 print(f"Source: {result['source']}")
                 print(f"Content: {result['content'][:200]}...")
         else:
             print("No results found.")
+    
+    if args.eval or args.sweep:
+        import retrieval_eval
+        
+        if args.golden == "faq":
+            cases = retrieval_eval.derive_faq_cases()
+        else:
+            cases = retrieval_eval.load_golden_set(Path(args.golden) if args.golden else retrieval_eval.GOLDEN_SET)
+        print(f"\n🎯 Golden set: {len(cases)} questions")
+        
+        if args.eval:
+            rag.index_documents(force_reindex=False)
+            results = [
+                {
+                    "chunk_size": rag.chunk_size,
+                    "chunk_overlap": rag.chunk_overlap,
+                    "separators": rag.separators,
+                    "chunks": rag.store.count(),
+                    "build_seconds": 0.0,
+                    "index_bytes": retrieval_eval.index_size(rag),
+                    **retrieval_eval.evaluate(rag, cases, k, cutoffs=not args.no_cutoffs),
+                }
+                for k in (args.ks or [settings.rag_top_k])
+            ]
+        else:
+            results = retrieval_eval.sweep(
+                cases,
+                chunk_sizes=args.chunk_sizes,
+                chunk_overlaps=args.chunk_overlaps,
+                separators=args.separators,
+                ks=args.ks or [2, 4, 6],
+                data_dir=rag.data_dir,
+                embeddings=rag.embeddings,
+                cutoffs=not args.no_cutoffs,
+            )
+        
+        print()
+        retrieval_eval.print_results(results)
+        best = retrieval_eval.recommend(results) if args.sweep else None
+        for result in ([best] if best else results):
+            for question in result["misses"]:
+                print(f"   ✗ missed (k={result['k']}): {question}")
+        if args.sweep:
+            retrieval_eval.print_recommendation(best)
+        if args.output:
+            retrieval_eval.save_results(args.output, cases, results, best)
@@ -0,0 +1,226 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Zero-downtime background reindexing and data directory watcher
+
+Yeniden indeksleme, canlı indeksin yanında yeni bir jenerasyon dizininde
+yapılır; aramalar bu sırada eski indeksi kullanmaya devam eder. Bittiğinde
+RAGService'in vektör deposu atomik olarak yenisiyle değiştirilir. İsteğe bağlı
+izleyici data_dir'i periyodik olarak tarar ve değişiklikler durulduktan sonra
+(debounce) yeniden indekslemeyi başlatır.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+from config import get_settings
+from document_pipeline import source_name
+from metrics import record_error
+from rag_service import RAGService, get_rag_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class BackgroundReindexer:
+    """
+    Runs one index build at a time off the event loop and swaps it in.
+
+    States: idle -> running -> succeeded / failed. A reindex requested while
+    one is running is queued and starts right after it (requests coalesce:
+    at most one build is queued).
+    """
+
+    def __init__(self, rag: RAGService, on_swap: Optional[Callable[[int], None]] = None):
+        self.rag = rag
+        # Başarılı swap sonrası çağrılır (chunk sayısı ile): ör. yanıt önbelleğini temizle
+        self.on_swap = on_swap
+        self.state = "idle"
+        self.trigger: Optional[str] = None
+        self.error: Optional[str] = None
+        self.generation: Optional[str] = None
+        self.chunk_count: Optional[int] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.builds = 0
+        self._builder: Optional[RAGService] = None
+        self._queued: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Watcher
+        self._watch_task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[dict] = None
+        self.changes_detected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self,
+        full_rebuild: bool = False,
+        trigger: str = "api",
+        embedding_model: Optional[str] = None,
+    ) -> dict:
+        """
+        Start a background reindex (or queue one if a build is running).
+
+        Args:
+            embedding_model: Build the new generation with this embedding model;
+                the live index keeps the current model until the swap.
+
+        Returns:
+            The current status
+        """
+        if self.running:
+            queued = self._queued or {"full_rebuild": False, "trigger": trigger, "embedding_model": None}
+            queued["full_rebuild"] = queued["full_rebuild"] or full_rebuild
+            queued["embedding_model"] = embedding_model or queued["embedding_model"]
+            self._queued = queued
+            return self.get_status()
+
+        self.state, self.trigger = "running", trigger
+        self._task = asyncio.create_task(self._run(full_rebuild, trigger, embedding_model))
+        return self.get_status()
+
+    async def wait(self) -> dict:
+        """Wait until the running (and any queued) build has finished."""
+        if self.running:
+            # İstemci bağlantıyı koparsa build iptal edilmesin
+            await asyncio.shield(self._task)
+        return self.get_status()
+
+    async def _run(self, full_rebuild: bool, trigger: str, embedding_model: Optional[str]) -> None:
+        while True:
+            await self._build(full_rebuild, trigger, embedding_model)
+            if self._queued is None:
+                break
+            full_rebuild, trigger = self._queued["full_rebuild"], self._queued["trigger"]
+            embedding_model = self._queued["embedding_model"]
+            self._queued = None
+
+    async def _build(self, full_rebuild: bool, trigger: str, embedding_model: Optional[str] = None) -> None:
+        self.state = "running"
+        self.trigger = trigger
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.builds += 1
+        try:
+            # Yeni model (varsa) burada, event loop dışında yüklenir
+            self._builder = await asyncio.to_thread(self.rag.create_generation, embedding_model)
+            self.generation = self._builder.index_dir.name
+            logger.info(f"🏗️ Background reindex started ({trigger}) into {self.generation}")
+            await asyncio.to_thread(self.rag.build_generation, self._builder, full_rebuild)
+            self.chunk_count = self._builder.store.count()
+            # Eski jenerasyonun kapatılıp silinmesi (rmtree) event loop'u bloklamasın
+            await asyncio.to_thread(self.rag.swap_index, self._builder)
+            self.state = "succeeded"
+            if self.on_swap is not None:
+                self.on_swap(self.chunk_count)
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            logger.exception("❌ Background reindex failed, the live index is unchanged")
+            record_error("index", e)
+        finally:
+            self.finished_at = time.time()
+
+    # --- data_dir watcher ---
+
+    def _scan(self) -> dict:
+        """Snapshot of the data directory: file -> (mtime, size)."""
+        snapshot = {}
+        for path in self.rag.list_source_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[source_name(path, self.rag.data_dir)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def start_watcher(self) -> None:
+        """Poll ``data_dir`` and reindex once changes have settled."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        interval = settings.reindex_watch_interval
+        debounce = settings.reindex_watch_debounce
+        logger.info(f"👀 Watching {self.rag.data_dir} for changes (debounce {debounce:.0f}s)")
+        self._snapshot = await asyncio.to_thread(self._scan)
+        last_change: Optional[float] = None
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                snapshot = await asyncio.to_thread(self._scan)
+            except Exception as e:
+                logger.warning(f"⚠️ Data directory scan failed: {e}")
+                continue
+            if snapshot != self._snapshot:
+                # Dosyalar hâlâ kopyalanıyor olabilir: her değişiklik sayacı yeniden başlatır
+                self._snapshot = snapshot
+                last_change = time.monotonic()
+                self.changes_detected += 1
+            elif last_change is not None and time.monotonic() - last_change >= debounce:
+                last_change = None
+                logger.info("📂 Data directory changed, starting background reindex")
+                self.start(trigger="watcher")
+
+    async def stop(self) -> None:
+        """Stop the watcher and wait for a running build (it cannot be interrupted)."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        self._queued = None
+        if self.running:
+            await self._task
+
+    def get_status(self) -> dict:
+        finished = self.finished_at or time.time()
+        return {
+            "state": self.state,
+            "running": self.running,
+            "trigger": self.trigger,
+            "generation": self.generation,
+            "live_generation": self.rag.index_dir.name,
+            "embedding_model": self.rag.embedding_model,
+            "index_version": self.rag.index_version,
+            "chunk_count": self.chunk_count,
+            "progress": self._builder.index_progress if self._builder is not None else {},
+            "changes": self._builder.last_index_report if self._builder is not None else {},
+            "load": self._builder.last_load_stats if self._builder is not None else {},
+            "error": self.error,
+            "started_at": self.started_at,
+            "elapsed_seconds": round(finished - self.started_at, 2) if self.started_at else None,
+            "queued": self._queued is not None,
+            "builds": self.builds,
+            "watcher": {
+                "enabled": self._watch_task is not None,
+                "interval_seconds": settings.reindex_watch_interval,
+                "debounce_seconds": settings.reindex_watch_debounce,
+                "changes_detected": self.changes_detected,
+            },
+        }
+
+
+# Global instance
+_reindexer: Optional[BackgroundReindexer] = None
+
+
+def get_reindexer() -> BackgroundReindexer:
+    """Get the global reindexer of the local RAG service."""
+    global _reindexer
+    if _reindexer is None:
+        _reindexer = BackgroundReindexer(get_rag_service())
+    return _reindexer
+
+
+async def stop_reindexer() -> None:
+    """Stop the watcher and finish a running build (called on app shutdown)."""
+    if _reindexer is not None:
+        await _reindexer.stop()
@@ -0,0 +1,139 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Semantic answer cache for first-turn /chat questions
+
+Geçmişi olmayan (ilk tur) sorular için LLM yanıtları önbelleğe alınır.
+Anahtar; normalize edilmiş soru, RAG context'i, model ve indeks versiyonudur.
+İsteğe bağlı olarak embedding benzerliği ile "neredeyse aynı" sorular da eşleşir.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from cache import LRUCache, normalize_query
+from config import Settings, get_settings
+
+
+class ResponseCache:
+    """
+    LLM answer cache with exact and (optional) semantic lookup.
+
+    Exact matches are keyed on (scope, normalized message), where the scope
+    hashes the retrieved context, model and index version. Semantic matches
+    compare the query embedding against cached questions of the same scope.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        ttl: Optional[float] = 3600.0,
+        semantic: bool = False,
+        similarity_threshold: float = 0.95,
+    ):
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self._entries = LRUCache(max_size=max_size, ttl=ttl)
+        # exact key -> (scope, query embedding); bounded like the entries
+        self._vectors: OrderedDict[tuple[str, str], tuple[str, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.semantic_hits = 0
+
+    @staticmethod
+    def make_scope(context: str, model: str, index_version: int) -> str:
+        """Hash everything besides the question that determines the answer."""
+        digest = hashlib.sha256()
+        for part in (model, str(index_version), context):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(
+        self,
+        message: str,
+        scope: str,
+        embedding: Optional[list[float]] = None,
+    ) -> Optional[dict]:
+        """Look up a cached answer, first exactly, then by similarity."""
+        key = (scope, normalize_query(message))
+        if not self.semantic or embedding is None:
+            return self._entries.get(key)
+
+        # Exact + semantic arama tek bir lookup sayılır (bir hit ya da bir miss)
+        value = self._entries.get(key, record=False)
+        if value is None:
+            value = self._get_similar(scope, embedding)
+        self._entries.record(value is not None)
+        return value
+
+    def _get_similar(self, scope: str, embedding: list[float]) -> Optional[dict]:
+        best_key, best_score = None, self.similarity_threshold
+        with self._lock:
+            for candidate_key, (candidate_scope, vector) in self._vectors.items():
+                if candidate_scope != scope:
+                    continue
+                # Embedding'ler normalize edildiği için dot product = cosine
+                score = sum(a * b for a, b in zip(embedding, vector))
+                if score >= best_score:
+                    best_key, best_score = candidate_key, score
+
+        if best_key is None:
+            return None
+
+        value = self._entries.get(best_key, record=False)
+        if value is None:
+            # Entry LRU/TTL ile düşmüş, vektörünü de temizle
+            with self._lock:
+                self._vectors.pop(best_key, None)
+            return None
+
+        self.semantic_hits += 1
+        return value
+
+    def set(
+        self,
+        message: str,
+        scope: str,
+        value: dict,
+        embedding: Optional[list[float]] = None,
+    ) -> None:
+        """Store an answer (and its query embedding for semantic lookup)."""
+        key = (scope, normalize_query(message))
+        self._entries.set(key, value)
+        if self.semantic and embedding is not None:
+            with self._lock:
+                self._vectors[key] = (scope, embedding)
+                self._vectors.move_to_end(key)
+                while len(self._vectors) > self._entries.max_size:
+                    self._vectors.popitem(last=False)
+
+    def clear(self) -> None:
+        """Flush all cached answers (e.g. after reindexing)."""
+        self._entries.clear()
+        with self._lock:
+            self._vectors.clear()
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        stats = self._entries.get_stats()
+        stats["semantic"] = self.semantic
+        stats["semantic_hits"] = self.semantic_hits
+        return stats
+
+
+# Global instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache(settings: Optional[Settings] = None) -> ResponseCache:
+    """Get the global response cache instance."""
+    global _response_cache
+    if _response_cache is None:
+        settings = settings or get_settings()
+        _response_cache = ResponseCache(
+            max_size=settings.response_cache_size,
+            ttl=settings.response_cache_ttl,
+            semantic=settings.response_cache_semantic,
+            similarity_threshold=settings.response_cache_similarity_threshold,
+        )
+    return _response_cache
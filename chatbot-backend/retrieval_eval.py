@@ -0,0 +1,264 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Retrieval evaluation and parameter sweep
+
+Altın soru seti (soru + beklenen kaynak + beklenen pasaj) üzerinde retrieval
+kalitesi ölçülür: recall@k, MRR, indeks kurulum süresi, indeks boyutu ve sorgu
+gecikmesi. Chunk boyutu / overlap / ayırıcılar ve k taranır, kalite ile
+maliyet arasında en iyi dengeyi veren ayar önerilir.
+
+Kullanım (rag_service.py CLI üzerinden):
+    python rag_service.py --eval                       # mevcut indeks
+    python rag_service.py --sweep --output sweep.json  # parametre taraması
+"""
+
+import json
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+from config import get_settings
+from rag_service import DATA_DIR, RAGService
+
+settings = get_settings()
+
+GOLDEN_SET = Path(__file__).parent / "benchmarks" / "golden_set.json"
+FAQ_FILE = DATA_DIR / "sss.md"
+
+
+@dataclass
+class GoldenCase:
+    """A question with the source(s) and passage a correct retrieval must return."""
+    question: str
+    sources: list[str]
+    passage: str
+
+
+def load_golden_set(path: Path = GOLDEN_SET) -> list[GoldenCase]:
+    with open(path, encoding="utf-8") as f:
+        return [GoldenCase(**case) for case in json.load(f)]
+
+
+def derive_faq_cases(path: Path = FAQ_FILE, passage_words: int = 6) -> list[GoldenCase]:
+    """
+    Derive golden cases from the "**S: ...**" / "C: ..." pairs of the FAQ.
+
+    The question is used verbatim; the first words of the answer are the
+    expected passage. Verbatim questions are easier than real user phrasing,
+    so prefer the hand-written golden set for tuning decisions.
+    """
+    text = path.read_text(encoding="utf-8")
+    pairs = re.findall(r"\*\*S:\s*(.+?)\*\*\s*\n\s*C:\s*(.+)", text)
+    sources = [path.name, path.with_suffix(".pdf").name]
+    return [
+        GoldenCase(question=question.strip(), sources=sources,
+                   passage=" ".join(answer.split()[:passage_words]))
+        for question, answer in pairs
+    ]
+
+
+def normalize_text(text: str) -> str:
+    # Markdown işaretleri loader'a göre kalabilir / kalkabilir; büyük-küçük harf önemsiz
+    text = unicodedata.normalize("NFC", text).replace("’", "'").replace("*", "").replace("#", "")
+    return " ".join(text.casefold().split())
+
+
+def is_relevant(result: dict, case: GoldenCase) -> bool:
+    """A result is relevant if it comes from an expected source and contains the passage."""
+    return result["source"] in case.sources and normalize_text(case.passage) in normalize_text(result["content"])
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def evaluate(
+    rag: RAGService,
+    cases: list[GoldenCase],
+    k: int,
+    cutoffs: bool = True,
+) -> dict:
+    """
+    Run every golden question through ``rag.search`` and score the ranking.
+
+    Args:
+        k: Number of results requested per question
+        cutoffs: Apply the production score threshold and adaptive-k; if
+            False, the raw top-k ranking is scored
+
+    Returns:
+        recall@k, MRR@k, query latency percentiles, mean context size and
+        the questions that were missed
+    """
+    # Sorgu gecikmesi önbellek isabetleri olmadan ölçülsün
+    rag._embedding_cache.clear()
+    reciprocal_ranks = []
+    latencies = []
+    context_chars = []
+    misses = []
+    for case in cases:
+        started = time.perf_counter()
+        if cutoffs:
+            results = rag.search(case.question, k=k)
+        else:
+            results = rag.search(case.question, k=k, score_threshold=0.0, adaptive_k=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+        context_chars.append(sum(len(r["content"]) for r in results))
+
+        rank = next((i for i, r in enumerate(results, 1) if is_relevant(r, case)), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(case.question)
+
+    return {
+        "k": k,
+        "questions": len(cases),
+        "recall_at_k": round(sum(1 for rr in reciprocal_ranks if rr > 0) / len(cases), 4),
+        "mrr": round(statistics.mean(reciprocal_ranks), 4),
+        "query_ms_p50": round(percentile(latencies, 50), 2),
+        "query_ms_p95": round(percentile(latencies, 95), 2),
+        "context_chars_mean": round(statistics.mean(context_chars)),
+        "misses": misses,
+    }
+
+
+def directory_size(path: Path, exclude: Optional[Path] = None) -> int:
+    return sum(
+        f.stat().st_size for f in path.rglob("*")
+        if f.is_file() and (exclude is None or exclude not in f.parents)
+    )
+
+
+def index_size(rag: RAGService) -> int:
+    """On-disk size of the live index generation (without the retained older ones)."""
+    if rag.index_dir == rag.chroma_dir:
+        # İlk swap'tan önce indeks chroma_dir altında, jenerasyonlar alt klasörde
+        return directory_size(rag.index_dir, exclude=rag.generations_dir)
+    return directory_size(rag.index_dir)
+
+
+def sweep(
+    cases: list[GoldenCase],
+    chunk_sizes: list[int],
+    chunk_overlaps: list[int],
+    separators: list[str],
+    ks: list[int],
+    data_dir: Path = DATA_DIR,
+    embeddings=None,
+    cutoffs: bool = True,
+) -> list[dict]:
+    """
+    Build a throw-away index per chunking configuration and evaluate every k.
+
+    The embedding model is loaded once and shared by all indexes, so build
+    times only reflect loading, chunking, embedding and upserting.
+    """
+    results = []
+    for preset in separators:
+        for chunk_size in chunk_sizes:
+            for chunk_overlap in chunk_overlaps:
+                if chunk_overlap >= chunk_size:
+                    continue
+                workdir = Path(tempfile.mkdtemp(prefix="rag_eval_"))
+                rag = None
+                try:
+                    rag = RAGService(
+                        data_dir=data_dir,
+                        chroma_dir=workdir,
+                        collection_name="rag_eval",
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                        separators=preset,
+                        embeddings=embeddings,
+                    )
+                    embeddings = rag.embeddings
+                    started = time.perf_counter()
+                    chunks = rag.index_documents(full_rebuild=True)
+                    build_seconds = time.perf_counter() - started
+                    index_bytes = index_size(rag)
+                    for k in ks:
+                        scores = evaluate(rag, cases, k, cutoffs=cutoffs)
+                        results.append({
+                            "chunk_size": chunk_size,
+                            "chunk_overlap": chunk_overlap,
+                            "separators": preset,
+                            "chunks": chunks,
+                            "build_seconds": round(build_seconds, 2),
+                            "index_bytes": index_bytes,
+                            **scores,
+                        })
+                finally:
+                    # Vektör deposu (Chroma istemcisi) dizin silinmeden önce kapatılır
+                    if rag is not None:
+                        rag.discard()
+                        rag._executor.shutdown(wait=False)
+                    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def recommend(results: list[dict], tolerance: float = 0.02) -> Optional[dict]:
+    """
+    Pick the cheapest configuration whose quality is close to the best.
+
+    Candidates are within ``tolerance`` of the best recall@k and the best
+    MRR; among them the one sending the least context to the LLM (fewer
+    prompt tokens), then the lowest p95 query latency, wins.
+    """
+    if not results:
+        return None
+    best_recall = max(r["recall_at_k"] for r in results)
+    best_mrr = max(r["mrr"] for r in results)
+    candidates = [
+        r for r in results
+        if r["recall_at_k"] >= best_recall - tolerance and r["mrr"] >= best_mrr - tolerance
+    ]
+    return min(candidates, key=lambda r: (r["context_chars_mean"], r["query_ms_p95"], r["build_seconds"]))
+
+
+def print_results(results: list[dict]) -> None:
+    header = (
+        f"{'sep':<10} {'size':>5} {'ovl':>4} {'k':>3} {'chunks':>6} {'recall':>7} {'MRR':>6} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'ctx chars':>9} {'build s':>7} {'KB':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['separators']:<10} {r['chunk_size']:>5} {r['chunk_overlap']:>4} {r['k']:>3} "
+            f"{r['chunks']:>6} {r['recall_at_k']:>7} {r['mrr']:>6} {r['query_ms_p50']:>7} "
+            f"{r['query_ms_p95']:>7} {r['context_chars_mean']:>9} {r['build_seconds']:>7} "
+            f"{r['index_bytes'] // 1024:>7}"
+        )
+
+
+def print_recommendation(best: Optional[dict]) -> None:
+    if best is None:
+        print("\n⚠️ No configuration evaluated.")
+        return
+    print(
+        f"\n✅ Recommended: CHUNK_SIZE={best['chunk_size']} CHUNK_OVERLAP={best['chunk_overlap']} "
+        f"CHUNK_SEPARATORS={best['separators']} RAG_TOP_K={best['k']} "
+        f"(recall@k {best['recall_at_k']}, MRR {best['mrr']}, p95 {best['query_ms_p95']} ms)"
+    )
+
+
+def save_results(path: str, cases: list[GoldenCase], results: list[dict], best: Optional[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "settings": {
+                "embedding_model": settings.embedding_model,
+                "embedding_engine": settings.embedding_engine,
+                "vector_backend": settings.vector_backend,
+                "hybrid_search": settings.hybrid_search,
+            },
+            "golden_set": [asdict(case) for case in cases],
+            "results": results,
+            "recommended": best,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved to {path}")
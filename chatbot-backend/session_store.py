@@ -0,0 +1,321 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Server-side conversation sessions
+
+İstemci her turda tüm geçmişi göndermek yerine yalnızca yeni mesajı ve
+session_id'yi gönderir; geçmiş sunucuda tutulur.
+
+- MemorySessionStore: süreç içi, LRU + TTL + toplam bellek sınırı (varsayılan)
+- SQLiteSessionStore: yeniden başlatmalarda korunan, disk üzerinde oturumlar
+"""
+
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from config import Settings, get_settings
+
+DEFAULT_SQLITE_PATH = Path(__file__).parent / "sessions.db"
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def message_size(message: dict) -> int:
+    """Approximate memory footprint of a stored message in bytes."""
+    return len(message["role"]) + len(message["content"].encode("utf-8")) + 64
+
+
+class SessionStore:
+    """
+    Interface of a session store backend.
+
+    Messages are ``{"role", "content"}`` dicts; only the newest
+    ``max_messages`` of a session are kept.
+    """
+
+    name = "base"
+    # True if calls do I/O and should run outside the event loop
+    blocking = False
+
+    def get(self, session_id: str) -> Optional[list[dict]]:
+        """Return a session's history, or None if unknown/expired."""
+        raise NotImplementedError
+
+    def append(self, session_id: str, messages: list[dict]) -> None:
+        """Append messages to a session, creating it if needed."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def get_stats(self) -> dict:
+        raise NotImplementedError
+
+
+@dataclass
+class _Session:
+    messages: list[dict] = field(default_factory=list)
+    size: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class MemorySessionStore(SessionStore):
+    """In-process sessions with LRU eviction, TTL expiry and a memory cap."""
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        ttl: float = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_messages: int = 20,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return self.ttl > 0 and now - session.updated_at > self.ttl
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+
+    def get(self, session_id: str) -> Optional[list[dict]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._expired(session, time.monotonic()):
+                self._drop(session_id)
+                self.expirations += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return list(session.messages)
+
+    def append(self, session_id: str, messages: list[dict]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            session = self._sessions.get(session_id)
+            if session is None or self._expired(session, now):
+                if session is not None:
+                    self._drop(session_id)
+                    self.expirations += 1
+                session = self._sessions[session_id] = _Session()
+
+            for message in messages:
+                message = {"role": message["role"], "content": message["content"]}
+                session.messages.append(message)
+                session.size += message_size(message)
+                self._bytes += message_size(message)
+            # Sadece son mesajlar prompt'a girer, eskileri tutmaya gerek yok
+            while len(session.messages) > self.max_messages:
+                size = message_size(session.messages.pop(0))
+                session.size -= size
+                self._bytes -= size
+
+            session.updated_at = now
+            self._sessions.move_to_end(session_id)
+            self._evict_locked(keep=session_id)
+
+    def _evict_locked(self, keep: str) -> None:
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest)
+            self.evictions += 1
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+            return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions persisted in a SQLite database (survive restarts)."""
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(
+        self,
+        path: Path,
+        max_sessions: int = 10000,
+        ttl: float = 3600.0,
+        max_messages: int = 20,
+    ):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+            """
+        )
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._appends = 0
+
+    def _expired_before(self) -> float:
+        # Duvar saati kullanılır: süreç yeniden başlasa da TTL geçerli kalır
+        return time.time() - self.ttl if self.ttl > 0 else float("-inf")
+
+    def get(self, session_id: str) -> Optional[list[dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or row[0] < self._expired_before():
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), session_id)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, session_id: str, messages: list[dict]) -> None:
+        with self._lock, self._conn:
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is not None and row[0] < self._expired_before():
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                row = None
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO sessions (id, updated_at) VALUES (?, ?)", (session_id, now)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id)
+                )
+
+            next_seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, next_seq + i, m["role"], m["content"])
+                    for i, m in enumerate(messages)
+                ],
+            )
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq < ?",
+                (session_id, next_seq + len(messages) - self.max_messages),
+            )
+
+            # Süresi dolan / LRU dışı kalan oturumları ara sıra temizle
+            self._appends += 1
+            if self._appends % 100 == 1:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (self._expired_before(),))
+        self._conn.execute(
+            """
+            DELETE FROM sessions WHERE id IN (
+                SELECT id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_sessions,),
+        )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            messages = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return {
+            "backend": self.name,
+            "sessions": sessions,
+            "messages": messages,
+            "path": str(self.path),
+        }
+
+
+def create_session_store(settings: Settings) -> SessionStore:
+    """Create the session store backend selected in Settings."""
+    if settings.session_backend == "memory":
+        return MemorySessionStore(
+            max_sessions=settings.session_max_sessions,
+            ttl=settings.session_ttl,
+            max_bytes=settings.session_max_memory_mb * 1024 * 1024,
+            max_messages=settings.session_max_messages,
+        )
+    if settings.session_backend == "sqlite":
+        return SQLiteSessionStore(
+            Path(settings.session_sqlite_path) if settings.session_sqlite_path else DEFAULT_SQLITE_PATH,
+            max_sessions=settings.session_max_sessions,
+            ttl=settings.session_ttl,
+            max_messages=settings.session_max_messages,
+        )
+    raise ValueError(
+        f"Unknown session backend: {settings.session_backend!r} (expected 'memory' or 'sqlite')"
+    )
+
+
+# Global instance
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store(settings: Optional[Settings] = None) -> SessionStore:
+    """Get the global session store instance."""
+    global _session_store
+    if _session_store is None:
+        _session_store = create_session_store(settings or get_settings())
+    return _session_store
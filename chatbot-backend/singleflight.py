@@ -0,0 +1,64 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Single-flight request coalescing
+
+Aynı anda gelen özdeş istekler (ör. kampanya sonrası aynı hızlı aksiyon
+butonuna tıklayan ziyaretçiler) tek bir hesaplamayı bekler ve sonucu paylaşır;
+embedding, vektör arama ve OpenRouter çağrısı bir kez yapılır.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent async calls with the same key.
+
+    The first caller (leader) starts the computation as a separate task;
+    later callers with the same key await that task instead of starting
+    their own. The computation is shielded, so a disconnecting client
+    never cancels it for the others. Results are not kept after
+    completion; this is not a cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0  # calls served by another call's computation
+        self.max_waiters = 0
+        self._waiters: dict[Hashable, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` once per key among concurrent callers and share its result."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        self._waiters.pop(key, None)
+        # Tüm bekleyenler ayrıldıysa hata "never retrieved" uyarısı vermesin
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "saved_calls": self.shared,
+            "in_flight": len(self._inflight),
+            "max_waiters": self.max_waiters,
+        }
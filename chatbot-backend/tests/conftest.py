@@ -0,0 +1,53 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Test configuration
+
+Modüller düz bir klasörde (chatbot-backend/) durur; testler onları
+doğrudan import eder. ``rag`` fixture'ı model indirmeden, numpy backend'i ile
+geçici bir data/ klasörünü indeksler.
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class HashEmbeddings:
+    """Deterministic bag-of-words vectors (no model download)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            vector = np.zeros(64, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+            vectors.append((vector / (np.linalg.norm(vector) or 1)).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    import rag_service
+
+    monkeypatch.setattr(rag_service.settings, "vector_backend", "numpy")
+    monkeypatch.setattr(rag_service.settings, "index_workers", 1)
+    monkeypatch.setattr(rag_service.settings, "reindex_keep_generations", 2)
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "trafo.md").write_text("# Trafo\n\nTrafo bakım sözleşmesi yıllık yapılır.", encoding="utf-8")
+    service = rag_service.RAGService(
+        data_dir=data, chroma_dir=tmp_path / "index", embeddings=HashEmbeddings()
+    )
+    service.index_documents()
+    return service
@@ -0,0 +1,116 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Admission control queue and per-client token buckets
+"""
+
+import asyncio
+import pytest
+from admission import AdmissionController, AdmissionRejected, TokenBucketLimiter
+
+
+def test_bucket_allows_burst_then_limits():
+    limiter = TokenBucketLimiter("ip", rate_per_minute=60, burst=2)
+
+    assert limiter.check("1.2.3.4") is None
+    assert limiter.check("1.2.3.4") is None
+    retry_after = limiter.check("1.2.3.4")
+
+    assert retry_after is not None and 0 < retry_after <= 1.0
+    assert limiter.check("5.6.7.8") is None
+    assert (limiter.allowed, limiter.limited) == (3, 1)
+
+
+def test_refund_returns_the_token():
+    limiter = TokenBucketLimiter("ip", rate_per_minute=0, burst=1)
+    assert limiter.check("1.2.3.4") is None
+
+    limiter.refund("1.2.3.4")
+
+    assert limiter.check("1.2.3.4") is None
+    assert limiter.check("1.2.3.4") is not None
+    assert limiter.allowed == 1
+
+
+def test_refund_never_exceeds_burst():
+    limiter = TokenBucketLimiter("ip", rate_per_minute=0, burst=1)
+    limiter.check("1.2.3.4")
+    limiter.refund("1.2.3.4")
+    limiter.refund("1.2.3.4")
+    limiter.refund("unknown")
+
+    assert limiter.check("1.2.3.4") is None
+    assert limiter.check("1.2.3.4") is not None
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_waiters_get_slots_in_fifo_order():
+    async def scenario():
+        controller = AdmissionController("chat", max_concurrent=1, max_queue=2, queue_timeout=1)
+        first = await controller.acquire()
+        order = []
+
+        async def wait(name):
+            ticket = await controller.acquire()
+            order.append(name)
+            ticket.release()
+
+        waiters = [asyncio.create_task(wait("a")), asyncio.create_task(wait("b"))]
+        await asyncio.sleep(0)
+        assert controller.get_stats()["queue_depth"] == 2
+        first.release()
+        await asyncio.gather(*waiters)
+        return order, controller.get_stats()
+
+    order, stats = run(scenario())
+    assert order == ["a", "b"]
+    assert stats["active"] == 0 and stats["admitted"] == 3 and stats["queued"] == 2
+
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        controller = AdmissionController("chat", max_concurrent=1, max_queue=1, queue_timeout=1)
+        await controller.acquire()
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        queued.cancel()
+        return rejected.value, controller
+
+    error, controller = run(scenario())
+    assert error.reason == "queue_full" and error.retry_after >= 1
+    assert controller.rejected == 1
+
+
+def test_queue_timeout_rejects_and_frees_the_queue_slot():
+    async def scenario():
+        controller = AdmissionController("chat", max_concurrent=1, max_queue=1, queue_timeout=0.01)
+        ticket = await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        ticket.release()
+        return rejected.value, controller.get_stats()
+
+    error, stats = run(scenario())
+    assert error.reason == "queue_timeout"
+    assert stats["queue_depth"] == 0 and stats["active"] == 0 and stats["rejected_timeout"] == 1
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        controller = AdmissionController("chat", max_concurrent=1, max_queue=2, queue_timeout=1)
+        ticket = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        ticket.release()
+        ticket.release()  # idempotent
+        return controller.get_stats()
+
+    stats = run(scenario())
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
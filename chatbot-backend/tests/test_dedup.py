@@ -0,0 +1,111 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Near-duplicate chunk detection (MinHash + LSH)
+"""
+
+from pathlib import Path
+import pytest
+from config import get_settings
+from dedup import NearDuplicateIndex
+from document_pipeline import process_file
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+PASSAGE = (
+    "Luxivolt Mühendislik, orta gerilim trafo merkezlerinin kurulumu, periyodik bakımı "
+    "ve arıza onarımı konusunda uzmanlaşmış bir mühendislik firmasıdır. Yıllık bakım "
+    "sözleşmesi kapsamında termal kamera ölçümü, yağ analizi ve koruma rölesi testleri "
+    "yapılır; raporlar bakım sonrası iki iş günü içinde teslim edilir."
+)
+
+
+def test_pdf_extraction_artifacts_still_match():
+    index = NearDuplicateIndex()
+    index.add("md", index.signature(f"## Hizmetler\n\n{PASSAGE}"))
+    # PDF çıkarımı: bölünmüş kelimeler, madde numaraları, farklı satır sonları
+    pdf_text = "1 " + PASSAGE.replace("Mühendislik", "Mühen dislik").replace(". ", ".\n2 ")
+
+    match = index.find(index.signature(pdf_text))
+
+    assert match is not None and match[0] == "md"
+
+
+def test_shifted_chunk_boundaries_match_by_containment():
+    index = NearDuplicateIndex()
+    index.add("md", index.signature(PASSAGE))
+
+    match = index.find(index.signature(PASSAGE[: len(PASSAGE) * 2 // 3]))
+
+    assert match is not None and match[0] == "md" and match[1] > 0.9
+
+
+def test_unrelated_text_does_not_match():
+    index = NearDuplicateIndex()
+    index.add("md", index.signature(PASSAGE))
+
+    assert index.find(index.signature(
+        "Güneş enerjisi santrallerinde inverter seçimi, panel açısı ve gölgelenme analizi "
+        "ile yıllık üretim tahmini proje başında hazırlanır ve müşteriyle paylaşılır."
+    )) is None
+
+
+def test_wordless_chunks_are_never_deduplicated():
+    index = NearDuplicateIndex()
+    assert index.signature("| --- | --- |") is None
+    index.add("rule", None)
+
+    assert index.find(None) is None
+    assert len(index) == 1
+    index.remove("rule")
+    assert len(index) == 0
+
+
+def test_removed_chunk_no_longer_matches():
+    index = NearDuplicateIndex()
+    index.add("md", index.signature(PASSAGE))
+    index.remove("md")
+
+    assert index.find(index.signature(PASSAGE)) is None
+
+
+def test_signatures_round_trip(tmp_path):
+    index = NearDuplicateIndex()
+    index.add("md", index.signature(PASSAGE))
+    index.add("rule", None)
+    index.save(tmp_path / "signatures.npz")
+
+    loaded = NearDuplicateIndex()
+    missing = loaded.load(tmp_path / "signatures.npz", {"md", "rule", "new"})
+
+    assert missing == {"new"}
+    assert loaded.find(loaded.signature(PASSAGE)) == ("md", 1.0)
+    # Farklı shingle ayarıyla kaydedilmiş imzalar kullanılmaz
+    other = NearDuplicateIndex(shingle_size=4)
+    assert other.load(tmp_path / "signatures.npz", {"md"}) == {"md"}
+
+
+@pytest.mark.parametrize("stem", ["sss", "sirket_profili", "teknik_hizmetler"])
+def test_shipped_pdf_copies_collapse_onto_markdown(stem):
+    settings = get_settings()
+    index = NearDuplicateIndex(
+        threshold=settings.dedup_threshold,
+        shingle_size=settings.dedup_shingle_size,
+        num_perm=settings.dedup_num_perm,
+    )
+
+    def chunks(name: str) -> list[str]:
+        result = process_file(
+            DATA_DIR / name, DATA_DIR, settings.chunk_size, settings.chunk_overlap,
+            settings.chunk_separators,
+        )
+        assert result.error is None, result.error
+        return [doc.page_content for doc in result.documents]
+
+    md_chunks = chunks(f"{stem}.md")
+    for i, text in enumerate(md_chunks):
+        index.add(f"{stem}.md::{i}", index.signature(text))
+
+    for text in chunks(f"{stem}.pdf"):
+        match = index.find(index.signature(text))
+        assert match is not None, text
+        assert match[0].startswith(f"{stem}.md::")
@@ -0,0 +1,95 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Index generations: atomic swap, pruning of retired generations, background reindex
+"""
+
+import asyncio
+import threading
+import pytest
+import rag_service
+from rag_service import CURRENT_POINTER, RAGService
+from reindexer import BackgroundReindexer
+from vector_store import NumpyVectorStore
+
+
+def reindex(rag: RAGService) -> RAGService:
+    builder = rag.create_generation()
+    rag.build_generation(builder)
+    rag.swap_index(builder)
+    return builder
+
+
+def test_swap_points_current_at_the_new_generation(rag):
+    first_store, version = rag.store, rag.index_version
+    (rag.data_dir / "sss.md").write_text("Garanti süresi iki yıldır.", encoding="utf-8")
+
+    builder = reindex(rag)
+
+    assert rag.index_dir == builder.index_dir
+    assert (rag.chroma_dir / CURRENT_POINTER).read_text(encoding="utf-8") == builder.index_dir.name
+    assert rag.store is builder.store and rag.store is not first_store
+    assert rag.index_version == version + 1
+    assert {r["source"] for r in rag.search("garanti süresi", k=1, score_threshold=0.0)} == {"sss.md"}
+    # Yeniden açılan servis CURRENT'ın gösterdiği jenerasyonu kullanır
+    reopened = RAGService(data_dir=rag.data_dir, chroma_dir=rag.chroma_dir, embeddings=type(rag.embeddings)())
+    assert reopened.index_dir == builder.index_dir
+    assert reopened.store.count() == rag.store.count()
+
+
+def test_prune_keeps_the_previous_generation_and_closes_older_ones(rag, monkeypatch):
+    closed = []
+    monkeypatch.setattr(NumpyVectorStore, "close", lambda store: closed.append(store))
+    root_store = rag.store
+
+    first = reindex(rag)
+    # İlk indeks (chroma_dir altında) önceki jenerasyon olarak tutulur
+    assert closed == []
+    assert (rag.chroma_dir / rag_service.MANIFEST_NAME).exists()
+
+    second = reindex(rag)
+    assert closed == [root_store]
+    assert not (rag.chroma_dir / rag_service.MANIFEST_NAME).exists()
+    assert rag.list_generations() == [first.index_dir, second.index_dir]
+
+    third = reindex(rag)
+    assert closed == [root_store, first.store]
+    assert not first.index_dir.exists()
+    assert rag.list_generations() == [second.index_dir, third.index_dir]
+    assert rag.search("trafo bakım", k=1, score_threshold=0.0)
+
+
+def test_failed_build_is_discarded(rag, monkeypatch):
+    live = rag.index_dir
+    builder = rag.create_generation()
+    monkeypatch.setattr(builder, "index_documents", lambda **kwargs: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        rag.build_generation(builder)
+
+    assert not builder.index_dir.exists()
+    assert rag.index_dir == live
+    assert rag.search("trafo bakım", k=1, score_threshold=0.0)
+
+
+def test_background_reindex_swaps_off_the_event_loop(rag, monkeypatch):
+    swap_threads = []
+    swap_index = rag.swap_index
+
+    def recording_swap(builder):
+        swap_threads.append(threading.current_thread())
+        swap_index(builder)
+
+    monkeypatch.setattr(rag, "swap_index", recording_swap)
+    swapped = []
+
+    async def scenario():
+        reindexer = BackgroundReindexer(rag, on_swap=swapped.append)
+        reindexer.start(trigger="test")
+        return await reindexer.wait()
+
+    status = asyncio.run(scenario())
+
+    assert status["state"] == "succeeded"
+    assert swap_threads and swap_threads[0] is not threading.main_thread()
+    assert swapped == [rag.store.count()]
+    assert rag.index_dir.name == status["generation"]
@@ -0,0 +1,68 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Lexical fast path: selective keyword queries answered by BM25 without embedding
+"""
+
+import asyncio
+import pytest
+
+CITIES = [
+    "Ankara", "Bursa", "Konya", "Adana", "Samsun", "Trabzon",
+    "Kayseri", "Eskişehir", "Denizli", "Malatya", "Edirne", "Sivas",
+]
+
+
+@pytest.fixture
+def catalog(rag):
+    (rag.data_dir / "trafolar.md").write_text(
+        "# Trafolar\n\n1600 kVA kuru tip trafo stokta mevcuttur.\n\n"
+        "Yağlı tip trafolar için periyodik yağ analizi yapılır.",
+        encoding="utf-8",
+    )
+    (rag.data_dir / "pano.md").write_text(
+        "# Panolar\n\nAG ve OG pano montajı ile kompanzasyon hizmeti verilir.", encoding="utf-8"
+    )
+    # Yeterince (birbirinin kopyası olmayan) chunk: nadir terimlerin IDF'i
+    # LEXICAL_FAST_PATH_MIN_IDF'i geçer
+    for city in CITIES:
+        (rag.data_dir / f"{city.lower()}.md").write_text(
+            f"# {city}\n\n{city} şubemiz trafo ve pano bakımını {city} ilinde yapar.",
+            encoding="utf-8",
+        )
+    rag.index_documents(force_reindex=True)
+    rag.embeddings.calls = 0
+    rag._embedding_cache.clear()
+    return rag
+
+
+def test_selective_query_skips_embedding(catalog):
+    results = catalog.search("1600 kVA", k=4)
+
+    assert [r["source"] for r in results] == ["trafolar.md"]
+    assert results[0]["retrieval"] == "lexical"
+    assert results[0]["score"] == 1.0 and results[0]["lexical_score"] > 0
+    assert catalog.embeddings.calls == 0
+    assert asyncio.run(catalog.asearch("1600 kVA", k=4))[0]["source"] == "trafolar.md"
+    assert catalog.embeddings.calls == 0
+
+
+def test_partial_match_falls_back_to_vector_search(catalog):
+    # "1600" ve "kompanzasyon" farklı dosyalarda: hiçbir chunk sorgunun tamamını kapsamaz
+    results = catalog.search("1600 kompanzasyon", k=4, score_threshold=0.0)
+
+    assert catalog.embeddings.calls == 1
+    assert all(r["retrieval"] != "lexical" for r in results)
+
+
+def test_common_terms_use_vector_search(catalog):
+    catalog.search("trafo bakımı", k=4, score_threshold=0.0)
+
+    assert catalog.embeddings.calls == 1
+
+
+def test_batch_embeds_only_non_lexical_queries(catalog):
+    batches = catalog.search_many(["1600 kVA", "trafo bakımı"], k=4, score_threshold=0.0)
+
+    assert batches[0][0]["source"] == "trafolar.md"
+    assert batches[1] and batches[1][0]["retrieval"] != "lexical"
+    assert catalog.embeddings.calls == 1
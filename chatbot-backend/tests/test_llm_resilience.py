@@ -0,0 +1,162 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Circuit breaker state machine and its use by the streaming LLM client
+"""
+
+import asyncio
+from types import SimpleNamespace
+import pytest
+from config import Settings
+from llm_client import LLMClient
+from llm_resilience import CircuitBreaker, LLMUnavailableError
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("m", failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+    open_breaker(breaker)
+    assert breaker.state == "open"
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=0)
+    open_breaker(breaker)
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=0)
+    open_breaker(breaker)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+
+def test_released_trial_lets_the_next_call_try():
+    breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=0)
+    open_breaker(breaker)
+    assert breaker.allow()
+
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+class FakeStream:
+    """Async iterator standing in for an OpenRouter completion stream."""
+
+    def __init__(self, deltas: list[str]):
+        self._deltas = iter(deltas)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            delta = next(self._deltas)
+        except StopIteration:
+            raise StopAsyncIteration
+        await asyncio.sleep(0)
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    async def close(self):
+        self.closed = True
+
+
+def make_client(create) -> LLMClient:
+    client = LLMClient(Settings(
+        _env_file=None,
+        openrouter_model="primary",
+        llm_breaker_failure_threshold=1,
+        llm_breaker_reset_timeout=0,
+        llm_max_retries=0,
+    ))
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client
+
+
+def half_open(client: LLMClient) -> CircuitBreaker:
+    breaker = client._breaker("primary")
+    open_breaker(breaker)
+    return breaker
+
+
+@pytest.mark.parametrize("tokens_read", [0, 1])
+def test_disconnect_during_trial_does_not_lock_the_breaker(tokens_read):
+    async def create(**kwargs):
+        if tokens_read == 0:
+            await asyncio.sleep(3600)
+        return FakeStream(["Merhaba", " dünya"])
+
+    async def scenario():
+        client = make_client(create)
+        breaker = half_open(client)
+        stream = client.stream([{"role": "user", "content": "selam"}])
+        if tokens_read == 0:
+            task = asyncio.ensure_future(stream.__aiter__().__anext__())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        else:
+            await stream.__aiter__().__anext__()
+            await stream.aclose()
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == ("half_open" if tokens_read == 0 else "closed")
+    assert breaker.allow()
+
+
+def test_cancelled_completion_releases_the_trial():
+    async def create(**kwargs):
+        await asyncio.sleep(3600)
+
+    async def scenario():
+        client = make_client(create)
+        breaker = half_open(client)
+        task = asyncio.ensure_future(client.complete([{"role": "user", "content": "selam"}]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return breaker
+
+    assert asyncio.run(scenario()).allow()
+
+
+def test_open_breaker_without_fallback_is_unavailable():
+    async def create(**kwargs):
+        raise AssertionError("must not be called while the breaker is open")
+
+    async def scenario():
+        client = make_client(create)
+        client._breaker("primary").reset_timeout = 60
+        open_breaker(client._breaker("primary"))
+        async for _ in client.stream([{"role": "user", "content": "selam"}]):
+            pass
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(scenario())
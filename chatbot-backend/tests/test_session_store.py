@@ -0,0 +1,98 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Server-side conversation sessions (memory and SQLite backends)
+"""
+
+import pytest
+import session_store
+from session_store import MemorySessionStore, SQLiteSessionStore, message_size
+
+
+def turn(question: str, answer: str = "Tamam.") -> list[dict]:
+    return [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+
+
+class Clock:
+    """Replaces time.monotonic / time.time in session_store."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "monotonic", clock)
+    monkeypatch.setattr(session_store.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemorySessionStore(max_sessions=2, ttl=60, max_messages=4)
+    return SQLiteSessionStore(tmp_path / "sessions.db", max_sessions=2, ttl=60, max_messages=4)
+
+
+def test_history_keeps_the_newest_messages(store):
+    store.append("s1", turn("Trafo bakımı?"))
+    store.append("s1", turn("Fiyat?"))
+    store.append("s1", turn("Süre?"))
+
+    history = store.get("s1")
+
+    assert [m["content"] for m in history] == ["Fiyat?", "Tamam.", "Süre?", "Tamam."]
+    assert store.get("unknown") is None
+
+
+def test_sessions_expire_after_ttl(store, clock):
+    store.append("s1", turn("Trafo bakımı?"))
+    clock.now += 30
+    assert store.get("s1") is not None  # okuma oturumu tazeler
+
+    clock.now += 61
+    assert store.get("s1") is None
+    store.append("s1", turn("Yeni soru"))
+    assert [m["content"] for m in store.get("s1")] == ["Yeni soru", "Tamam."]
+
+
+def test_delete(store):
+    store.append("s1", turn("Trafo bakımı?"))
+
+    assert store.delete("s1") is True
+    assert store.delete("s1") is False
+    assert store.get("s1") is None
+
+
+def test_memory_store_evicts_least_recently_used(clock):
+    store = MemorySessionStore(max_sessions=2, ttl=60, max_messages=4)
+    store.append("s1", turn("a"))
+    store.append("s2", turn("b"))
+    store.get("s1")
+    store.append("s3", turn("c"))
+
+    assert store.get("s2") is None
+    assert store.get("s1") is not None and store.get("s3") is not None
+    assert store.get_stats()["evictions"] == 1
+
+
+def test_memory_store_respects_the_byte_cap(clock):
+    messages = turn("x" * 100)
+    cap = sum(message_size(m) for m in messages)
+    store = MemorySessionStore(max_sessions=10, ttl=60, max_bytes=cap, max_messages=4)
+    store.append("s1", messages)
+    store.append("s2", messages)
+
+    stats = store.get_stats()
+    assert stats["sessions"] == 1 and stats["bytes"] <= cap
+    assert store.get("s2") is not None
+
+
+def test_sqlite_sessions_survive_a_restart(tmp_path, clock):
+    path = tmp_path / "sessions.db"
+    SQLiteSessionStore(path).append("s1", turn("Trafo bakımı?"))
+
+    assert SQLiteSessionStore(path).get("s1") == turn("Trafo bakımı?")
@@ -0,0 +1,77 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Single-flight request coalescing
+"""
+
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight("search")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "sonuç"
+
+        results = await asyncio.gather(*(flight.do("trafo", compute) for _ in range(5)))
+        return results, calls, flight.get_stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ["sonuç"] * 5
+    assert calls == 1
+    assert stats["saved_calls"] == 4 and stats["in_flight"] == 0 and stats["max_waiters"] == 5
+
+
+def test_results_are_not_cached_after_completion():
+    async def scenario():
+        flight = SingleFlight("search")
+
+        async def compute():
+            return object()
+
+        return await flight.do("trafo", compute), await flight.do("trafo", compute), flight
+
+    first, second, flight = asyncio.run(scenario())
+    assert first is not second
+    assert flight.executions == 2
+
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight("chat")
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream")
+
+        return await asyncio.gather(
+            *(flight.do("selam", compute) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+def test_cancelled_leader_does_not_cancel_the_computation():
+    async def scenario():
+        flight = SingleFlight("chat")
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "yanıt"
+
+        leader = asyncio.create_task(flight.do("selam", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("selam", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "yanıt"
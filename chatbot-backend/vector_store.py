@@ -0,0 +1,386 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Pluggable vector store backends
+
+- ChromaVectorStore: kalıcı ChromaDB koleksiyonu (varsayılan)
+- NumpyVectorStore: normalize embedding'leri tek bir float32 matriste tutan,
+  memory-mapped .npy olarak saklanan süreç içi indeks (küçük korpuslar için)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+import numpy as np
+
+
+class VectorStore:
+    """
+    Interface of a vector store backend.
+
+    All embeddings are assumed to be L2-normalized, so scores returned by
+    ``query`` are cosine similarities.
+    """
+
+    name = "base"
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        documents: list[str],
+        metadatas: list[dict],
+    ) -> None:
+        raise NotImplementedError
+
+    def delete(self, ids: list[str]) -> None:
+        raise NotImplementedError
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        """Merge the given keys into the metadata of stored chunks (missing IDs are skipped)."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Remove every chunk from the store."""
+        raise NotImplementedError
+
+    def query(self, embeddings: list[list[float]], k: int) -> list[list[dict]]:
+        """
+        Find the k nearest chunks for each query embedding.
+
+        Returns:
+            One list per query of ``{"id", "content", "metadata", "score"}``
+            dicts, best first.
+        """
+        raise NotImplementedError
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        """Return stored embeddings by chunk ID (missing IDs are skipped)."""
+        raise NotImplementedError
+
+    def iter_documents(self) -> Iterator[tuple[str, str, dict]]:
+        """Iterate over all stored chunks as (id, content, metadata)."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Make all writes durable (checkpoint)."""
+
+    def close(self) -> None:
+        """Release the backend's resources (memory, file handles); the store is unusable afterwards."""
+
+    def get_stats(self) -> dict:
+        return {"backend": self.name, "total_chunks": self.count()}
+
+
+class ChromaVectorStore(VectorStore):
+    """ChromaDB collection persisted on disk."""
+
+    name = "chroma"
+
+    def __init__(self, persist_directory: Path, collection_name: str):
+        import chromadb
+
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self._client = chromadb.PersistentClient(path=str(persist_directory))
+        self._collection = self._client.get_or_create_collection(collection_name)
+
+    def count(self) -> int:
+        return self._collection.count()
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        self._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas,
+        )
+
+    def delete(self, ids: list[str]) -> None:
+        if ids:
+            self._collection.delete(ids=ids)
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        if not ids:
+            return
+        # Chroma var olmayan ID'ler için uyarı verir: yalnızca mevcut olanlar güncellensin
+        existing = set(self._collection.get(ids=ids, include=[])["ids"])
+        pairs = [(chunk_id, metadata) for chunk_id, metadata in zip(ids, metadatas) if chunk_id in existing]
+        if pairs:
+            # update() metadata anahtarlarını birleştirir (diğer alanlar korunur)
+            self._collection.update(
+                ids=[chunk_id for chunk_id, _ in pairs],
+                metadatas=[metadata for _, metadata in pairs],
+            )
+
+    def reset(self) -> None:
+        self._client.delete_collection(self.collection_name)
+        self._collection = self._client.get_or_create_collection(self.collection_name)
+
+    def query(self, embeddings: list[list[float]], k: int) -> list[list[dict]]:
+        if not embeddings or self.count() == 0:
+            return [[] for _ in embeddings]
+
+        results = self._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        all_hits = []
+        for i, query in enumerate(embeddings):
+            if not results["ids"][i]:
+                all_hits.append([])
+                continue
+            # Normalize edilmiş vektörlerde dot product = cosine similarity
+            chunk_vectors = np.asarray(results["embeddings"][i], dtype=np.float32)
+            scores = chunk_vectors @ np.asarray(query, dtype=np.float32)
+            hits = [
+                {"id": chunk_id, "content": content, "metadata": metadata or {}, "score": float(score)}
+                for chunk_id, content, metadata, score in zip(
+                    results["ids"][i], results["documents"][i], results["metadatas"][i], scores
+                )
+            ]
+            hits.sort(key=lambda h: h["score"], reverse=True)
+            all_hits.append(hits)
+        return all_hits
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        if not ids:
+            return {}
+        results = self._collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(results["ids"], results["embeddings"]))
+
+    def iter_documents(self, page_size: int = 1000) -> Iterator[tuple[str, str, dict]]:
+        offset = 0
+        while True:
+            results = self._collection.get(
+                include=["documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if not results["ids"]:
+                return
+            for chunk_id, content, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            ):
+                yield chunk_id, content, metadata or {}
+            offset += len(results["ids"])
+
+    def close(self) -> None:
+        from chromadb.api.shared_system_client import SharedSystemClient
+
+        # PersistentClient'lar yola göre süreç genelinde önbelleklenir ve kendiliğinden kapanmaz
+        identifier = getattr(self._client, "_identifier", None)
+        system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        if system is not None:
+            system.stop()
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["collection_name"] = self.collection_name
+        stats["directory"] = str(self.persist_directory)
+        return stats
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process index: one contiguous float32 matrix + a compact metadata file.
+
+    The matrix is persisted as ``embeddings.npy`` and memory-mapped on load,
+    so read-only processes share the pages through the OS cache. Search is a
+    single vectorised dot product followed by ``argpartition`` top-k.
+    """
+
+    name = "numpy"
+    MATRIX_FILE = "embeddings.npy"
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._matrix: Optional[np.ndarray] = None  # capacity x dim (may be a memmap)
+        self._size = 0
+        self._ids: list[str] = []
+        self._documents: list[str] = []
+        self._metadatas: list[dict] = []
+        self._rows: dict[str, int] = {}
+        self._writable = False
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        matrix_path = self.directory / self.MATRIX_FILE
+        metadata_path = self.directory / self.METADATA_FILE
+        if not matrix_path.exists() or not metadata_path.exists():
+            return
+
+        with open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        self._ids = metadata["ids"]
+        self._documents = metadata["documents"]
+        self._metadatas = metadata["metadatas"]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._size = len(self._ids)
+        if self._size:
+            self._matrix = np.load(matrix_path, mmap_mode="r")
+
+    def _ensure_writable(self, extra_rows: int, dim: int) -> None:
+        """Copy the memmap into RAM and grow capacity (amortized doubling)."""
+        needed = self._size + extra_rows
+        if self._matrix is None:
+            self._matrix = np.empty((max(needed, 1024), dim), dtype=np.float32)
+            self._writable = True
+            return
+        if not self._writable or needed > self._matrix.shape[0]:
+            capacity = max(needed, self._matrix.shape[0] * 2 if self._writable else needed)
+            matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+            matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+            self._writable = True
+
+    def count(self) -> int:
+        return self._size
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        new_ids = [chunk_id for chunk_id in ids if chunk_id not in self._rows]
+        self._ensure_writable(len(new_ids), vectors.shape[1])
+
+        for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                row = self._size
+                self._rows[chunk_id] = row
+                self._ids.append(chunk_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata)
+                self._size += 1
+            else:
+                self._documents[row] = document
+                self._metadatas[row] = metadata
+            self._matrix[row] = vector
+        self._dirty = True
+
+    def delete(self, ids: list[str]) -> None:
+        rows = sorted({self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows})
+        if not rows:
+            return
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        self._ensure_writable(0, self._matrix.shape[1])
+
+        remaining = int(keep.sum())
+        self._matrix[:remaining] = self._matrix[: self._size][keep]
+        self._ids = [chunk_id for chunk_id, k in zip(self._ids, keep) if k]
+        self._documents = [doc for doc, k in zip(self._documents, keep) if k]
+        self._metadatas = [meta for meta, k in zip(self._metadatas, keep) if k]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._size = remaining
+        self._dirty = True
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]) -> None:
+        for chunk_id, metadata in zip(ids, metadatas):
+            row = self._rows.get(chunk_id)
+            if row is not None:
+                # Kopya: query() sonuçlarına verilmiş eski dict değişmesin
+                self._metadatas[row] = {**self._metadatas[row], **metadata}
+                self._dirty = True
+
+    def reset(self) -> None:
+        self._matrix = None
+        self._size = 0
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._rows = {}
+        self._writable = False
+        self._dirty = True
+        self.flush()
+
+    def query(self, embeddings: list[list[float]], k: int) -> list[list[dict]]:
+        if not embeddings or self._size == 0:
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        scores = self._matrix[: self._size] @ queries.T  # (n_chunks, n_queries)
+        k = min(k, self._size)
+
+        all_hits = []
+        for j in range(queries.shape[0]):
+            column = scores[:, j]
+            if k < self._size:
+                top = np.argpartition(-column, k - 1)[:k]
+            else:
+                top = np.arange(self._size)
+            top = top[np.argsort(-column[top])]
+            all_hits.append([
+                {
+                    "id": self._ids[row],
+                    "content": self._documents[row],
+                    "metadata": self._metadatas[row],
+                    "score": float(column[row]),
+                }
+                for row in top
+            ])
+        return all_hits
+
+    def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        return {
+            chunk_id: self._matrix[self._rows[chunk_id]]
+            for chunk_id in ids
+            if chunk_id in self._rows
+        }
+
+    def iter_documents(self) -> Iterator[tuple[str, str, dict]]:
+        for chunk_id, content, metadata in zip(
+            list(self._ids), list(self._documents), list(self._metadatas)
+        ):
+            yield chunk_id, content, metadata
+
+    def flush(self) -> None:
+        """Write matrix and metadata atomically (write + rename)."""
+        if not self._dirty:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        matrix_path = self.directory / self.MATRIX_FILE
+        metadata_path = self.directory / self.METADATA_FILE
+
+        dim = self._matrix.shape[1] if self._matrix is not None else 0
+        matrix = self._matrix[: self._size] if self._matrix is not None else np.empty((0, dim), np.float32)
+        tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        tmp_metadata = metadata_path.with_suffix(".tmp")
+        with open(tmp_metadata, "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self._ids, "documents": self._documents, "metadatas": self._metadatas},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_metadata, metadata_path)
+        self._dirty = False
+
+    def close(self) -> None:
+        # Memmap, son referans bırakılınca kapanır
+        self._matrix = None
+        self._size = 0
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._rows = {}
+        self._dirty = False
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["directory"] = str(self.directory)
+        stats["matrix_bytes"] = int(self._size * self._matrix.shape[1] * 4) if self._matrix is not None else 0
+        return stats
+
+
+def create_vector_store(backend: str, index_dir: Path, collection_name: str) -> VectorStore:
+    """Create the vector store backend selected in Settings."""
+    if backend == "chroma":
+        return ChromaVectorStore(index_dir, collection_name)
+    if backend == "numpy":
+        return NumpyVectorStore(index_dir / "numpy" / collection_name)
+    raise ValueError(f"Unknown vector backend: {backend!r} (expected 'chroma' or 'numpy')")
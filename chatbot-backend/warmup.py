@@ -0,0 +1,122 @@
+"""
+Luxivolt Mühendislik Chatbot Backend
+Background RAG warm-up and readiness tracking
+
+Uygulama başlarken embedding modeli, vektör deposu ve indeks arka planda
+yüklenir; uvicorn bu sırada bağlantı kabul etmeye başlar. /health yalnızca
+sürecin ayakta olduğunu (liveness), /ready ise RAG'ın hazır olduğunu bildirir.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+from rag_service import get_rag_service
+
+logger = logging.getLogger(__name__)
+
+
+class RAGWarmup:
+    """
+    Loads the RAG service off the event loop and tracks its readiness.
+
+    Phases: pending -> loading_model -> indexing -> warming_up -> ready
+    (or failed). Requests can await readiness with a bounded timeout.
+    """
+
+    def __init__(self):
+        self.phase = "pending"
+        self.error: Optional[str] = None
+        self.chunk_count = 0
+        self.warmup_seconds: Optional[float] = None
+        self._started: Optional[float] = None
+        self._ready_after: Optional[float] = None
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        """Schedule the warm-up on the running event loop."""
+        self._started = time.perf_counter()
+        self.phase = "loading_model"
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            rag = await asyncio.to_thread(get_rag_service)
+
+            self.phase = "indexing"
+            self.chunk_count = await asyncio.to_thread(rag.index_documents, force_reindex=False)
+
+            self.phase = "warming_up"
+            self.warmup_seconds = await asyncio.to_thread(rag.warm_up)
+
+            self.phase = "ready"
+            self._ready_after = time.perf_counter() - self._started
+            self._ready.set()
+            logger.info(
+                f"📚 RAG service ready with {self.chunk_count} indexed chunks "
+                f"({self._ready_after:.1f}s, warm-up {self.warmup_seconds * 1000:.0f}ms)"
+            )
+        except Exception as e:
+            self.phase = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            logger.warning(
+                f"⚠️ RAG warm-up failed: {e}. The chatbot will work without RAG context."
+            )
+
+    def mark_ready(self, chunk_count: int) -> None:
+        """Record a successful (re)index, e.g. a manual retry after a failure."""
+        self.chunk_count = chunk_count
+        if not self.ready:
+            self.phase = "ready"
+            self.error = None
+            self._ready_after = time.perf_counter() - (self._started or time.perf_counter())
+            self._ready.set()
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for readiness; returns the outcome."""
+        if self.ready:
+            return True
+        if self.phase == "failed" or timeout <= 0:
+            return False
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self) -> None:
+        """Cancel a warm-up still running at shutdown."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def get_status(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "ready": self.ready,
+            "phase": self.phase,
+            "error": self.error,
+            "indexed_chunks": self.chunk_count,
+            "elapsed_seconds": round(self._ready_after or elapsed, 2),
+            "warmup_ms": round(self.warmup_seconds * 1000, 1) if self.warmup_seconds is not None else None,
+        }
+
+
+# Global instance
+_rag_warmup: Optional[RAGWarmup] = None
+
+
+def get_rag_warmup() -> RAGWarmup:
+    """Get the global warm-up tracker."""
+    global _rag_warmup
+    if _rag_warmup is None:
+        _rag_warmup = RAGWarmup()
+    return _rag_warmup
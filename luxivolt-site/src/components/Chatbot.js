@@ -21,6 +21,8 @@ export default function Chatbot() {
     const [inputValue, setInputValue] = useState("");
     const [isLoading, setIsLoading] = useState(false);
     const messagesEndRef = useRef(null);
+    // Sunucu tarafı oturum: geçmiş backend'de tutulur, sadece yeni mesaj gönderilir
+    const sessionIdRef = useRef(null);
     const [showScrollButton, setShowScrollButton] = useState(false);
 
     const quickActions = [
@@ -58,24 +60,66 @@ export default function Chatbot() {
         setIsLoading(true);
 
         try {
-            const response = await fetch("http://localhost:8000/chat", {
+            const response = await fetch("http://localhost:8000/chat/stream", {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify({
                     message: userMessage.content,
-                    conversation_history: messages.map(m => ({ role: m.role, content: m.content })),
+                    session_id: sessionIdRef.current,
                     use_rag: true
                 }),
             });
 
-            if (!response.ok) throw new Error("API hatası");
+            if (!response.ok || !response.body) throw new Error("API hatası");
 
-            const data = await response.json();
-            setMessages((prev) => [...prev, {
-                role: "assistant",
-                content: data.response,
-                timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
-            }]);
+            // İlk token'da asistan mesajını ekle, sonrakilerde doldur
+            let hasAssistantMessage = false;
+            const appendToAssistant = (text) => {
+                if (!hasAssistantMessage) {
+                    hasAssistantMessage = true;
+                    setIsLoading(false);
+                    setMessages((prev) => [...prev, {
+                        role: "assistant",
+                        content: text,
+                        timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+                    }]);
+                    return;
+                }
+                setMessages((prev) => {
+                    const updated = [...prev];
+                    const last = updated[updated.length - 1];
+                    updated[updated.length - 1] = { ...last, content: last.content + text };
+                    return updated;
+                });
+            };
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // SSE olayları boş satırla ayrılır
+                const events = buffer.split("\n\n");
+                buffer = events.pop();
+                for (const raw of events) {
+                    const eventLine = raw.split("\n").find(l => l.startsWith("event: "));
+                    const dataLine = raw.split("\n").find(l => l.startsWith("data: "));
+                    if (!eventLine || !dataLine) continue;
+                    const event = eventLine.slice(7);
+                    const data = JSON.parse(dataLine.slice(6));
+
+                    if (event === "token") {
+                        appendToAssistant(data.content);
+                    } else if (event === "done") {
+                        sessionIdRef.current = data.session_id;
+                    } else if (event === "error") {
+                        throw new Error(data.detail);
+                    }
+                }
+            }
         } catch (error) {
             console.error("Chat error:", error);
             setMessages((prev) => [